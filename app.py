@@ -16,6 +16,9 @@ import time as time_module
 from parking_manager import parking_manager, SlotStatus
 from detection_engine import detection_engine
 from csv_data_manager import csv_data_manager
+from holiday_calendar import holiday_calendar
+from inference_worker import InferenceWorker
+from plate_consensus import PlateFrameBuffer
 
 # Page configuration
 st.set_page_config(
@@ -309,6 +312,12 @@ class AutoDetectionProcessor(VideoProcessorBase):
         self.last_finger_count = 0
         self.finger_count_history = []
         self.ok_gesture_counter = 0
+        self.ocr_future = None
+        self.plate_buffer = PlateFrameBuffer(capacity=5)  # sharpest plate crops of the hold window
+        
+        # Models run on a worker thread so recv keeps up with the camera;
+        # frames arriving while it is busy replace each other in its mailbox
+        self.worker = InferenceWorker(self._analyze, name="auto-detection")
         
     def recv(self, frame):
         img = frame.to_ndarray(format="bgr24")
@@ -317,8 +326,42 @@ class AutoDetectionProcessor(VideoProcessorBase):
         if not global_state.auto_mode_active:
             return av.VideoFrame.from_ndarray(img, format="bgr24")
         
+        self.worker.submit(img)
+        
+        # Draw the overlay of the latest analysed frame onto the live one
+        result = self.worker.latest()
+        if result is not None:
+            mask, annotated = result
+            if mask.shape == img.shape[:2]:
+                img = img.copy()
+                np.copyto(img, annotated, where=mask[..., None])
+        
+        return av.VideoFrame.from_ndarray(img, format="bgr24")
+    
+    def on_ended(self):
+        self.worker.close()
+    
+    def _analyze(self, frame):
+        """Run the current detection phase on a frame; returns the overlay mask and annotated frame"""
+        img = frame.copy()
         current_time = time_module.time()
         
+        # Collect a finished plate read; OCR runs in the background while frames keep coming
+        if self.ocr_future is not None and self.ocr_future.done():
+            ocr_future, self.ocr_future = self.ocr_future, None
+            try:
+                license_text = ocr_future.result()
+            except Exception as e:
+                # A failed read restarts the hold window like an unreadable plate
+                print(f"Error reading license plate: {e}")
+                license_text = None
+            if license_text and global_state.detection_phase == 'license_plate_detection':
+                global_state.auto_detection_results['license_plate'] = license_text
+                detection_engine.detection_result.current_phase = "Hand Gesture Detection"
+                global_state.detection_phase = 'gesture_detection'
+                global_state.plate_captured = True
+            self.detection_start_time = None
+        
         # Phase 1: Vehicle Detection
         if global_state.detection_phase == 'vehicle_detection':
             vehicle_detected, vehicle_type, confidence = detection_engine.detect_vehicle_in_frame(img)
@@ -354,24 +397,25 @@ class AutoDetectionProcessor(VideoProcessorBase):
             if plate_detected and confidence > 0.4:
                 if not self.detection_start_time:
                     self.detection_start_time = current_time
+                    self.plate_buffer.clear()
+                self.plate_buffer.add(plate_roi)
                 
                 elapsed = current_time - self.detection_start_time
                 remaining = max(0, 3 - elapsed)
                 
                 cv2.putText(img, f'License plate detected ({confidence:.2f})', 
                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                cv2.putText(img, f'Capturing in: {remaining:.1f}s', 
-                          (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+                if self.ocr_future is not None:
+                    cv2.putText(img, 'Reading license plate...', 
+                              (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+                else:
+                    cv2.putText(img, f'Capturing in: {remaining:.1f}s', 
+                              (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
                 
-                if elapsed >= 3 and not global_state.plate_captured:
-                    # Process license plate
-                    license_text = detection_engine.process_license_plate_ocr(plate_roi)
-                    if license_text:
-                        global_state.auto_detection_results['license_plate'] = license_text
-                        detection_engine.detection_result.current_phase = "Hand Gesture Detection"
-                        global_state.detection_phase = 'gesture_detection'
-                        global_state.plate_captured = True
-                    self.detection_start_time = None
+                if elapsed >= 3 and not global_state.plate_captured and self.ocr_future is None:
+                    # Read the sharpest crops of the window; the result is collected on a later frame
+                    self.ocr_future = detection_engine.submit_plate_consensus(self.plate_buffer.sharpest(3))
+                    self.plate_buffer.clear()
             else:
                 cv2.putText(img, 'Point camera at license plate', 
                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
@@ -427,23 +471,8 @@ class AutoDetectionProcessor(VideoProcessorBase):
             cv2.putText(img, 'Starting New Detection...', 
                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
         
-        return av.VideoFrame.from_ndarray(img, format="bgr24")
-
-# Holiday data for 2025
-HOLIDAYS_2025 = [
-    {'date': '2025-01-01', 'holiday': 'New Year\'s Day', 'hours': '12:00 AM - 11:59 PM'},
-    {'date': '2025-01-26', 'holiday': 'Republic Day', 'hours': '6:00 AM - 11:00 PM'},
-    {'date': '2025-03-13', 'holiday': 'Holi', 'hours': '10:00 AM - 12:00 AM'},
-    {'date': '2025-03-31', 'holiday': 'Eid ul-Fitr', 'hours': '6:00 AM - 11:00 PM'},
-    {'date': '2025-04-14', 'holiday': 'Ram Navami', 'hours': '6:00 AM - 10:00 PM'},
-    {'date': '2025-04-18', 'holiday': 'Good Friday', 'hours': '9:00 AM - 9:00 PM'},
-    {'date': '2025-08-15', 'holiday': 'Independence Day', 'hours': '6:00 AM - 11:00 PM'},
-    {'date': '2025-08-27', 'holiday': 'Janmashtami', 'hours': '8:00 AM - 12:00 AM'},
-    {'date': '2025-10-02', 'holiday': 'Gandhi Jayanti', 'hours': '6:00 AM - 10:00 PM'},
-    {'date': '2025-10-22', 'holiday': 'Dussehra', 'hours': '10:00 AM - 12:00 AM'},
-    {'date': '2025-11-12', 'holiday': 'Diwali', 'hours': '6:00 PM - 2:00 AM'},
-    {'date': '2025-12-25', 'holiday': 'Christmas Day', 'hours': '10:00 AM - 11:00 PM'}
-]
+        # Only the drawn pixels are kept, so recv can lay them over newer frames
+        return np.any(img != frame, axis=2), img
 
 def sync_global_state():
     """Sync global state with session state"""
@@ -657,6 +686,13 @@ def render_auto_mode():
             media_stream_constraints={"video": True, "audio": False},
         )
         
+        if webrtc_ctx.video_processor:
+            worker_stats = webrtc_ctx.video_processor.worker.stats()
+            cache_stats = detection_engine.ocr_cache.stats()
+            st.caption(f"Analysed {worker_stats['processed']} frames, skipped {worker_stats['dropped']} "
+                       f"stale frames ({worker_stats['last_ms']:.0f} ms per analysis); "
+                       f"plate cache {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        
         # Sync back from global state
         sync_session_state()
     
@@ -691,10 +727,14 @@ def render_auto_mode():
                     pickup_dt = current_time + timedelta(hours=results['parking_hours'])
                     
                     # Automatically park the vehicle without showing details
-                    success, assigned_slot_id = csv_data_manager.park_vehicle(
-                        results['vehicle_type'], results['license_plate'],
-                        arrival_dt, pickup_dt
-                    )
+                    try:
+                        success, assigned_slot_id = csv_data_manager.park_vehicle(
+                            results['vehicle_type'], results['license_plate'],
+                            arrival_dt, pickup_dt
+                        )
+                    except ValueError as e:
+                        st.error(f"❌ Failed to park vehicle: {e}")
+                        return
                     
                     if success:
                         slot_number = assigned_slot_id.split('_')[1]
@@ -741,6 +781,11 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
+    # Pick up changes made by other app workers or the CLI, then hold slots for
+    # bookings that have started and release expired ones
+    csv_data_manager.sync()
+    csv_data_manager.get_parking_manager().refresh_reservations(current_time)
+    
     # Metrics
     render_metrics()
     
@@ -807,18 +852,21 @@ def main():
                             if pickup_dt <= arrival_dt:
                                 st.error("Pickup time must be after arrival time.")
                             else:
-                                success, assigned_slot_id = csv_data_manager.park_vehicle(
-                                    vehicle_type, vehicle_number, 
-                                    arrival_dt, pickup_dt
-                                )
-                                
-                                if success:
-                                    slot_number = assigned_slot_id.split('_')[1]
-                                    st.success(f"Vehicle {vehicle_number} parked successfully in Slot {slot_number}!")
-                                    st.info("✅ Parking data saved to CSV file")
-                                    st.rerun()
+                                try:
+                                    success, assigned_slot_id = csv_data_manager.park_vehicle(
+                                        vehicle_type, vehicle_number, 
+                                        arrival_dt, pickup_dt
+                                    )
+                                except ValueError as e:
+                                    st.error(f"Failed to park vehicle: {e}")
                                 else:
-                                    st.error("Failed to park vehicle. No available slots.")
+                                    if success:
+                                        slot_number = assigned_slot_id.split('_')[1]
+                                        st.success(f"Vehicle {vehicle_number} parked successfully in Slot {slot_number}!")
+                                        st.info("✅ Parking data saved to CSV file")
+                                        st.rerun()
+                                    else:
+                                        st.error("Failed to park vehicle. No available slots.")
                 else:
                     st.warning("No available parking slots.")
         
@@ -836,37 +884,32 @@ def main():
                 with col_b:
                     duration = st.number_input("Duration (hours)", min_value=1, max_value=24, value=2)
                 
-                available_slots = csv_data_manager.get_parking_manager().get_available_slots()
-                if available_slots:
-                    # Show automatic slot assignment info
-                    if vehicle_type == "Truck":
-                        st.info("🚛 Truck will be automatically assigned to the highest available slot number")
+                # Show automatic slot assignment info
+                if vehicle_type == "Truck":
+                    st.info("🚛 Truck will be automatically assigned to the highest available slot number")
+                else:
+                    st.info("🚗 Vehicle will be automatically assigned to the lowest available slot number")
+                
+                submitted = st.form_submit_button("📅 Reserve Slot")
+                
+                if submitted:
+                    if not vehicle_number:
+                        st.error("Please enter vehicle number.")
                     else:
-                        st.info("🚗 Vehicle will be automatically assigned to the lowest available slot number")
-                    
-                    submitted = st.form_submit_button("📅 Reserve Slot")
-                    
-                    if submitted:
-                        if not vehicle_number:
-                            st.error("Please enter vehicle number.")
+                        reserve_dt = datetime.combine(reserve_date, reserve_time)
+                        
+                        success, assigned_slot_id = csv_data_manager.reserve_slot(
+                            vehicle_type, vehicle_number, 
+                            reserve_dt, duration
+                        )
+                        
+                        if success:
+                            slot_number = assigned_slot_id.split('_')[1]
+                            st.success(f"Slot {slot_number} reserved successfully!")
+                            st.info("✅ Reservation data saved")
+                            st.rerun()
                         else:
-                            reserve_dt = datetime.combine(reserve_date, reserve_time)
-                            
-                            success, assigned_slot_id = csv_data_manager.get_parking_manager().reserve_slot(
-                                vehicle_type, vehicle_number, 
-                                reserve_dt, duration
-                            )
-                            
-                            if success:
-                                slot_number = assigned_slot_id.split('_')[1]
-                                st.success(f"Slot {slot_number} reserved successfully!")
-                                csv_data_manager.save_to_csv()
-                                st.info("✅ Reservation data saved to CSV file")
-                                st.rerun()
-                            else:
-                                st.error("Failed to reserve slot. No available slots.")
-                else:
-                    st.warning("No available parking slots.")
+                            st.error("Failed to reserve slot. No slot is free for that time window.")
         
         with tab4:
             st.markdown("### Remove Vehicle & Generate Bill")
@@ -892,6 +935,10 @@ def main():
                             st.write(f"Vehicle: {slot_info.vehicle_type}")
                             st.write(f"Number: {slot_info.vehicle_number}")
                             st.write(f"Arrival: {slot_info.arrival_time.strftime('%Y-%m-%d %H:%M')}")
+                            current_bill = csv_data_manager.get_parking_manager().calculate_parking_fee(
+                                slot_info.vehicle_type, slot_info.arrival_time, current_time
+                            )
+                            st.write(f"Current Charge: ₹{current_bill['total_cost']:.2f}")
                     
                     submitted = st.form_submit_button("🚪 Generate Bill & Remove")
                     
@@ -975,6 +1022,13 @@ def main():
                     st.markdown(href, unsafe_allow_html=True)
             else:
                 st.info("No transaction history available.")
+            
+            # Daily revenue from the transaction archive, which keeps every bill
+            month_start = current_time.date() - timedelta(days=29)
+            daily_revenue = csv_data_manager.archived_revenue(month_start, current_time.date(), by=("day", "vehicle_type"))
+            if not daily_revenue.empty:
+                st.markdown("#### Daily Revenue (Last 30 Days)")
+                st.bar_chart(daily_revenue.pivot_table(index="day", columns="vehicle_type", values="amount", fill_value=0))
         
         with tab6:
             st.markdown("### 📋 CSV Parking Data")
@@ -1073,16 +1127,12 @@ def main():
             st.markdown("#### Upcoming Holidays with Rush Hours:")
             
             current_date = datetime.now().date()
-            upcoming_holidays = [
-                h for h in HOLIDAYS_2025 
-                if datetime.strptime(h['date'], '%Y-%m-%d').date() >= current_date
-            ][:5]  # Show next 5 holidays
+            upcoming_holidays = holiday_calendar.upcoming(current_date, 5)  # Show next 5 holidays
             
             for holiday in upcoming_holidays:
-                date_obj = datetime.strptime(holiday['date'], '%Y-%m-%d').date()
-                st.write(f"**{holiday['holiday']}**")
-                st.write(f"📅 {date_obj.strftime('%B %d, %Y')}")
-                st.write(f"🕒 {holiday['hours']}")
+                st.write(f"**{holiday.name}**")
+                st.write(f"📅 {holiday.date.strftime('%B %d, %Y')}")
+                st.write(f"🕒 {holiday.hours_label}")
                 st.write("---")
         
         # Clear all data (admin function)
@@ -1091,8 +1141,7 @@ def main():
         
         if st.button("🗑️ Clear All Data", type="secondary"):
             if st.checkbox("I confirm to clear all parking data"):
-                csv_data_manager.get_parking_manager().clear_all_data()
-                csv_data_manager.save_to_csv()
+                csv_data_manager.clear_all_data()
                 st.success("All data cleared successfully!")
                 st.rerun()
 
@@ -0,0 +1,113 @@
+from datetime import date
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+# Night hours (11 PM to 5 AM) as half-open hour-of-day ranges
+NIGHT_WINDOWS = ((0, 5), (23, 24))
+
+# Regular rush hours by weekday (Friday 5PM-midnight, weekends 11AM-midnight)
+WEEKDAY_RUSH_WINDOWS = {4: (17, 24), 5: (11, 24), 6: (11, 24)}
+
+RushWindow = Optional[Tuple[int, int]]
+
+
+def regular_rush_window(day: date) -> RushWindow:
+    """Rush window for a non-holiday day, or None if the day has no rush hours"""
+    return WEEKDAY_RUSH_WINDOWS.get(day.weekday())
+
+
+# Hour classes used by the vectorised billing tables
+STANDARD, RUSH, NIGHT = 0, 1, 2
+
+HOUR = np.timedelta64(1, 'h')
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday
+
+
+def day_hour_classes(rush_window: RushWindow) -> np.ndarray:
+    """Classify the 24 hours of a day with the given rush window as STANDARD, RUSH or NIGHT"""
+    classes = np.full(24, STANDARD, dtype=np.int8)
+    for night_start, night_end in NIGHT_WINDOWS:
+        classes[night_start:night_end] = NIGHT
+    if rush_window:
+        rush_start, rush_end = rush_window
+        if rush_start < rush_end:
+            classes[rush_start:rush_end] = RUSH
+    return classes
+
+
+def hour_of_week_classes() -> np.ndarray:
+    """Build the (7, 24) class table for non-holiday days, indexed by weekday (Monday=0) and hour"""
+    return np.stack([
+        day_hour_classes(WEEKDAY_RUSH_WINDOWS.get(weekday)) for weekday in range(7)
+    ])
+
+
+def build_hour_timeline(first_day: np.datetime64, num_days: int, holiday_calendar) -> np.ndarray:
+    """Build the flat hourly class timeline for num_days days starting at first_day"""
+    days = first_day + np.arange(num_days)
+    weekdays = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+    timeline = hour_of_week_classes()[weekdays]
+
+    # Holidays replace the weekday rules for the whole day
+    last_day = (days[-1] if num_days else first_day).astype(date)
+    for holiday in holiday_calendar.holidays_between(first_day.astype(date), last_day):
+        row = (np.datetime64(holiday.date, 'D') - first_day).astype(np.int64)
+        timeline[row] = day_hour_classes(holiday.rush_window)
+
+    return timeline.ravel()
+
+
+def bill_many(vehicle_types, arrivals, departures, holiday_calendar,
+              standard_rate: Dict[str, float], rush_extra: Dict[str, float],
+              night_rate: float) -> Dict[str, np.ndarray]:
+    """Bill many stays at once, returning calculate_parking_fee's fields as per-session arrays"""
+    vehicle_types = np.asarray(vehicle_types)
+    arrivals = np.asarray(arrivals, dtype='datetime64[us]')
+    departures = np.asarray(departures, dtype='datetime64[us]')
+
+    total_us = (departures - arrivals).astype(np.int64)
+    hour_us = HOUR.astype('timedelta64[us]').astype(np.int64)
+    full_hours = total_us // hour_us
+    partial_hour = total_us % hour_us > 0
+    billed_hours = np.maximum(full_hours, 0)
+
+    standard_hours = np.zeros(len(arrivals), dtype=np.int64)
+    rush_hours = np.zeros(len(arrivals), dtype=np.int64)
+    night_hours = np.zeros(len(arrivals), dtype=np.int64)
+
+    if len(arrivals):
+        # One hourly timeline spanning every stay, then per-class prefix sums
+        arrival_hours = arrivals.astype('datetime64[h]').astype(np.int64)
+        first_day = arrivals.min().astype('datetime64[D]')
+        start = arrival_hours - first_day.astype('datetime64[h]').astype(np.int64)
+        end = start + billed_hours
+        num_days = int(-(-end.max() // 24))
+        timeline = build_hour_timeline(first_day, max(num_days, 1), holiday_calendar)
+
+        for hour_class, counts in ((STANDARD, standard_hours), (RUSH, rush_hours), (NIGHT, night_hours)):
+            prefix = np.concatenate(([0], np.cumsum(timeline == hour_class, dtype=np.int64)))
+            counts[:] = prefix[end] - prefix[start]
+
+    # Resolve per-session rates from the vehicle type
+    type_names, type_codes = np.unique(vehicle_types, return_inverse=True)
+    base_rate = np.array([standard_rate[name] for name in type_names])[type_codes]
+    rush_surcharge = np.array([rush_extra[name] for name in type_names])[type_codes]
+
+    standard_charge = standard_hours * base_rate
+    rush_charge = rush_hours * (base_rate + rush_surcharge)
+    night_charge = night_hours * night_rate
+    total = standard_charge + rush_charge + night_charge
+
+    return {
+        'duration_hours': full_hours + np.where(partial_hour, 0.5, 0),
+        'regular_hours': standard_hours,
+        'rush_hours': rush_hours,
+        'night_hours': night_hours,
+        'base_rate': base_rate,
+        'rush_surcharge': rush_surcharge,
+        'night_rate': np.full(len(arrivals), night_rate),
+        'total_cost': np.round(total, 2),
+        'standard_charge': standard_charge,
+        'rush_charge': rush_charge,
+        'night_charge': night_charge
+    }
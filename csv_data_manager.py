@@ -1,64 +1,115 @@
 #!/usr/bin/env python3
 
 import pandas as pd
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager, nullcontext
+from dataclasses import fields
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 import os
-from parking_manager import ParkingManager, SlotStatus, ParkingSlot
+import numpy as np
+from flusher import BackgroundFlusher
+from ledger import TransactionLedger
+from parking_manager import ParkingManager, SlotStatus, ParkingSlot, Transaction
+from reservation_file import ReservationFile
+from reservations import Reservation
+from slot_file import MappedSlotFile, check_vehicle
+from slot_journal import SlotJournal
+from sqlite_store import SQLiteStore
+from state_lock import StateLock
+from transaction_archive import TransactionArchive
 
 class CSVDataManager:
     """Manages parking data in CSV format compatible with the original ParkingSystem"""
     
-    def __init__(self, csv_filename: str = "parking_data.csv"):
+    def __init__(self, csv_filename: str = "parking_data.csv", journal: bool = False,
+                 backend: str = "csv", db_filename: str = "parking_data.db",
+                 flush_window: Optional[float] = None, total_slots: int = 20,
+                 archive_dir: Optional[str] = None, slot_filename: str = "parking_data.slots",
+                 ledger_filename: Optional[str] = None, shared: bool = False):
         self.csv_filename = csv_filename
+        self.total_slots = total_slots
         self.expected_columns = [
             "Slot", "VehicleType", "VehicleNumber", "ArrivalDate", 
             "ArrivalTime", "ExpectedPickupDate", "ExpectedPickupTime", 
             "Weekday", "Charge"
         ]
-        self.parking_manager = ParkingManager()
-        self._load_from_csv()
+        self.parking_manager = ParkingManager(total_slots)
+        self.skipped_rows: List[Tuple[int, str]] = []  # (CSV line, reason) from the last load
+        
+        # With shared=True several processes can use the same files: changes are made under an
+        # inter-process lock and bump a shared version, and other processes reload when it moves
+        if shared and journal:
+            raise ValueError("The slot journal keeps per-process state and cannot be shared")
+        self.state_lock = StateLock(csv_filename + ".lock") if shared else None
+        self._synced_version = 0
+        self._transaction_rowid = 0  # newest SQLite transaction loaded into the ParkingManager
+        
+        # Bills go to a durable ledger whose checkpoint restores revenue on startup;
+        # the SQLite backend keeps its own transaction table instead
+        if ledger_filename and backend == "sqlite":
+            raise ValueError("The sqlite backend already stores transactions; use it without a ledger")
+        
+        # Finished transactions are also streamed to a day-partitioned columnar archive
+        self.archive = TransactionArchive(archive_dir) if archive_dir else None
+        
+        # Cached get_csv_data() result, the manager version it reflects, and file mtimes
+        self._view: Optional[pd.DataFrame] = None
+        self._view_version = -1
+        self._view_mtime: Optional[int] = None
+        self._written_mtime: Optional[int] = None  # mtime of this process's last CSV write
+        
+        self.flusher = None
+        # A first start may create or import the store, so opening and loading hold the inter-process lock
+        with self.state_lock.exclusive() if self.state_lock is not None else nullcontext():
+            # In journal mode the CSV is a snapshot and gate events are appended to a log
+            self.journal = SlotJournal(csv_filename, self._write_rows) if journal else None
+            
+            # The "sqlite" backend keeps slots, transactions and reservations in a database,
+            # the "mmap" backend keeps slots as fixed-width records updated in place
+            self.database = None
+            self.slot_file = None
+            self.slot_file_created = False
+            if backend == "sqlite":
+                self.database = SQLiteStore(db_filename)
+            elif backend == "mmap":
+                self.slot_file_created = not os.path.exists(slot_filename)
+                self.slot_file = MappedSlotFile(slot_filename, total_slots)
+            elif backend != "csv":
+                raise ValueError(f"Unknown storage backend: {backend}")
+            
+            # The database keeps bookings itself; the other backends save them to a file beside the lot
+            self.reservation_file = ReservationFile(csv_filename + ".reservations") if self.database is None else None
+            self._reservations_version = self.parking_manager.reservations.version  # last saved
+            
+            self.ledger = TransactionLedger(ledger_filename) if ledger_filename else None
+            
+            if self.database is not None:
+                self._load_from_database()
+            elif self.slot_file is not None:
+                self._load_from_slot_file()
+            else:
+                self._load_from_csv()
+                if self.journal is not None:
+                    self._replay_journal()
+            if self.reservation_file is not None:
+                self._load_reservations()
+            
+            if self.ledger is not None:
+                self._restore_ledger_history()
+            if self.state_lock is not None:
+                self._synced_version = self.state_lock.version
+        
+        # With a flush window, saves are batched by a background thread instead of written inline
+        self.flusher = BackgroundFlusher(self._write_pending, flush_window) if flush_window else None
     
     def _load_from_csv(self):
         """Load parking data from CSV file into ParkingManager"""
         try:
             if os.path.exists(self.csv_filename):
-                df = pd.read_csv(self.csv_filename)
+                df = pd.read_csv(self.csv_filename, dtype=str)
                 print(f"Loading parking data from {self.csv_filename}...")
                 
-                # Clear existing data
-                self.parking_manager = ParkingManager()
-                
-                # Load data from CSV
-                for _, row in df.iterrows():
-                    slot_num = int(row['Slot'])
-                    slot_id = f"slot_{slot_num}"
-                    
-                    # Check if slot has vehicle data
-                    if pd.notna(row['VehicleType']) and pd.notna(row['VehicleNumber']):
-                        # Parse dates and times
-                        arrival_date = row['ArrivalDate']
-                        arrival_time = row['ArrivalTime']
-                        pickup_date = row['ExpectedPickupDate']
-                        pickup_time = row['ExpectedPickupTime']
-                        
-                        try:
-                            arrival_dt = datetime.strptime(f"{arrival_date} {arrival_time}", "%d-%m-%y %H:%M")
-                            pickup_dt = datetime.strptime(f"{pickup_date} {pickup_time}", "%d-%m-%y %H:%M")
-                            
-                            # Create occupied slot
-                            self.parking_manager.slots[slot_id] = ParkingSlot(
-                                slot_id=slot_id,
-                                status=SlotStatus.OCCUPIED,
-                                vehicle_type=row['VehicleType'],
-                                vehicle_number=row['VehicleNumber'],
-                                arrival_time=arrival_dt,
-                                pickup_time=pickup_dt
-                            )
-                            
-                        except (ValueError, TypeError) as e:
-                            print(f"Warning: Could not parse datetime for slot {slot_num}: {e}")
-                            continue
+                self._restore_frame(df)
                 
                 print(f"Loaded {len(self.parking_manager.get_occupied_slots())} occupied slots from CSV")
             else:
@@ -69,10 +120,269 @@ class CSVDataManager:
             print(f"Error loading CSV data: {e}")
             self._initialize_empty_csv()
     
+    def _restore_frame(self, df: pd.DataFrame, reservations: Optional[List[Reservation]] = None):
+        """Restore every occupied slot of a CSV table, parsing dates column-wise; bookings are replaced when given"""
+        slot_nums = pd.to_numeric(df['Slot'], errors='coerce')
+        has_vehicle = (
+            df['VehicleType'].notna() & df['VehicleNumber'].notna() &
+            (df['VehicleType'] != '') & (df['VehicleNumber'] != '')
+        )
+        arrivals = pd.to_datetime(df['ArrivalDate'] + ' ' + df['ArrivalTime'],
+                                  format="%d-%m-%y %H:%M", errors='coerce')
+        pickups = pd.to_datetime(df['ExpectedPickupDate'] + ' ' + df['ExpectedPickupTime'],
+                                 format="%d-%m-%y %H:%M", errors='coerce')
+        
+        # Explain every occupied row that cannot be restored, first problem wins
+        known_slot = slot_nums.between(1, self.total_slots) & (slot_nums % 1 == 0)
+        problems = [
+            (slot_nums.isna(), "missing or invalid slot number"),
+            (~known_slot, "slot number outside the lot"),
+            (arrivals.isna(), "unparseable arrival date/time"),
+            (pickups.isna(), "unparseable pickup date/time")
+        ]
+        bad = pd.Series(False, index=df.index)
+        self.skipped_rows = []
+        for mask, reason in problems:
+            new_bad = has_vehicle & mask & ~bad
+            # Line numbers count the header as line 1
+            self.skipped_rows.extend((int(i) + 2, reason) for i in df.index[new_bad])
+            bad |= new_bad
+        self.skipped_rows.sort()
+        
+        valid = has_vehicle & ~bad
+        self.parking_manager.replace_state([
+            ParkingSlot(
+                slot_id=f"slot_{slot_num}",
+                status=SlotStatus.OCCUPIED,
+                vehicle_type=vehicle_type,
+                vehicle_number=vehicle_number,
+                arrival_time=arrival_dt,
+                pickup_time=pickup_dt
+            )
+            for slot_num, vehicle_type, vehicle_number, arrival_dt, pickup_dt in zip(
+                slot_nums[valid].astype(int).tolist(),
+                df['VehicleType'][valid].tolist(),
+                df['VehicleNumber'][valid].tolist(),
+                list(arrivals[valid].dt.to_pydatetime()),
+                list(pickups[valid].dt.to_pydatetime())
+            )
+        ], reservations)
+        
+        if self.skipped_rows:
+            shown = ", ".join(f"line {line} ({reason})" for line, reason in self.skipped_rows[:5])
+            more = f" and {len(self.skipped_rows) - 5} more" if len(self.skipped_rows) > 5 else ""
+            print(f"Warning: Skipped {len(self.skipped_rows)} bad rows in {self.csv_filename}: {shown}{more}")
+    
+    def _restore_row(self, slot_num: int, row):
+        """Put one CSV or journal row back into the ParkingManager"""
+        slot_id = f"slot_{slot_num}"
+        
+        # Check if slot has vehicle data
+        if self._has_value(row['VehicleType']) and self._has_value(row['VehicleNumber']):
+            # Parse dates and times
+            arrival_date = row['ArrivalDate']
+            arrival_time = row['ArrivalTime']
+            pickup_date = row['ExpectedPickupDate']
+            pickup_time = row['ExpectedPickupTime']
+            
+            try:
+                arrival_dt = datetime.strptime(f"{arrival_date} {arrival_time}", "%d-%m-%y %H:%M")
+                pickup_dt = datetime.strptime(f"{pickup_date} {pickup_time}", "%d-%m-%y %H:%M")
+                
+                # Create occupied slot
+                self.parking_manager.restore_slot(ParkingSlot(
+                    slot_id=slot_id,
+                    status=SlotStatus.OCCUPIED,
+                    vehicle_type=row['VehicleType'],
+                    vehicle_number=row['VehicleNumber'],
+                    arrival_time=arrival_dt,
+                    pickup_time=pickup_dt
+                ))
+                
+            except (ValueError, TypeError) as e:
+                print(f"Warning: Could not parse datetime for slot {slot_num}: {e}")
+        elif slot_id in self.parking_manager.slots:
+            # Journaled departures leave an empty row behind
+            self.parking_manager.restore_slot(ParkingSlot(slot_id=slot_id, status=SlotStatus.AVAILABLE))
+    
+    @staticmethod
+    def _has_value(value) -> bool:
+        return pd.notna(value) and value != ''
+    
+    def _replay_journal(self):
+        """Apply journaled gate events on top of the CSV snapshot"""
+        records = self.journal.replay()
+        for slot_num, row in records:
+            self._restore_row(slot_num, row)
+        
+        self.journal.open({i: self._slot_row(i) for i in range(1, self.total_slots + 1)})
+        if records:
+            print(f"Replayed {len(records)} journal records from {self.journal.log_filename}")
+    
+    def _load_from_database(self):
+        """Load slots, transactions and reservations from the SQLite database"""
+        if self.database.created:
+            # First start on the database: import the existing CSV lot state
+            self._load_from_csv()
+            self.save_to_csv()
+            return
+        
+        for slot in self.database.load_slots():
+            try:
+                self.parking_manager.restore_slot(slot)
+            except ValueError as e:
+                print(f"Warning: Skipping stored slot: {e}")
+        
+        self._transaction_rowid = self.database.last_transaction_rowid()
+        for transaction in self.database.load_transactions():
+            self.parking_manager.restore_transaction(Transaction(**transaction))
+        
+        for reservation in self.database.load_reservations():
+            self.parking_manager.reservations.add(reservation)
+        self.parking_manager.refresh_reservations(datetime.now())
+        
+        print(f"Loaded {len(self.parking_manager.get_occupied_slots())} occupied slots and "
+              f"{len(self.parking_manager.transactions)} transactions from {self.database.db_filename}")
+    
+    def _load_from_slot_file(self):
+        """Load occupied slots from the memory-mapped slot file"""
+        if self.slot_file_created:
+            # First start on the slot file: import the existing CSV lot state
+            self._load_from_csv()
+            self.save_to_csv()
+            return
+        
+        # Reservations are not stored in the slot file, so only vehicles are restored
+        self.parking_manager.restore_slots([
+            slot for slot in self.slot_file.read_all() if slot.status == SlotStatus.OCCUPIED
+        ])
+        print(f"Loaded {len(self.parking_manager.get_occupied_slots())} occupied slots from {self.slot_file.filename}")
+    
+    def _load_reservations(self):
+        """Add the bookings saved in the reservation file and hold the slots of started ones"""
+        manager = self.parking_manager
+        for reservation in self.reservation_file.load():
+            manager.reservations.add(reservation)
+        manager.refresh_reservations(datetime.now())
+        self._reservations_version = manager.reservations.version
+    
+    def _save_reservations(self):
+        """Write the bookings to the reservation file if they changed since the last save"""
+        if self.reservation_file is None:
+            return
+        version = self.parking_manager.reservations.version
+        if version == self._reservations_version:
+            return
+        try:
+            self.reservation_file.save(self.parking_manager.get_reservations())
+            self._reservations_version = version
+        except Exception as e:
+            print(f"Error saving reservations: {e}")
+    
+    def _restore_ledger_history(self):
+        """Take revenue totals and recent transactions from the ledger"""
+        self.parking_manager.restore_history(
+            self.ledger.total_revenue,
+            self.ledger.revenue_by_type,
+            self.ledger.transaction_count,
+            [Transaction(**transaction) for transaction in self.ledger.recent_transactions()]
+        )
+    
+    def _reload(self):
+        """Replace the in-memory lot with the stored one after another process changed it"""
+        manager = self.parking_manager
+        if self.database is not None:
+            manager.replace_state(self.database.load_slots(), self.database.load_reservations())
+            
+            # Transactions are only appended, unless another process cleared them
+            if self._transaction_rowid and not self.database.has_transaction_rowid(self._transaction_rowid):
+                manager.restore_history(0.0, {}, 0, [])
+                self._transaction_rowid = 0
+            for transaction in self.database.transactions_after(self._transaction_rowid):
+                manager.restore_transaction(Transaction(**transaction))
+            self._transaction_rowid = self.database.last_transaction_rowid()
+            return
+        
+        reservations = self.reservation_file.load()
+        if self.slot_file is not None:
+            manager.replace_state(
+                [slot for slot in self.slot_file.read_all() if slot.status == SlotStatus.OCCUPIED], reservations
+            )
+        else:
+            try:
+                self._restore_frame(pd.read_csv(self.csv_filename, dtype=str), reservations)
+            except Exception as e:
+                print(f"Error reloading CSV data: {e}")
+        self._reservations_version = manager.reservations.version
+        
+        if self.ledger is not None and self.ledger.refresh():
+            self._restore_ledger_history()
+    
+    def sync(self) -> bool:
+        """Reload the lot if another process changed it since this one last loaded or wrote it.
+        
+        Checking costs one read of the shared version; returns True when the lot was reloaded.
+        """
+        if self.state_lock is None or self.state_lock.version == self._synced_version:
+            return False
+        
+        with self.state_lock.shared():
+            version = self.state_lock.version
+            if version == self._synced_version:
+                return False
+            self._reload()
+            self._synced_version = version
+        print(f"Reloaded parking data changed by another process (state version {version})")
+        return True
+    
+    @contextmanager
+    def _shared_write(self, sync: bool = True):
+        """Make a change under the inter-process lock, writing it through and bumping the shared version.
+        
+        With sync, changes made by other processes are loaded first so this one builds on them.
+        """
+        if self.state_lock is None:
+            yield
+            return
+        
+        with self.state_lock.exclusive():
+            if sync:
+                self.sync()
+            yield
+            # Other processes may read the store as soon as the lock is released, so batched
+            # writes are flushed here; with the csv backend that is a full rewrite per change
+            self.flush()
+            if self.database is not None:
+                self._transaction_rowid = self.database.last_transaction_rowid()
+            self._synced_version = self.state_lock.bump()
+    
+    def save_slot_file(self, filename: str):
+        """Convert the current lot state to a slot file (e.g. from a legacy CSV)"""
+        slot_file = MappedSlotFile(filename, self.total_slots)
+        try:
+            for slot_num in range(1, self.total_slots + 1):
+                slot_file.write_slot(slot_num, self.parking_manager.slots[f"slot_{slot_num}"])
+            slot_file.flush()
+        finally:
+            slot_file.close()
+    
+    def load_slot_file(self, filename: str):
+        """Replace the lot state with a slot file's and save it to the active storage (e.g. the legacy CSV)"""
+        slot_file = MappedSlotFile(filename, self.total_slots, readonly=True)
+        try:
+            slots = slot_file.read_all()
+        finally:
+            slot_file.close()
+        
+        self.parking_manager.clear_all_data()
+        self.parking_manager.restore_slots([slot for slot in slots if slot.status == SlotStatus.OCCUPIED])
+        self.save_to_csv()
+        self.flush()
+    
     def _initialize_empty_csv(self):
-        """Initialize empty CSV file with 20 slots"""
+        """Initialize empty CSV file with one row per slot"""
         data = []
-        for i in range(1, 21):
+        for i in range(1, self.total_slots + 1):
             data.append({
                 'Slot': i,
                 'VehicleType': '',
@@ -89,104 +399,264 @@ class CSVDataManager:
         df.to_csv(self.csv_filename, index=False)
         print(f"Initialized empty CSV file: {self.csv_filename}")
     
+    def _slot_row(self, slot_num: int) -> Dict:
+        """Build the CSV row for one slot"""
+        slot_data = self.parking_manager.get_slot_data(f"slot_{slot_num}")
+        
+        if slot_data and slot_data.status == SlotStatus.OCCUPIED:
+            # Format dates in dd-mm-yy format
+            return {
+                'Slot': slot_num,
+                'VehicleType': slot_data.vehicle_type,
+                'VehicleNumber': slot_data.vehicle_number,
+                'ArrivalDate': slot_data.arrival_time.strftime("%d-%m-%y"),
+                'ArrivalTime': slot_data.arrival_time.strftime("%H:%M"),
+                'ExpectedPickupDate': slot_data.pickup_time.strftime("%d-%m-%y"),
+                'ExpectedPickupTime': slot_data.pickup_time.strftime("%H:%M"),
+                'Weekday': slot_data.arrival_time.strftime("%a"),
+                'Charge': 0.0  # Will be calculated on removal
+            }
+        
+        # Empty slot
+        return {
+            'Slot': slot_num,
+            'VehicleType': '',
+            'VehicleNumber': '',
+            'ArrivalDate': '',
+            'ArrivalTime': '',
+            'ExpectedPickupDate': '',
+            'ExpectedPickupTime': '',
+            'Weekday': '',
+            'Charge': ''
+        }
+    
+    def _write_rows(self, rows: Dict[int, Dict], filename: str):
+        """Write slot rows, ordered by slot number, as a CSV file"""
+        df = pd.DataFrame([rows[slot_num] for slot_num in sorted(rows)], columns=self.expected_columns)
+        df.to_csv(filename, index=False)
+    
     def save_to_csv(self):
         """Save current parking data to CSV file"""
+        # The in-memory lot is written as it is, over changes other processes made since the last sync()
+        with self._shared_write(sync=False):
+            if self.flusher is not None:
+                self.flusher.mark_dirty()
+            else:
+                self._save_all()
+            # Bookings change rarely, so they are written right away rather than batched
+            self._save_reservations()
+    
+    def _save_all(self):
+        """Write the whole lot state to the active storage"""
         try:
-            data = []
+            if self.database is not None:
+                manager = self.parking_manager
+                self.database.save_state(
+                    (manager.slots[slot_id] for slot_id in manager.get_occupied_slots()),
+                    manager.reservations
+                )
+                return
             
-            for i in range(1, 21):  # 20 slots
-                slot_id = f"slot_{i}"
-                slot_data = self.parking_manager.get_slot_data(slot_id)
-                
-                if slot_data and slot_data.status == SlotStatus.OCCUPIED:
-                    # Format dates in dd-mm-yy format
-                    arrival_date = slot_data.arrival_time.strftime("%d-%m-%y")
-                    arrival_time = slot_data.arrival_time.strftime("%H:%M")
-                    pickup_date = slot_data.pickup_time.strftime("%d-%m-%y")
-                    pickup_time = slot_data.pickup_time.strftime("%H:%M")
-                    weekday = slot_data.arrival_time.strftime("%a")
-                    
-                    data.append({
-                        'Slot': i,
-                        'VehicleType': slot_data.vehicle_type,
-                        'VehicleNumber': slot_data.vehicle_number,
-                        'ArrivalDate': arrival_date,
-                        'ArrivalTime': arrival_time,
-                        'ExpectedPickupDate': pickup_date,
-                        'ExpectedPickupTime': pickup_time,
-                        'Weekday': weekday,
-                        'Charge': 0.0  # Will be calculated on removal
-                    })
-                else:
-                    # Empty slot
-                    data.append({
-                        'Slot': i,
-                        'VehicleType': '',
-                        'VehicleNumber': '',
-                        'ArrivalDate': '',
-                        'ArrivalTime': '',
-                        'ExpectedPickupDate': '',
-                        'ExpectedPickupTime': '',
-                        'Weekday': '',
-                        'Charge': ''
-                    })
-            
-            df = pd.DataFrame(data)
-            df.to_csv(self.csv_filename, index=False)
+            if self.slot_file is not None:
+                for i in range(1, self.total_slots + 1):
+                    self.slot_file.write_slot(i, self.parking_manager.slots[f"slot_{i}"])
+                self.slot_file.flush()
+                return
+            
+            if self.journal is not None:
+                # Journal only the slots that changed since they were last persisted
+                changes = []
+                for i in range(1, self.total_slots + 1):
+                    row = self._slot_row(i)
+                    if self.journal.rows.get(i) != row:
+                        changes.append((i, row))
+                self.journal.append(changes)
+                return
+            
+            self._write_rows({i: self._slot_row(i) for i in range(1, self.total_slots + 1)}, self.csv_filename)
+            self._written_mtime = self._file_mtime()
             print(f"Parking data saved to {self.csv_filename}")
             
         except Exception as e:
             print(f"Error saving to CSV: {e}")
     
+    def _persist_slot(self, slot_id: str):
+        """Persist one changed slot, batched when a flush window is set"""
+        slot_num = int(slot_id.split('_')[1])
+        if self.flusher is not None:
+            self.flusher.mark_dirty([slot_num])
+        else:
+            self._write_slots({slot_num})
+    
+    def _write_slots(self, slot_nums: Set[int]):
+        """Write some slots: one journal record each, or a full CSV rewrite"""
+        if self.journal is None:
+            self._save_all()
+            return
+        
+        try:
+            self.journal.append([(slot_num, self._slot_row(slot_num)) for slot_num in sorted(slot_nums)])
+        except Exception as e:
+            print(f"Error writing journal record: {e}")
+    
+    def _write_pending(self, slot_nums: Optional[Set[int]]):
+        """Background flusher callback; None means any slot may have changed"""
+        if slot_nums is None:
+            self._save_all()
+        else:
+            self._write_slots(slot_nums)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every change made so far has been written"""
+        if self.flusher is None:
+            return True
+        return self.flusher.flush(timeout)
+    
+    def _write_database(self, write, *args):
+        try:
+            write(*args)
+        except Exception as e:
+            print(f"Error writing to database: {e}")
+    
+    def _write_slot_file(self, slot_id: str, charge: float = 0.0):
+        """Rewrite one slot's record in the slot file; errors propagate so the caller's change fails"""
+        self.slot_file.write_slot(int(slot_id.split('_')[1]), self.parking_manager.slots[slot_id], charge)
+    
+    def compact(self, wait: bool = True):
+        """Fold the journal into the CSV snapshot so other readers see the latest state"""
+        if self.journal is not None:
+            self.journal.compact(wait=wait)
+    
     def park_vehicle(self, vehicle_type: str, vehicle_number: str, 
                     arrival_dt: datetime, pickup_dt: datetime) -> tuple[bool, str]:
-        """Park a vehicle and save to CSV"""
-        success, slot_id = self.parking_manager.park_vehicle(
-            vehicle_type, vehicle_number, arrival_dt, pickup_dt
-        )
+        """Park a vehicle and save to CSV.
         
-        if success:
-            self.save_to_csv()
+        With the slot file backend a vehicle that its fixed-width records cannot hold
+        raises ValueError before anything is parked.
+        """
+        if self.slot_file is not None:
+            check_vehicle(vehicle_type, vehicle_number.upper())
+        
+        with self._shared_write():
+            success, slot_id = self.parking_manager.park_vehicle(
+                vehicle_type, vehicle_number, arrival_dt, pickup_dt
+            )
+            
+            if success:
+                if self.database is not None:
+                    self._write_database(self.database.park, self.parking_manager.slots[slot_id])
+                elif self.slot_file is not None:
+                    self._write_slot_file(slot_id)
+                else:
+                    self._persist_slot(slot_id)
+                # Checking in consumes the vehicle's booking
+                self._save_reservations()
+        
+        return success, slot_id
+    
+    def reserve_slot(self, vehicle_type: str, vehicle_number: str,
+                     reservation_dt: datetime, duration_hours: int) -> tuple[bool, str]:
+        """Book a slot and save the lot"""
+        with self._shared_write():
+            success, slot_id = self.parking_manager.reserve_slot(
+                vehicle_type, vehicle_number, reservation_dt, duration_hours
+            )
+            if success:
+                self.save_to_csv()
         
         return success, slot_id
     
     def remove_vehicle(self, slot_id: str, departure_dt: datetime) -> Optional[Dict]:
         """Remove a vehicle, calculate charges, and save to CSV"""
-        bill_info = self.parking_manager.remove_vehicle(slot_id, departure_dt)
-        
-        if bill_info:
-            # Update CSV with final charge before saving
-            self._update_slot_charge_in_csv(slot_id, bill_info['total_cost'])
-            self.save_to_csv()
-        
+        with self._shared_write():
+            bill_info = self.parking_manager.remove_vehicle(slot_id, departure_dt)
+            # Rebuilt from the bill: other threads may have appended to the history meanwhile
+            transaction = Transaction(**{f.name: bill_info[f.name] for f in fields(Transaction)}) if bill_info else None
+            
+            if bill_info and self.ledger is not None:
+                try:
+                    self.ledger.append(transaction)
+                except Exception as e:
+                    print(f"Error writing to ledger: {e}")
+            
+            if bill_info and self.archive is not None:
+                self.archive.append(transaction)
+            
+            if bill_info and self.database is not None:
+                self._write_database(self.database.remove, slot_id, bill_info)
+            elif bill_info and self.slot_file is not None:
+                # The freed record keeps the final charge
+                self._write_slot_file(slot_id, bill_info['total_cost'])
+            elif bill_info:
+                self._persist_slot(slot_id)
+                # Billing-critical: the departure is on disk before the bill is returned
+                self.flush()
+            
         return bill_info
     
-    def _update_slot_charge_in_csv(self, slot_id: str, charge: float):
-        """Update the charge for a specific slot in the CSV data"""
-        try:
-            if os.path.exists(self.csv_filename):
-                df = pd.read_csv(self.csv_filename)
-                slot_num = int(slot_id.split('_')[1])
-                slot_index = slot_num - 1  # Convert to 0-based index
-                
-                if 0 <= slot_index < len(df):
-                    df.at[slot_index, 'Charge'] = charge
-                    df.to_csv(self.csv_filename, index=False)
-        except Exception as e:
-            print(f"Error updating charge in CSV: {e}")
+    def archived_revenue(self, start: Optional[date] = None, end: Optional[date] = None,
+                         by: Sequence[str] = ("day",)) -> pd.DataFrame:
+        """Revenue and exits from the transaction archive, including bills still buffered; empty without an archive"""
+        if self.archive is None:
+            return pd.DataFrame(columns=list(by) + ["amount", "exits"])
+        self.archive.flush()
+        return self.archive.revenue(start, end, by)
     
     def get_parking_manager(self) -> ParkingManager:
         """Get the underlying ParkingManager instance"""
         return self.parking_manager
     
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.csv_filename).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _build_view(self) -> pd.DataFrame:
+        """Build the CSV table from memory, with the same dtypes read_csv gives the file"""
+        df = pd.DataFrame([self._slot_row(i) for i in range(1, self.total_slots + 1)], columns=self.expected_columns)
+        df = df.where(df != '', np.nan)
+        df['Charge'] = pd.to_numeric(df['Charge'])
+        return df
+    
     def get_csv_data(self) -> pd.DataFrame:
-        """Get current CSV data as DataFrame"""
+        """Get current CSV data as DataFrame.
+        
+        The table is built from memory and cached until the lot changes; treat it
+        as read-only. In plain CSV mode a file modified outside the app (its mtime
+        differs from our last write) is read back so the edit is visible.
+        """
         try:
-            return pd.read_csv(self.csv_filename)
+            self.sync()
+            version = self.parking_manager.version
+            if self._view is None or self._view_version != version:
+                self._view = self._build_view()
+                self._view_version = version
+                self._view_mtime = self._file_mtime()
+            elif self.database is None and self.journal is None and self.slot_file is None:
+                mtime = self._file_mtime()
+                if mtime is not None and mtime not in (self._view_mtime, self._written_mtime):
+                    self.flush()
+                    self._view = pd.read_csv(self.csv_filename)
+                    self._view_mtime = mtime
+            return self._view
         except Exception as e:
             print(f"Error reading CSV data: {e}")
             return pd.DataFrame()
     
+    def clear_all_data(self):
+        """Clear all parking data, including stored transaction history"""
+        with self._shared_write(sync=False):
+            self.parking_manager.clear_all_data()
+            if self.database is not None:
+                self._write_database(self.database.clear)
+            if self.ledger is not None:
+                self.ledger.clear()
+            if self.archive is not None:
+                self.archive.clear()
+            self.save_to_csv()
+            self.flush()
+    
     def export_csv_data(self, filename: str = None) -> str:
         """Export current parking data to a CSV file"""
         if filename is None:
@@ -195,6 +665,8 @@ class CSVDataManager:
         
         try:
             self.save_to_csv()  # Ensure latest data is saved
+            self.flush()
+            self.compact()
             df = self.get_csv_data()
             df.to_csv(filename, index=False)
             return filename
@@ -202,5 +674,55 @@ class CSVDataManager:
             print(f"Error exporting CSV data: {e}")
             return ""
 
-# Global instance
-csv_data_manager = CSVDataManager()
+def benchmark_csv_load(num_slots: int = 100000) -> Dict[str, float]:
+    """Time a cold CSVDataManager load of a generated lot file with num_slots rows"""
+    import tempfile
+    import time
+    from datetime import timedelta
+    
+    arrival = datetime(2025, 1, 1, 8, 0)
+    rows = []
+    for i in range(1, num_slots + 1):
+        if i % 3 == 0:
+            rows.append({'Slot': i})
+            continue
+        arrival_dt = arrival + timedelta(minutes=i % 10000)
+        pickup_dt = arrival_dt + timedelta(hours=2)
+        rows.append({
+            'Slot': i,
+            'VehicleType': ("Car", "Bike", "Truck")[i % 3],
+            'VehicleNumber': f"WB{i:08d}",
+            'ArrivalDate': arrival_dt.strftime("%d-%m-%y"),
+            'ArrivalTime': arrival_dt.strftime("%H:%M") if i % 1000 else "25:99",  # a few bad rows
+            'ExpectedPickupDate': pickup_dt.strftime("%d-%m-%y"),
+            'ExpectedPickupTime': pickup_dt.strftime("%H:%M"),
+            'Weekday': arrival_dt.strftime("%a"),
+            'Charge': 0.0
+        })
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "parking_data.csv")
+        pd.DataFrame(rows).to_csv(filename, index=False)
+        
+        start = time.perf_counter()
+        manager = CSVDataManager(filename, total_slots=num_slots)
+        load_seconds = time.perf_counter() - start
+    
+    return {
+        'rows': num_slots,
+        'load_seconds': load_seconds,
+        'occupied': len(manager.parking_manager.get_occupied_slots()),
+        'skipped': len(manager.skipped_rows)
+    }
+
+# Global instance; bills are ledgered and archived for reports. Sharing the files with other app
+# workers or the CLI writes every change through before the lock is released (a full CSV rewrite
+# instead of a batched one), so it is only on with PARKING_SHARED=1
+csv_data_manager = CSVDataManager(flush_window=0.2, ledger_filename="parking_ledger.log",
+                                  shared=os.environ.get("PARKING_SHARED") == "1",
+                                  archive_dir="transaction_archive")
+
+if __name__ == "__main__":
+    result = benchmark_csv_load()
+    print(f"Loaded {result['rows']} rows in {result['load_seconds']:.3f} s "
+          f"({result['occupied']} occupied, {result['skipped']} skipped)")
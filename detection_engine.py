@@ -2,14 +2,17 @@ import cv2
 import numpy as np
 import mediapipe as mp
 from ultralytics import YOLO
-import requests
-import base64
 import re
 import os
 import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 import logging
 from dataclasses import dataclass
+from ocr_backends import OCRBackend, create_ocr_backend
+from ocr_cache import OCRCache
+from plate_consensus import vote_plate
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,7 +29,7 @@ class DetectionResult:
     current_phase: str = ""
 
 class DetectionEngine:
-    def __init__(self):
+    def __init__(self, ocr_backend: Optional[OCRBackend] = None):
         self.detection_result = DetectionResult()
         self.vehicle_classes_mapping = {
             "motorcycle": "Bike",
@@ -50,9 +53,18 @@ class DetectionEngine:
         self.mp_hands = None
         self.mp_draw = None
         
-        # OCR settings
-        self.ocr_api_key = "K83315680088957"
-        self.ocr_api_url = "https://api.ocr.space/parse/image"
+        # OCR settings; the backend comes from the OCR_BACKEND / OCR_SPACE_API_KEY environment
+        self.ocr_backend = ocr_backend or create_ocr_backend()
+        self.ocr_accept_score = 170  # full pattern + state code + length; stops the other variants
+        
+        # Image variants are read concurrently
+        self.ocr_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="ocr")
+        
+        # Recent reads by perceptual hash, so a retry or returning car skips OCR
+        self.ocr_cache = OCRCache()
+        
+        # Image variants per crop in a multi-frame read; voting across crops replaces most of them
+        self.consensus_variants = 1
         
         # Hand gesture timing variables
         self.previous_counts = []
@@ -152,12 +164,6 @@ class DetectionEngine:
                     if conf > 0.3 and conf > best_confidence:
                         best_confidence = conf
                         best_bbox = box.xyxy[0].cpu().numpy()
-                        
-                        # Draw bounding box
-                        x1, y1, x2, y2 = map(int, best_bbox)
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                        cv2.putText(frame, f"Plate: {conf:.2f}", (x1, y1-10),
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
             
             if best_bbox is not None:
                 x1, y1, x2, y2 = map(int, best_bbox)
@@ -168,7 +174,13 @@ class DetectionEngine:
                 x1_pad = max(0, x1-padding)
                 x2_pad = min(w, x2+padding)
                 
-                plate_roi = frame[y1_pad:y2_pad, x1_pad:x2_pad]
+                # Crop before drawing so the box and label don't end up in the OCR input
+                plate_roi = frame[y1_pad:y2_pad, x1_pad:x2_pad].copy()
+                
+                # Draw bounding box
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                cv2.putText(frame, f"Plate: {best_confidence:.2f}", (x1, y1-10),
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
                 return True, plate_roi, best_confidence
             
             return False, None, 0.0
@@ -177,73 +189,204 @@ class DetectionEngine:
             logger.error(f"License plate detection error: {e}")
             return False, None, 0.0
     
-    def process_license_plate_ocr(self, plate_image: np.ndarray) -> Optional[str]:
-        """Process license plate using OCR"""
+    def _ocr_variants(self, plate_image: np.ndarray) -> List[np.ndarray]:
+        """Enhanced versions of a plate crop to send to OCR"""
+        gray = cv2.cvtColor(plate_image, cv2.COLOR_BGR2GRAY) if len(plate_image.shape) == 3 else plate_image
+        
+        # Apply image enhancement
+        enhanced_images = []
+        
+        # Original
+        enhanced_images.append(gray)
+        
+        # Gaussian blur + threshold
+        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+        _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        enhanced_images.append(thresh)
+        
+        # Adaptive threshold
+        adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        enhanced_images.append(adaptive)
+        
+        return enhanced_images
+    
+    def _ocr_request(self, enhanced_img: np.ndarray) -> Tuple[Optional[str], int]:
+        """OCR one image variant; returns the best plate text in it and its score"""
+        best_result = None
+        best_score = 0
+        
+        try:
+            for text in self.ocr_backend.read(enhanced_img):
+                cleaned_text = self._clean_license_plate_text(text)
+                if cleaned_text:
+                    score = self._score_license_plate_text(cleaned_text)
+                    if score > best_score:
+                        best_score = score
+                        best_result = cleaned_text
+        
+        except Exception as e:
+            logger.error(f"OCR processing error: {e}")
+        
+        return best_result, best_score
+    
+    def submit_license_plate_ocr(self, plate_image: np.ndarray, use_cache: bool = True,
+                                 max_variants: Optional[int] = None) -> Future:
+        """Start reading a license plate in the background.
+        
+        The image variants are OCRed concurrently and the returned future resolves
+        to the best plate text (or None) once every variant has answered, or as soon
+        as one scores ocr_accept_score, in which case variants not yet started are
+        cancelled. A crop resembling a recent read only gives a candidate from
+        ocr_cache, since plates one character apart hash alike: just the first
+        variant is read, and the candidate is returned if that read agrees with it.
+        Otherwise the remaining variants are read as usual.
+        """
+        plate_future = Future()
         if plate_image is None or plate_image.size == 0:
-            return None
+            plate_future.set_result(None)
+            return plate_future
         
         try:
-            # Enhance image for better OCR
-            gray = cv2.cvtColor(plate_image, cv2.COLOR_BGR2GRAY) if len(plate_image.shape) == 3 else plate_image
-            
-            # Apply image enhancement
-            enhanced_images = []
-            
-            # Original
-            enhanced_images.append(gray)
-            
-            # Gaussian blur + threshold
-            blurred = cv2.GaussianBlur(gray, (3, 3), 0)
-            _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            enhanced_images.append(thresh)
-            
-            # Adaptive threshold
-            adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-            enhanced_images.append(adaptive)
+            plate_hash = None
+            candidate = None
+            if use_cache:
+                plate_hash = self.ocr_cache.hash_image(plate_image)
+                candidate = self.ocr_cache.get(plate_hash)
             
-            best_result = None
-            best_score = 0
-            
-            for enhanced_img in enhanced_images:
+            enhanced_images = self._ocr_variants(plate_image)[:max_variants]
+        except Exception as e:
+            logger.error(f"License plate OCR error: {e}")
+            plate_future.set_result(None)
+            return plate_future
+        
+        lock = threading.Lock()
+        # With a candidate the other variants are held back until the first read disagrees
+        staged = enhanced_images[1:] if candidate else []
+        first = enhanced_images[:1] if candidate else enhanced_images
+        best = {'text': None, 'score': 0, 'pending': len(first)}
+        requests_sent = []
+        
+        def record_variant(request: Future):
+            text, score = (None, 0) if request.cancelled() or request.exception() else request.result()
+            more = None
+            with lock:
+                best['pending'] -= 1
+                if score > best['score']:
+                    best['text'], best['score'] = text, score
+                if plate_future.done():
+                    return
+                confirmed = candidate is not None and text == candidate
+                accepted = confirmed or best['score'] >= self.ocr_accept_score
+                if not accepted and best['pending'] == 0 and staged:
+                    more = list(staged)
+                    staged.clear()
+                    best['pending'] += len(more)
+                elif accepted or best['pending'] == 0:
+                    plate_text = candidate if confirmed else best['text']
+                    plate_future.set_result(plate_text)
+                else:
+                    return
+            if more:
+                send(more)
+                return
+            if plate_text and plate_hash is not None:
+                self.ocr_cache.put(plate_hash, plate_text)
+            if accepted:
+                for other in requests_sent:
+                    other.cancel()
+        
+        def on_variant_done(request: Future):
+            # Executors only log callback errors, so a failure here must reach the caller's future
+            try:
+                record_variant(request)
+            except Exception as e:
+                logger.error(f"License plate OCR error: {e}")
+                with lock:
+                    if not plate_future.done():
+                        plate_future.set_exception(e)
+        
+        def send(images: List[np.ndarray]):
+            for enhanced_img in images:
+                request = self.ocr_executor.submit(self._ocr_request, enhanced_img)
+                requests_sent.append(request)
+                request.add_done_callback(on_variant_done)
+        
+        send(first)
+        return plate_future
+    
+    def submit_plate_consensus(self, plate_images: List[np.ndarray]) -> Future:
+        """Read several crops of one plate in the background and vote on the result.
+        
+        plate_images should come sharpest first, e.g. from PlateFrameBuffer.sharpest.
+        The sharpest crop is OCRed alone, confirming a cached candidate when there is
+        one, and only if it doesn't reach ocr_accept_score are the others read and
+        all readings combined character by character with vote_plate. Each crop
+        gets consensus_variants image variants.
+        """
+        consensus_future = Future()
+        plate_images = [image for image in plate_images if image is not None and image.size > 0]
+        if not plate_images:
+            consensus_future.set_result(None)
+            return consensus_future
+        
+        try:
+            plate_hash = self.ocr_cache.hash_image(plate_images[0])
+        except Exception as e:
+            logger.error(f"License plate OCR error: {e}")
+            consensus_future.set_result(None)
+            return consensus_future
+        
+        def finish(plate_text: Optional[str]):
+            consensus_future.set_result(plate_text)
+            if plate_text:
+                self.ocr_cache.put(plate_hash, plate_text)
+        
+        settle_lock = threading.Lock()
+        
+        def guarded(callback):
+            """Wrap a completion callback so its failure fails the consensus future instead of leaving it pending"""
+            def run(future: Future):
                 try:
-                    _, buffer = cv2.imencode('.jpg', enhanced_img, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                    img_base64 = base64.b64encode(buffer).decode()
-                    
-                    payload = {
-                        'apikey': self.ocr_api_key,
-                        'language': 'eng',
-                        'isOverlayRequired': False,
-                        'base64Image': f'data:image/jpeg;base64,{img_base64}',
-                        'OCREngine': '2',
-                        'scale': 'true',
-                        'isTable': 'false'
-                    }
-                    
-                    response = requests.post(self.ocr_api_url, data=payload, timeout=15)
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        if not result.get("IsErroredOnProcessing", True):
-                            parsed_results = result.get("ParsedResults", [])
-                            for parsed_result in parsed_results:
-                                text = parsed_result.get("ParsedText", "").strip()
-                                if text:
-                                    cleaned_text = self._clean_license_plate_text(text)
-                                    if cleaned_text:
-                                        score = self._score_license_plate_text(cleaned_text)
-                                        if score > best_score:
-                                            best_score = score
-                                            best_result = cleaned_text
-                
+                    callback(future)
                 except Exception as e:
-                    logger.error(f"OCR processing error: {e}")
-                    continue
+                    logger.error(f"License plate consensus error: {e}")
+                    with settle_lock:
+                        if not consensus_future.done():
+                            consensus_future.set_exception(e)
+            return run
+        
+        def on_sharpest_done(sharpest: Future):
+            sharpest_text = sharpest.result()
+            if len(plate_images) == 1 or self._score_license_plate_text(sharpest_text) >= self.ocr_accept_score:
+                finish(sharpest_text)
+                return
             
-            return best_result
+            # Crops of the same plate would hit each other in the cache, so they bypass it
+            reads = [
+                self.submit_license_plate_ocr(image, use_cache=False, max_variants=self.consensus_variants)
+                for image in plate_images[1:]
+            ]
+            lock = threading.Lock()
+            pending = {'reads': len(reads)}
             
-        except Exception as e:
-            logger.error(f"License plate OCR error: {e}")
-            return None
+            def on_read_done(_read: Future):
+                with lock:
+                    pending['reads'] -= 1
+                    if pending['reads']:
+                        return
+                readings = [sharpest_text] + [read.result() for read in reads]
+                finish(vote_plate(readings, self._score_license_plate_text))
+            
+            for read in reads:
+                read.add_done_callback(guarded(on_read_done))
+        
+        sharpest = self.submit_license_plate_ocr(plate_images[0], max_variants=self.consensus_variants)
+        sharpest.add_done_callback(guarded(on_sharpest_done))
+        return consensus_future
+    
+    def process_license_plate_ocr(self, plate_image: np.ndarray) -> Optional[str]:
+        """Process license plate using OCR, waiting for the result"""
+        return self.submit_license_plate_ocr(plate_image).result()
     
     def _clean_license_plate_text(self, text: str) -> Optional[str]:
         """Clean and validate license plate text"""
@@ -0,0 +1,102 @@
+import atexit
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+class BackgroundFlusher:
+    """Merges dirty-key notifications into batched writes on a background thread.
+
+    Changes marked within `window` seconds of the first pending one are handed
+    to a single `write(keys)` call, where keys is the set of dirty keys or None
+    when everything should be written. flush() is the durability barrier: it
+    skips the rest of the window and returns once every change marked before
+    the call has been written.
+    """
+
+    def __init__(self, write: Callable[[Optional[Set]], None], window: float = 0.2):
+        self.window = window
+        self._write = write
+        self._cond = threading.Condition()
+        self._dirty: Set = set()
+        self._everything = False
+        self._urgent = False
+        self._closed = False
+
+        # Marks made so far, and how many of them completed writes cover
+        self._marked = 0
+        self._written = 0
+        self.writes = 0
+
+        self._thread = threading.Thread(target=self._run, name="background-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def mark_dirty(self, keys: Optional[Iterable] = None):
+        """Schedule keys (or everything, when keys is None) to be written"""
+        with self._cond:
+            if self._closed:
+                write_now = True
+            else:
+                write_now = False
+                if keys is None:
+                    self._everything = True
+                else:
+                    self._dirty.update(keys)
+                self._marked += 1
+                self._cond.notify_all()
+
+        if write_now:
+            self._write(None if keys is None else set(keys))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._marked == self._written and not self._closed:
+                    self._cond.wait()
+                if self._marked == self._written:
+                    return
+
+                # Give further changes the rest of the window to join this write
+                deadline = time.monotonic() + self.window
+                while not self._urgent and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                keys = None if self._everything else self._dirty
+                self._dirty = set()
+                self._everything = False
+                self._urgent = False
+                target = self._marked
+
+            try:
+                self._write(keys)
+            except Exception as e:
+                print(f"Error in background flush: {e}")
+
+            with self._cond:
+                self._written = target
+                self.writes += 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every change marked so far is written; False if the timeout ran out"""
+        with self._cond:
+            target = self._marked
+            if self._written < target:
+                self._urgent = True
+                self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self):
+        """Write outstanding changes and stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Changes marked versus writes performed"""
+        with self._cond:
+            return {'changes': self._marked, 'writes': self.writes, 'pending': self._marked - self._written}
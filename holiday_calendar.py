@@ -0,0 +1,162 @@
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple
+import pandas as pd
+from billing import RushWindow, regular_rush_window
+
+# Fallback holidays used when the holiday CSV is missing
+DEFAULT_HOLIDAYS = [
+    {'Date': '01-01-2025', 'Holiday Name': 'New Year\'s Day', 'Rush Hr From': '00:00', 'Rush Hr To': '23:59'},
+    {'Date': '26-01-2025', 'Holiday Name': 'Republic Day', 'Rush Hr From': '08:00', 'Rush Hr To': '14:00'},
+    {'Date': '02-02-2025', 'Holiday Name': 'Vasant Panchami', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '26-02-2025', 'Holiday Name': 'Maha Shivaratri', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '13-03-2025', 'Holiday Name': 'Holika Dahana', 'Rush Hr From': '09:00', 'Rush Hr To': '22:00'},
+    {'Date': '14-03-2025', 'Holiday Name': 'Holi', 'Rush Hr From': '09:00', 'Rush Hr To': '20:00'},
+    {'Date': '28-03-2025', 'Holiday Name': 'Jamat Ul-Vida', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '30-03-2025', 'Holiday Name': 'Chaitra Sukhladi / Ugadi / Gudi Padwa', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '31-03-2025', 'Holiday Name': 'Eid-ul-Fitr', 'Rush Hr From': '08:00', 'Rush Hr To': '21:00'},
+    {'Date': '06-04-2025', 'Holiday Name': 'Rama Navami', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '10-04-2025', 'Holiday Name': 'Mahavir Jayanti', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '18-04-2025', 'Holiday Name': 'Good Friday', 'Rush Hr From': '08:00', 'Rush Hr To': '16:00'},
+    {'Date': '12-05-2025', 'Holiday Name': 'Buddha Purnima', 'Rush Hr From': '09:00', 'Rush Hr To': '18:00'},
+    {'Date': '07-06-2025', 'Holiday Name': 'Eid ul-Adha (Bakrid)', 'Rush Hr From': '08:00', 'Rush Hr To': '21:00'},
+    {'Date': '06-07-2025', 'Holiday Name': 'Muharram', 'Rush Hr From': '07:00', 'Rush Hr To': '19:00'},
+    {'Date': '09-08-2025', 'Holiday Name': 'Raksha Bandhan', 'Rush Hr From': '10:00', 'Rush Hr To': '18:00'},
+    {'Date': '15-08-2025', 'Holiday Name': 'Independence Day', 'Rush Hr From': '08:00', 'Rush Hr To': '14:00'},
+    {'Date': '16-08-2025', 'Holiday Name': 'Janmashtami', 'Rush Hr From': '08:00', 'Rush Hr To': '23:00'},
+    {'Date': '27-08-2025', 'Holiday Name': 'Ganesh Chaturthi', 'Rush Hr From': '08:00', 'Rush Hr To': '21:00'},
+    {'Date': '05-09-2025', 'Holiday Name': 'Milad-un-Nabi / Onam', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '29-09-2025', 'Holiday Name': 'Maha Saptami', 'Rush Hr From': '06:00', 'Rush Hr To': '23:59'},
+    {'Date': '30-09-2025', 'Holiday Name': 'Maha Ashtami', 'Rush Hr From': '06:00', 'Rush Hr To': '23:59'},
+    {'Date': '01-10-2025', 'Holiday Name': 'Maha Navami', 'Rush Hr From': '06:00', 'Rush Hr To': '23:59'},
+    {'Date': '02-10-2025', 'Holiday Name': 'Mahatma Gandhi Jayanti / Dussehra', 'Rush Hr From': '08:00', 'Rush Hr To': '17:00'},
+    {'Date': '07-10-2025', 'Holiday Name': 'Maharishi Valmiki Jayanti', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '20-10-2025', 'Holiday Name': 'Diwali', 'Rush Hr From': '10:00', 'Rush Hr To': '23:59'},
+    {'Date': '22-10-2025', 'Holiday Name': 'Govardhan Puja', 'Rush Hr From': '09:00', 'Rush Hr To': '18:00'},
+    {'Date': '23-10-2025', 'Holiday Name': 'Bhai Duj', 'Rush Hr From': '10:00', 'Rush Hr To': '18:00'},
+    {'Date': '05-11-2025', 'Holiday Name': 'Guru Nanak Jayanti', 'Rush Hr From': '09:00', 'Rush Hr To': '19:00'},
+    {'Date': '24-11-2025', 'Holiday Name': 'Guru Tegh Bahadur\'s Martyrdom Day', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
+    {'Date': '25-12-2025', 'Holiday Name': 'Christmas Day', 'Rush Hr From': '09:00', 'Rush Hr To': '22:00'},
+    {'Date': '31-12-2025', 'Holiday Name': 'New Year\'s Eve', 'Rush Hr From': '00:00', 'Rush Hr To': '23:59'}
+]
+
+@dataclass(frozen=True)
+class Holiday:
+    date: date
+    name: str
+    rush_from: str
+    rush_to: str
+    rush_start_hour: int
+    rush_end_hour: int
+
+    @property
+    def rush_window(self) -> Tuple[int, int]:
+        return self.rush_start_hour, self.rush_end_hour
+
+    @property
+    def hours_label(self) -> str:
+        """Rush hours formatted for display, e.g. '09:00 AM - 05:00 PM'"""
+        rush_from = datetime.strptime(self.rush_from, "%H:%M").strftime("%I:%M %p")
+        rush_to = datetime.strptime(self.rush_to, "%H:%M").strftime("%I:%M %p")
+        return f"{rush_from} - {rush_to}"
+
+class HolidayCalendar:
+    """Holiday schedule indexed by date, parsed once and shared by all billing paths"""
+
+    def __init__(self, csv_filename: str = "West_Bengal_Holidays_2025.csv"):
+        self.csv_filename = csv_filename
+        self._by_date: Dict[date, Holiday] = {}
+        self._sorted_dates: List[date] = []
+        self.version = 0
+        self._changed_days: List[date] = []  # entry i was changed by version i + 1
+        self._load()
+
+    def _load(self):
+        """Load holidays from CSV, falling back to the built-in schedule"""
+        try:
+            df = pd.read_csv(self.csv_filename)
+        except FileNotFoundError:
+            print(f"Warning: {self.csv_filename} not found. Using default holiday data.")
+            df = pd.DataFrame(DEFAULT_HOLIDAYS)
+
+        dates = pd.to_datetime(df['Date'], format='%d-%m-%Y').dt.date
+        for day, name, rush_from, rush_to in zip(dates, df['Holiday Name'],
+                                                 df['Rush Hr From'], df['Rush Hr To']):
+            self._by_date[day] = self._make_holiday(day, name, rush_from, rush_to)
+
+        self._sorted_dates = sorted(self._by_date)
+
+    @staticmethod
+    def _make_holiday(day: date, name: str, rush_from: str, rush_to: str) -> Holiday:
+        # Only the hour matters for billing, matching the original strptime(...).hour logic
+        return Holiday(
+            date=day,
+            name=name,
+            rush_from=rush_from,
+            rush_to=rush_to,
+            rush_start_hour=datetime.strptime(rush_from, "%H:%M").hour,
+            rush_end_hour=datetime.strptime(rush_to, "%H:%M").hour
+        )
+
+    def _record_change(self, day: date):
+        """Bump the version so compiled tariffs can rebuild just the changed day"""
+        self._changed_days.append(day)
+        self.version = len(self._changed_days)
+
+    def add_holiday(self, day: date, name: str, rush_from: str, rush_to: str) -> Holiday:
+        """Add or replace the holiday on a date"""
+        holiday = self._make_holiday(day, name, rush_from, rush_to)
+        if day not in self._by_date:
+            insort(self._sorted_dates, day)
+        self._by_date[day] = holiday
+        self._record_change(day)
+        return holiday
+
+    def remove_holiday(self, day: date) -> bool:
+        """Remove the holiday on a date, returning False if there was none"""
+        if day not in self._by_date:
+            return False
+        del self._by_date[day]
+        self._sorted_dates.remove(day)
+        self._record_change(day)
+        return True
+
+    def changed_days_since(self, version: int) -> Set[date]:
+        """Get the dates whose holiday entry changed after the given version"""
+        return set(self._changed_days[version:])
+
+    def get_holiday(self, day: date) -> Optional[Holiday]:
+        """Get the holiday on a date, if any"""
+        return self._by_date.get(day)
+
+    def is_holiday(self, day: date) -> bool:
+        """Check whether a date is a holiday"""
+        return day in self._by_date
+
+    def rush_window(self, day: date) -> RushWindow:
+        """Get the rush window of a day from the holiday schedule or the weekday rules"""
+        holiday = self._by_date.get(day)
+        if holiday is None:
+            return regular_rush_window(day)
+        return holiday.rush_window
+
+    def upcoming(self, from_date: date, limit: int = 5) -> List[Holiday]:
+        """Get the next holidays on or after a date"""
+        start = bisect_left(self._sorted_dates, from_date)
+        return [self._by_date[day] for day in self._sorted_dates[start:start + limit]]
+
+    def holidays_between(self, start_date: date, end_date: date) -> List[Holiday]:
+        """Get all holidays from start_date to end_date inclusive"""
+        start = bisect_left(self._sorted_dates, start_date)
+        end = bisect_right(self._sorted_dates, end_date)
+        return [self._by_date[day] for day in self._sorted_dates[start:end]]
+
+    def __iter__(self):
+        return (self._by_date[day] for day in self._sorted_dates)
+
+    def __len__(self) -> int:
+        return len(self._by_date)
+
+# Global instance
+holiday_calendar = HolidayCalendar()
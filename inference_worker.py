@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+class InferenceWorker:
+    """Runs frame analysis on a background thread, always on the newest frame.
+
+    submit() puts a frame in a single-slot mailbox and returns at once; a frame
+    still waiting there when the next one arrives is replaced and counted as
+    dropped. The worker analyses whatever is in the mailbox and publishes the
+    result, which latest() returns without waiting, so the caller keeps the
+    camera's frame rate however long the models take.
+    """
+
+    def __init__(self, analyze: Callable[[Any], Any], name: str = "inference-worker"):
+        self._analyze = analyze
+        self._cond = threading.Condition()
+        self._mailbox = None
+        self._closed = False
+        self._result = None
+
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_seconds = 0.0  # analysis time of the latest processed frame
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        """Hand the newest frame to the worker, replacing one it has not started on"""
+        with self._cond:
+            if self._mailbox is not None:
+                self.dropped += 1
+            self._mailbox = frame
+            self.submitted += 1
+            self._cond.notify()
+
+    def latest(self) -> Optional[Any]:
+        """Result of the most recently analysed frame, None before the first one"""
+        return self._result
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._mailbox is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                frame, self._mailbox = self._mailbox, None
+
+            start = time.perf_counter()
+            try:
+                result = self._analyze(frame)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error analysing frame: {e}")
+                continue
+
+            with self._cond:
+                self._result = result
+                self.processed += 1
+                self.last_seconds = time.perf_counter() - start
+                self._cond.notify_all()
+
+    def wait_processed(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Wait until at least count frames have been analysed; False if the timeout ran out"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.processed >= count, timeout)
+
+    def close(self):
+        """Stop the worker; a frame waiting in the mailbox is discarded"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def stats(self) -> Dict[str, float]:
+        """Frames submitted, analysed, dropped as stale and failed, plus the latest analysis time"""
+        with self._cond:
+            return {
+                'submitted': self.submitted,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'pending': int(self._mailbox is not None),
+                'last_ms': self.last_seconds * 1000
+            }
+
+def benchmark_inference_worker(model_seconds: float = 0.1, fps: float = 30, seconds: float = 3.0) -> Dict[str, float]:
+    """Feed frames at a camera rate to a worker whose model takes model_seconds per frame.
+
+    Reports how long the caller spends per frame (what the stream sees) next to
+    the worst case of running the model inline.
+    """
+    def analyze(frame):
+        time.sleep(model_seconds)  # stands in for YOLO / MediaPipe
+        return frame
+
+    worker = InferenceWorker(analyze)
+    frame_interval = 1.0 / fps
+    call_seconds = []
+    start = time.perf_counter()
+    frame_number = 0
+    while time.perf_counter() - start < seconds:
+        call_start = time.perf_counter()
+        worker.submit(frame_number)
+        worker.latest()
+        call_seconds.append(time.perf_counter() - call_start)
+        frame_number += 1
+        time.sleep(max(0.0, start + frame_number * frame_interval - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    worker.close()
+
+    stats = worker.stats()
+    return {
+        'frames': frame_number,
+        'stream_fps': frame_number / elapsed,
+        'inline_fps': min(fps, 1.0 / (model_seconds + 1e-9)),
+        'max_call_ms': max(call_seconds) * 1000,
+        'processed': stats['processed'],
+        'dropped': stats['dropped']
+    }
+
+if __name__ == "__main__":
+    result = benchmark_inference_worker()
+    print(f"{result['frames']} frames at {result['stream_fps']:.1f} fps (inline models would allow "
+          f"{result['inline_fps']:.1f} fps), longest recv-side call {result['max_call_ms']:.2f} ms; "
+          f"{result['processed']} analysed, {result['dropped']} dropped")
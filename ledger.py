@@ -0,0 +1,185 @@
+import os
+import threading
+from collections import deque
+from dataclasses import asdict
+from datetime import datetime
+from typing import Deque, Dict, List
+from slot_journal import decode_record, encode_record
+
+TIME_FIELDS = ("arrival_time", "departure_time", "timestamp")
+
+class TransactionLedger:
+    """Append-only, checksummed file of bills with periodic aggregate checkpoints.
+
+    Every bill is one fsynced line. Every `checkpoint_every` bills the running
+    totals, the number of bills and the most recent ones are saved to a
+    checkpoint file together with the ledger length they cover. Startup reads
+    the checkpoint and only the ledger tail written after it, so restart time
+    depends on the checkpoint interval, not on how much history there is.
+    """
+
+    def __init__(self, filename: str = "parking_ledger.log", checkpoint_every: int = 1000,
+                 recent_limit: int = 100):
+        self.filename = filename
+        self.checkpoint_filename = filename + ".checkpoint"
+        self.checkpoint_every = checkpoint_every
+
+        self.total_revenue = 0.0
+        self.revenue_by_type: Dict[str, float] = {}
+        self.transaction_count = 0
+        self.recent: Deque[Dict] = deque(maxlen=recent_limit)
+
+        self._lock = threading.Lock()
+        self._since_checkpoint = 0
+        self._offset = 0  # ledger bytes applied to the totals
+        self._recover()
+        self._file = open(self.filename, "ab")
+
+    def _apply(self, record: Dict):
+        self.total_revenue += record['amount']
+        self.revenue_by_type[record['vehicle_type']] = (
+            self.revenue_by_type.get(record['vehicle_type'], 0.0) + record['amount']
+        )
+        self.transaction_count += 1
+        self.recent.append(record)
+
+    def _load_checkpoint(self) -> int:
+        """Restore the aggregates from the checkpoint, returning the ledger offset it covers"""
+        if not os.path.exists(self.checkpoint_filename):
+            return 0
+        with open(self.checkpoint_filename, "r", encoding="utf-8") as f:
+            checkpoint = decode_record(f.read())
+        ledger_size = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
+        if checkpoint is None or checkpoint['offset'] > ledger_size:
+            print(f"Warning: Ignoring unusable ledger checkpoint {self.checkpoint_filename}; replaying the full ledger")
+            return 0
+
+        self.total_revenue = checkpoint['total_revenue']
+        self.revenue_by_type = dict(checkpoint['revenue_by_type'])
+        self.transaction_count = checkpoint['transaction_count']
+        self.recent.extend(checkpoint['recent'])
+        return checkpoint['offset']
+
+    def _recover(self):
+        """Load the checkpoint and replay the ledger tail after it, dropping a torn last line"""
+        self._offset = self._load_checkpoint()
+        if not os.path.exists(self.filename):
+            return
+
+        self._read_tail()
+        if os.path.getsize(self.filename) != self._offset:
+            with open(self.filename, "r+b") as f:
+                f.truncate(self._offset)
+                os.fsync(f.fileno())
+
+    def _read_tail(self) -> int:
+        """Apply the complete records after the consumed offset, returning how many there were"""
+        count = 0
+        with open(self.filename, "rb") as f:
+            f.seek(self._offset)
+            for raw_line in f:
+                record = decode_record(raw_line.decode("utf-8", errors="replace"))
+                if record is None:
+                    print(f"Warning: Ignoring damaged ledger tail in {self.filename}")
+                    break
+                self._apply(record)
+                self._since_checkpoint += 1
+                self._offset += len(raw_line)
+                count += 1
+        return count
+
+    def refresh(self) -> bool:
+        """Pick up bills other processes appended (or a clear they made); True if anything changed.
+
+        Writers must be serialised across processes, e.g. by a StateLock, for the
+        appended records to stay whole.
+        """
+        with self._lock:
+            try:
+                on_disk = os.stat(self.filename)
+            except OSError:
+                return False
+
+            if on_disk.st_ino != os.fstat(self._file.fileno()).st_ino:
+                # Cleared elsewhere: the ledger was replaced with a new file
+                self._reset()
+                self._recover()
+                self._file.close()
+                self._file = open(self.filename, "ab")
+                return True
+            if on_disk.st_size == self._offset:
+                return False
+            return self._read_tail() > 0
+
+    def append(self, transaction):
+        """Durably record a finished Transaction"""
+        record = asdict(transaction)
+        for field in TIME_FIELDS:
+            record[field] = record[field].isoformat()
+
+        data = encode_record(record).encode("utf-8")
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._offset += len(data)
+            self._apply(record)
+            self._since_checkpoint += 1
+            if self._since_checkpoint >= self.checkpoint_every:
+                self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        checkpoint = {
+            'offset': self._offset,
+            'total_revenue': self.total_revenue,
+            'revenue_by_type': self.revenue_by_type,
+            'transaction_count': self.transaction_count,
+            'recent': list(self.recent)
+        }
+        temp_filename = self.checkpoint_filename + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as f:
+            f.write(encode_record(checkpoint))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, self.checkpoint_filename)
+        self._since_checkpoint = 0
+
+    def checkpoint(self):
+        """Save the aggregates now, e.g. before a planned shutdown"""
+        with self._lock:
+            self._write_checkpoint()
+
+    def recent_transactions(self) -> List[Dict]:
+        """The most recent bills, oldest first, with times as datetimes"""
+        transactions = []
+        for record in self.recent:
+            transaction = dict(record)
+            for field in TIME_FIELDS:
+                transaction[field] = datetime.fromisoformat(transaction[field])
+            transactions.append(transaction)
+        return transactions
+
+    def _reset(self):
+        self.total_revenue = 0.0
+        self.revenue_by_type = {}
+        self.transaction_count = 0
+        self.recent.clear()
+        self._since_checkpoint = 0
+        self._offset = 0
+
+    def clear(self):
+        """Erase the ledger and its checkpoint"""
+        with self._lock:
+            # A new file rather than a truncation, so other processes notice the clear
+            temp_filename = self.filename + ".tmp"
+            with open(temp_filename, "wb") as f:
+                os.fsync(f.fileno())
+            self._reset()
+            self._write_checkpoint()
+            os.replace(temp_filename, self.filename)
+            self._file.close()
+            self._file = open(self.filename, "ab")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
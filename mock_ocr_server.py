@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+class MockOCRServer:
+    """Local stand-in for the OCR.space parse endpoint.
+
+    Answers every POST with the same parsed text after `delay` seconds, using
+    a thread per request like the real service handles concurrent calls; any
+    `status` other than 200 is answered as a server error instead. Use it as a
+    context manager and give an engine an HTTPOCRBackend pointing at `url`.
+    """
+
+    def __init__(self, text: str = "MH12AB1234", delay: float = 0.5, port: int = 0, status: int = 200):
+        self.text = text
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        self.max_in_flight = 0  # most requests being answered at the same time
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._lock:
+                    server.requests += 1
+                    server._in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server._in_flight)
+                time.sleep(server.delay)
+                with server._lock:
+                    server._in_flight -= 1
+
+                if server.status != 200:
+                    body = json.dumps({"IsErroredOnProcessing": True, "ErrorMessage": ["Mock failure"]})
+                else:
+                    body = json.dumps({
+                        "ParsedResults": [{"ParsedText": server.text}] if server.text else [],
+                        "IsErroredOnProcessing": False
+                    })
+                body = body.encode("utf-8")
+                try:
+                    self.send_response(server.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client timed out and closed the connection
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/parse/image"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-ocr", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def benchmark_plate_ocr(delay: float = 0.5, text: Optional[str] = "MH12AB1234", runs: int = 3) -> Dict[str, float]:
+    """Compare reading the image variants one after another with the concurrent pipeline.
+
+    The global detection engine is pointed at a MockOCRServer that takes `delay`
+    seconds per request. With an acceptable plate the concurrent read returns
+    after the first answer; with text=None every variant is waited for.
+    """
+    import numpy as np
+    # The engine needs a key to start; its backend is swapped for the mock server below
+    os.environ.setdefault("OCR_SPACE_API_KEY", "mock")
+    from detection_engine import detection_engine
+    from ocr_backends import HTTPOCRBackend
+
+    plate = np.full((60, 200, 3), 255, dtype=np.uint8)
+    plate[20:40, 20:180] = 0
+    original_backend = detection_engine.ocr_backend
+
+    with MockOCRServer(text=text or "", delay=delay) as server:
+        detection_engine.ocr_backend = HTTPOCRBackend(server.url, api_key="mock")
+        try:
+            start = time.perf_counter()
+            for _ in range(runs):
+                sequential = max(
+                    (detection_engine._ocr_request(variant) for variant in detection_engine._ocr_variants(plate)),
+                    key=lambda result: result[1]
+                )[0]
+            sequential_seconds = (time.perf_counter() - start) / runs
+
+            start = time.perf_counter()
+            for _ in range(runs):
+                detection_engine.ocr_cache.clear()  # time the OCR calls, not a cache hit
+                concurrent = detection_engine.submit_license_plate_ocr(plate).result()
+            concurrent_seconds = (time.perf_counter() - start) / runs
+        finally:
+            detection_engine.ocr_backend.close()
+            detection_engine.ocr_backend = original_backend
+
+    return {
+        'sequential_seconds': sequential_seconds,
+        'concurrent_seconds': concurrent_seconds,
+        'same_result': sequential == concurrent,
+        'requests': server.requests
+    }
+
+def check_plate_ocr(delay: float = 0.3):
+    """Check the concurrent OCR pipeline against the mock server, raising AssertionError on a failure.
+    
+    Covers a readable plate (variants read at once, the first accepted answer
+    wins), a server error, a request timeout and a failing completion callback;
+    every case must resolve its future instead of hanging.
+    """
+    import numpy as np
+    # The engine needs a key to start; its backend is swapped for the mock server below
+    os.environ.setdefault("OCR_SPACE_API_KEY", "mock")
+    from detection_engine import detection_engine
+    from ocr_backends import HTTPOCRBackend
+
+    plate = np.full((60, 200, 3), 255, dtype=np.uint8)
+    plate[20:40, 20:180] = 0
+    original_backend = detection_engine.ocr_backend
+
+    def read_with(server: MockOCRServer, timeout: float = 15):
+        detection_engine.ocr_backend = HTTPOCRBackend(server.url, api_key="mock", timeout=timeout)
+        start = time.perf_counter()
+        try:
+            return detection_engine.submit_license_plate_ocr(plate, use_cache=False).result(timeout=10)
+        finally:
+            detection_engine.ocr_backend.close()
+            assert time.perf_counter() - start < 2 * max(delay, timeout), "the read took too long"
+
+    try:
+        with MockOCRServer("MH12AB1234", delay) as server:
+            assert read_with(server) == "MH12AB1234", "readable plate not read"
+            assert server.max_in_flight == len(detection_engine._ocr_variants(plate)), \
+                f"variants were not read concurrently ({server.max_in_flight} at once)"
+
+        with MockOCRServer("MH12AB1234", delay, status=500) as server:
+            assert read_with(server) is None, "a server error should read as no plate"
+
+        with MockOCRServer("MH12AB1234", delay * 4) as server:
+            assert read_with(server, timeout=delay / 2) is None, "a timed out request should read as no plate"
+
+        # A variant result the completion callback cannot unpack must fail the future, not leave it pending
+        detection_engine._ocr_request = lambda image: None
+        try:
+            detection_engine.submit_license_plate_ocr(plate, use_cache=False).result(timeout=10)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("a failing callback should fail the read")
+    finally:
+        vars(detection_engine).pop("_ocr_request", None)
+        detection_engine.ocr_backend = original_backend
+
+if __name__ == "__main__":
+    check_plate_ocr()
+    print("Concurrent OCR checks passed (readable plate, server error, timeout, failing callback)")
+    for text in ("MH12AB1234", None):
+        result = benchmark_plate_ocr(text=text)
+        label = "readable plate" if text else "unreadable plate"
+        print(f"{label}: sequential {result['sequential_seconds']:.2f}s, concurrent "
+              f"{result['concurrent_seconds']:.2f}s per read (same result: {result['same_result']})")
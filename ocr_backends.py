@@ -0,0 +1,331 @@
+import base64
+import difflib
+from abc import ABC, abstractmethod
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+# Tesseract is optional; only the "tesseract" OCR backend needs it
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+logger = logging.getLogger(__name__)
+
+OCR_SPACE_URL = "https://api.ocr.space/parse/image"
+PLATE_CHARACTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+class OCRBackend(ABC):
+    """Reads text from a preprocessed (grayscale or binary) plate image.
+
+    Backends return the raw candidate strings they found; cleaning, validation
+    and scoring stay with the DetectionEngine. read() may be called from
+    several threads at once.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def read(self, image: np.ndarray) -> List[str]:
+        """Get the text candidates found in the image"""
+
+    def close(self):
+        pass
+
+class HTTPOCRBackend(OCRBackend):
+    """OCR.space-compatible web service, over a pooled keep-alive session"""
+
+    name = "http"
+
+    def __init__(self, api_url: str = OCR_SPACE_URL, api_key: str = "", timeout: float = 15,
+                 pool_size: int = 3):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=pool_size))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=pool_size))
+
+    def read(self, image: np.ndarray) -> List[str]:
+        _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        img_base64 = base64.b64encode(buffer).decode()
+
+        payload = {
+            'apikey': self.api_key,
+            'language': 'eng',
+            'isOverlayRequired': False,
+            'base64Image': f'data:image/jpeg;base64,{img_base64}',
+            'OCREngine': '2',
+            'scale': 'true',
+            'isTable': 'false'
+        }
+
+        response = self.session.post(self.api_url, data=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            logger.warning(f"OCR service returned HTTP {response.status_code}")
+            return []
+
+        result = response.json()
+        if result.get("IsErroredOnProcessing", True):
+            return []
+        return [
+            parsed_result.get("ParsedText", "").strip()
+            for parsed_result in result.get("ParsedResults", [])
+            if parsed_result.get("ParsedText", "").strip()
+        ]
+
+    def close(self):
+        self.session.close()
+
+class TesseractOCRBackend(OCRBackend):
+    """Local Tesseract through pytesseract, restricted to one line of plate characters"""
+
+    name = "tesseract"
+
+    def __init__(self, config: str = f"--psm 7 -c tessedit_char_whitelist={PLATE_CHARACTERS}"):
+        if pytesseract is None:
+            raise RuntimeError("pytesseract is not installed")
+        self.config = config
+
+    def read(self, image: np.ndarray) -> List[str]:
+        text = pytesseract.image_to_string(image, config=self.config).strip()
+        return [text] if text else []
+
+class TemplateOCRBackend(OCRBackend):
+    """Pure OpenCV reader: contour segmentation plus a nearest-template classifier.
+
+    Characters are found as external contours of the binarised plate, grouped
+    into rows (two-row plates read top row first) and matched against glyph
+    templates by normalised correlation. Templates are rendered from OpenCV's
+    fonts unless `templates_dir` holds images named after their character,
+    e.g. `A.png` or `7_2.png`, cut from real plates.
+    """
+
+    name = "template"
+    GLYPH_SIZE = (20, 32)  # width, height
+
+    def __init__(self, templates_dir: Optional[str] = None):
+        templates = self._load_templates(templates_dir) if templates_dir else self._render_templates()
+        self.labels = [label for label, _ in templates]
+        self.matrix = np.stack([self._normalize(glyph) for _, glyph in templates])
+
+    def _render_templates(self) -> List[Tuple[str, np.ndarray]]:
+        templates = []
+        for font in (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX):
+            for thickness in (2, 4):
+                for character in PLATE_CHARACTERS:
+                    canvas = np.zeros((80, 80), dtype=np.uint8)
+                    cv2.putText(canvas, character, (10, 65), font, 2, 255, thickness)
+                    templates.append((character, self._crop(canvas)))
+        return templates
+
+    def _load_templates(self, templates_dir: str) -> List[Tuple[str, np.ndarray]]:
+        templates = []
+        for filename in sorted(os.listdir(templates_dir)):
+            character = filename[0].upper()
+            image = cv2.imread(os.path.join(templates_dir, filename), cv2.IMREAD_GRAYSCALE)
+            if character not in PLATE_CHARACTERS or image is None:
+                continue
+            glyphs = self.segment(image)
+            if glyphs:
+                templates.append((character, glyphs[0]))
+        if not templates:
+            raise ValueError(f"No character templates found in {templates_dir}")
+        return templates
+
+    @staticmethod
+    def _crop(binary: np.ndarray) -> np.ndarray:
+        points = cv2.findNonZero(binary)
+        if points is None:
+            return binary
+        x, y, w, h = cv2.boundingRect(points)
+        return binary[y:y + h, x:x + w]
+
+    def _normalize(self, glyph: np.ndarray) -> np.ndarray:
+        vector = cv2.resize(glyph, self.GLYPH_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+        vector -= vector.mean()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def segment(self, image: np.ndarray) -> List[np.ndarray]:
+        """Cut a plate image into binary character glyphs in reading order"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Characters should be white; plates are mostly dark text on a light background
+        if cv2.countNonZero(binary) > binary.size // 2:
+            binary = cv2.bitwise_not(binary)
+
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        height = binary.shape[0]
+        boxes = [
+            (x, y, w, h) for x, y, w, h in map(cv2.boundingRect, contours)
+            if 0.2 * height <= h <= 0.95 * height and 2 <= w <= 1.2 * h
+        ]
+        if not boxes:
+            return []
+
+        # Drop specks and bolts well below the typical character height
+        median_height = float(np.median([h for _, _, _, h in boxes]))
+        boxes = [box for box in boxes if box[3] >= 0.6 * median_height]
+
+        # Group into rows by vertical centre, then read each row left to right
+        rows: List[List[Tuple[int, int, int, int]]] = []
+        for box in sorted(boxes, key=lambda b: b[1] + b[3] / 2):
+            centre = box[1] + box[3] / 2
+            if rows and centre - (rows[-1][0][1] + rows[-1][0][3] / 2) < 0.6 * median_height:
+                rows[-1].append(box)
+            else:
+                rows.append([box])
+
+        return [
+            binary[y:y + h, x:x + w]
+            for row in rows
+            for x, y, w, h in sorted(row)
+        ]
+
+    def read(self, image: np.ndarray) -> List[str]:
+        glyphs = self.segment(image)
+        if not glyphs:
+            return []
+        similarity = np.stack([self._normalize(glyph) for glyph in glyphs]) @ self.matrix.T
+        return [''.join(self.labels[index] for index in similarity.argmax(axis=1))]
+
+OCR_BACKENDS = {
+    "http": HTTPOCRBackend,
+    "tesseract": TesseractOCRBackend,
+    "template": TemplateOCRBackend
+}
+
+def _http_backend() -> HTTPOCRBackend:
+    """The web service backend configured from the environment"""
+    api_key = os.environ.get("OCR_SPACE_API_KEY")
+    if not api_key:
+        raise RuntimeError("OCR_SPACE_API_KEY is not set")
+    return HTTPOCRBackend(os.environ.get("OCR_SPACE_API_URL", OCR_SPACE_URL), api_key)
+
+def create_ocr_backend(name: Optional[str] = None) -> OCRBackend:
+    """Build the OCR backend named by `name` or the OCR_BACKEND environment variable.
+
+    The web service needs its key in OCR_SPACE_API_KEY and optionally takes its
+    URL from OCR_SPACE_API_URL. A backend that cannot be built (an unknown name,
+    "http" without a key, or "tesseract" without pytesseract) raises instead of
+    quietly switching to another engine.
+    """
+    name = (name or os.environ.get("OCR_BACKEND", "http")).lower()
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name}")
+
+    if name == "http":
+        return _http_backend()
+    if name == "tesseract":
+        return TesseractOCRBackend()
+    return TemplateOCRBackend(os.environ.get("OCR_TEMPLATES_DIR"))
+
+def _plate_text(text: str) -> str:
+    return re.sub(r'[^A-Z0-9]', '', text.upper())
+
+def random_plate_text(rng: np.random.Generator) -> str:
+    states = ["MH", "DL", "KA", "WB", "TN", "UP", "GJ", "RJ"]
+    return (states[rng.integers(len(states))] + f"{rng.integers(1, 100):02d}"
+            + ''.join(rng.choice(list(PLATE_CHARACTERS[:26]), 2)) + f"{rng.integers(0, 10000):04d}")
+
+def render_plate(text: str, rng: np.random.Generator, jitter: int = 0) -> np.ndarray:
+    """Draw a grayscale plate crop with blur and sensor noise, the text shifted by up to `jitter` pixels"""
+    dx, dy = rng.integers(-jitter, jitter + 1, 2) if jitter else (0, 0)
+    plate = np.full((70, 320), 235, dtype=np.uint8)
+    cv2.putText(plate, text, (12 + int(dx), 52 + int(dy)), cv2.FONT_HERSHEY_SIMPLEX, 1.4, 20, 3)
+    plate = cv2.GaussianBlur(plate, (3, 3), 0)
+    noise = rng.normal(0, 8, plate.shape)
+    return np.clip(plate + noise, 0, 255).astype(np.uint8)
+
+def write_synthetic_plates(folder: str, count: int = 50, seed: int = 0) -> List[str]:
+    """Render plate crops named after their text, for benchmarking without real crops"""
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        text = random_plate_text(rng)
+        plate = render_plate(text, rng)
+        path = os.path.join(folder, f"{text}_{i}.png")
+        cv2.imwrite(path, plate)
+        paths.append(path)
+    return paths
+
+def benchmark_ocr_backends(folder: str, backends: Sequence[str] = ("template", "tesseract", "http")) -> Dict[str, Dict]:
+    """Latency and accuracy of each backend over a folder of plate crops.
+
+    The expected plate is the file name up to the first underscore or dot,
+    e.g. `MH12AB1234.jpg` or `MH12AB1234_3.png`. A read counts as exact when
+    any candidate matches after stripping non-alphanumerics; char_accuracy is
+    the mean similarity ratio of the best candidate.
+    """
+    crops = []
+    for filename in sorted(os.listdir(folder)):
+        image = cv2.imread(os.path.join(folder, filename), cv2.IMREAD_GRAYSCALE)
+        if image is not None:
+            crops.append((_plate_text(re.split(r'[_.]', filename)[0]), image))
+
+    results = {}
+    for name in backends:
+        try:
+            if name == "http":
+                backend = _http_backend()
+            else:
+                backend = OCR_BACKENDS[name]()
+        except (RuntimeError, ValueError) as e:
+            results[name] = {'skipped': str(e)}
+            continue
+
+        latencies = []
+        exact = 0
+        similarity = 0.0
+        for expected, image in crops:
+            start = time.perf_counter()
+            try:
+                candidates = [_plate_text(text) for text in backend.read(image)]
+            except Exception as e:
+                logger.error(f"{name} OCR error: {e}")
+                candidates = []
+            latencies.append(time.perf_counter() - start)
+
+            exact += expected in candidates
+            similarity += max((difflib.SequenceMatcher(None, expected, text).ratio() for text in candidates),
+                              default=0.0)
+        backend.close()
+
+        latencies_ms = np.array(latencies) * 1000
+        results[name] = {
+            'crops': len(crops),
+            'mean_ms': float(latencies_ms.mean()) if len(crops) else 0.0,
+            'p95_ms': float(np.percentile(latencies_ms, 95)) if len(crops) else 0.0,
+            'exact_accuracy': exact / len(crops) if crops else 0.0,
+            'char_accuracy': similarity / len(crops) if crops else 0.0
+        }
+    return results
+
+if __name__ == "__main__":
+    # python ocr_backends.py [crops_folder] [backend ...]; without a folder synthetic plates are used
+    with tempfile.TemporaryDirectory() as synthetic_folder:
+        if len(sys.argv) > 1:
+            folder = sys.argv[1]
+        else:
+            folder = synthetic_folder
+            write_synthetic_plates(folder)
+            print("No crops folder given; using synthetic plates")
+        names = sys.argv[2:] or ("template", "tesseract", "http")
+
+        for name, result in benchmark_ocr_backends(folder, names).items():
+            if 'skipped' in result:
+                print(f"{name}: skipped ({result['skipped']})")
+            else:
+                print(f"{name}: {result['crops']} crops, {result['mean_ms']:.1f} ms mean / {result['p95_ms']:.1f} ms p95, "
+                      f"exact {result['exact_accuracy']:.0%}, characters {result['char_accuracy']:.0%}")
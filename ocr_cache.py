@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+def _normalize(image: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """Crop a plate to its characters, then shrink and equalise it so re-captures hash alike"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    _, binary = cv2.threshold(cv2.GaussianBlur(gray, (5, 5), 0), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    points = cv2.findNonZero(binary)
+    if points is not None:
+        x, y, w, h = cv2.boundingRect(points)
+        gray = gray[y:y + h, x:x + w]
+    return cv2.equalizeHist(cv2.resize(gray, size, interpolation=cv2.INTER_AREA))
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+def dhash(image: np.ndarray, width: int = 16, height: int = 8) -> int:
+    """Difference hash: one bit per horizontally adjacent pixel pair of a small plate thumbnail.
+
+    The default 16x8 grid (128 bits) suits the wide aspect of number plates.
+    """
+    thumbnail = _normalize(image, (width + 1, height)).astype(np.int16)
+    return _bits_to_int(thumbnail[:, 1:] > thumbnail[:, :-1])
+
+def phash(image: np.ndarray, width: int = 16, height: int = 4) -> int:
+    """Perceptual hash: signs of the lowest width x height DCT coefficients against their median"""
+    thumbnail = _normalize(image, (width * 4, height * 4)).astype(np.float32)
+    low = cv2.dct(thumbnail)[:height, :width].ravel()[1:]  # the DC term only carries brightness
+    return _bits_to_int(low > np.median(low))
+
+# Hash function and the default match distance for it; on re-rendered plates with
+# noise and a 3 px shift, re-captures stay within these while random other plates
+# differ by 30+ (dhash, 128 bits) or 20+ (phash, 63 bits) bits. Plates one character
+# apart can hash as close as re-captures, so a match is only a candidate to confirm
+HASHES = {
+    "dhash": (dhash, 12),
+    "phash": (phash, 10)
+}
+
+class OCRCache:
+    """Plate text cache keyed by a perceptual hash of the plate crop.
+
+    A lookup matches the closest stored hash within `max_distance` differing
+    bits, so a retry or a returning car finds its text even though its crop is
+    never pixel-identical. Plates one character apart hash alike too, so the
+    text is a candidate: a caller must confirm it with an OCR read (one image
+    variant instead of all of them) before using it. Entries expire after
+    `ttl` seconds and the least recently used one is evicted beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600, max_distance: Optional[int] = None,
+                 hash_kind: str = "dhash"):
+        if hash_kind not in HASHES:
+            raise ValueError(f"Unknown hash kind: {hash_kind}")
+        self.hash_image, default_distance = HASHES[hash_kind]
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = default_distance if max_distance is None else max_distance
+
+        self._entries: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: int, now: Optional[float] = None) -> Optional[str]:
+        """Get the candidate text stored under the nearest hash to key, counting a hit or miss"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            best_key = None
+            best_distance = self.max_distance + 1
+            for stored_key, (_, stored_at) in list(self._entries.items()):
+                if now - stored_at > self.ttl:
+                    del self._entries[stored_key]
+                    self.expirations += 1
+                    continue
+                distance = bin(stored_key ^ key).count("1")
+                if distance < best_distance:
+                    best_key, best_distance = stored_key, distance
+
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][0]
+
+    def put(self, key: int, text: str, now: Optional[float] = None):
+        """Store a plate read; the TTL runs from now"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._entries[key] = (text, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counts, hit rate, evictions, expirations and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries)
+            }
+
+def _one_character_apart(text: str, rng: np.random.Generator) -> str:
+    """The same plate with one character changed, e.g. DL01CA1111 -> DL01CA1117"""
+    i = int(rng.integers(len(text)))
+    pool = "0123456789" if text[i].isdigit() else "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return text[:i] + rng.choice([c for c in pool if c != text[i]]) + text[i + 1:]
+
+def benchmark_ocr_cache(plates: int = 100, repeats: int = 5, jitter: int = 3, seed: int = 0,
+                        hash_kind: str = "dhash") -> Dict[str, float]:
+    """Replay re-captures of synthetic plates, and plates one character apart, through the cache.
+
+    Each plate is OCRed (here: its known text is stored) on first sight and
+    re-rendered `repeats` times with fresh noise and up to `jitter` pixels of
+    shift. Reports the candidate rate on re-captures, how many candidates were
+    another plate's text, and the lookup cost. Then every plate is followed by
+    a car whose plate differs in one character: near_identical_candidates is
+    the share of those the cache offers the first car's text for, and
+    near_identical_wrong_reads the share the detection engine (with the local
+    template OCR backend) still returns the first car's plate for once
+    candidates are confirmed by a read.
+    """
+    from detection_engine import detection_engine
+    from ocr_backends import TemplateOCRBackend, random_plate_text, render_plate
+
+    rng = np.random.default_rng(seed)
+    cache = OCRCache(max_entries=plates, hash_kind=hash_kind)
+    texts = [random_plate_text(rng) for _ in range(plates)]
+    for text in texts:
+        cache.put(cache.hash_image(render_plate(text, rng)), text)
+
+    wrong = 0
+    lookup_seconds = 0.0
+    for _ in range(repeats):
+        for text in texts:
+            crop = render_plate(text, rng, jitter)
+            start = time.perf_counter()
+            cached = cache.get(cache.hash_image(crop))
+            lookup_seconds += time.perf_counter() - start
+            wrong += cached is not None and cached != text
+    stats = cache.stats()
+
+    near_candidates = 0
+    near_wrong_reads = 0
+    original_backend, original_cache = detection_engine.ocr_backend, detection_engine.ocr_cache
+    detection_engine.ocr_backend = TemplateOCRBackend()
+    detection_engine.ocr_cache = OCRCache(max_entries=plates, hash_kind=hash_kind)
+    try:
+        for text in texts:
+            detection_engine.ocr_cache.clear()
+            first_read = detection_engine.process_license_plate_ocr(render_plate(text, rng))
+            if not first_read:
+                continue
+            crop = render_plate(_one_character_apart(first_read, rng), rng, jitter)
+            engine_cache = detection_engine.ocr_cache
+            near_candidates += engine_cache.get(engine_cache.hash_image(crop)) == first_read
+            near_wrong_reads += detection_engine.process_license_plate_ocr(crop) == first_read
+    finally:
+        detection_engine.ocr_backend, detection_engine.ocr_cache = original_backend, original_cache
+
+    return {
+        'hit_rate': stats['hit_rate'],
+        'wrong_hits': wrong,
+        'lookup_us': lookup_seconds / (plates * repeats) * 1e6,
+        'near_identical_candidates': near_candidates / plates,
+        'near_identical_wrong_reads': near_wrong_reads / plates
+    }
+
+if __name__ == "__main__":
+    for kind in HASHES:
+        result = benchmark_ocr_cache(hash_kind=kind)
+        print(f"{kind}: {result['hit_rate']:.0%} of re-captures found a candidate, "
+              f"{result['wrong_hits']} wrong candidates, {result['lookup_us']:.0f} us per hash + lookup; "
+              f"plates one character apart got the previous plate as candidate {result['near_identical_candidates']:.0%} "
+              f"of the time and were read as it {result['near_identical_wrong_reads']:.0%} of the time")
@@ -1,25 +1,19 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import functools
+import heapq
+import threading
+import time
 import uuid
 import json
-import pandas as pd
 from dataclasses import dataclass, asdict
-from enum import Enum
-
-class SlotStatus(Enum):
-    AVAILABLE = "available"
-    OCCUPIED = "occupied"
-    RESERVED = "reserved"
-
-@dataclass
-class ParkingSlot:
-    slot_id: str
-    status: SlotStatus
-    vehicle_type: Optional[str] = None
-    vehicle_number: Optional[str] = None
-    arrival_time: Optional[datetime] = None
-    pickup_time: Optional[datetime] = None
-    reservation_time: Optional[datetime] = None
+from collections import OrderedDict
+from billing import bill_many
+from holiday_calendar import HolidayCalendar, holiday_calendar as default_holiday_calendar
+from reservations import EndTimeIndex, Reservation, ReservationBook
+from slot_index import FreeSlotIndex, PlateIndex
+from slot_store import ArraySlotStore, DictSlotStore, ParkingSlot, SlotStatus
+from tariff import CompiledTariff
 
 @dataclass
 class Transaction:
@@ -32,68 +26,324 @@ class Transaction:
     amount: float
     timestamp: datetime
 
+class _WriteLock:
+    """Reentrant writer lock whose sequence number is odd while a thread holds it"""
+    
+    __slots__ = ("_lock", "depth", "owner", "sequence")
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.depth = 0
+        self.owner: Optional[int] = None
+        self.sequence = 0
+    
+    def __enter__(self):
+        self._lock.acquire()
+        self.depth += 1
+        if self.depth == 1:
+            self.owner = threading.get_ident()
+            self.sequence += 1
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.depth -= 1
+        if self.depth == 0:
+            self.sequence += 1
+            self.owner = None
+        self._lock.release()
+
+def _writer(method):
+    """Run a ParkingManager method under its writer lock"""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+def _reader(method):
+    """Run a ParkingManager method as an optimistic read that does not block writers"""
+    @functools.wraps(method)
+    def read(self, *args, **kwargs):
+        return self._read(lambda: method(self, *args, **kwargs))
+    return read
+
 class ParkingManager:
-    def __init__(self, total_slots: int = 20):
+    """Slot assignment, billing and revenue for one lot.
+    
+    Safe to share between threads (video callback, browser sessions). Changes
+    are serialised by a writer lock held only for the short check-and-assign
+    step; bills are computed outside it. Reads take no lock: they run against
+    the live structures and are retried when a write overlapped them, which a
+    write sequence counter (odd while a write is in progress) tells them.
+    """
+    
+    # Optimistic attempts before a read waits for the writer lock instead
+    read_retries = 8
+    
+    def __init__(self, total_slots: int = 20, holiday_calendar: Optional[HolidayCalendar] = None,
+                 debug: bool = False, slot_store: str = "dict"):
         self.total_slots = total_slots
-        self.slots: Dict[str, ParkingSlot] = {}
         self.transactions: List[Transaction] = []
         self.total_revenue: float = 0.0
+        self.revenue_by_type: Dict[str, float] = {}
+        self.reservations = ReservationBook()
+        self._active_reservations: Dict[str, str] = {}  # slot_id -> reservation id held there
+        self._blocked_reservations = set()
+        self._transaction_plates = PlateIndex()  # keyed by position in self.transactions
+        self.version = 0  # bumped on every slot change so cached views know when to rebuild
+        
+        # Serialises changes; its sequence number tells lock-free readers a write overlapped them
+        self._write_lock = _WriteLock()
+        self._quote_lock = threading.Lock()
+        
+        # Revenue and count of past transactions restored as totals only (see restore_history)
+        self._earlier_revenue = 0.0
+        self._earlier_transactions = 0
+        
+        # In debug mode get_statistics cross-checks the running counters with a full scan
+        self.debug = debug
         
         # Initialize slots
-        for i in range(1, total_slots + 1):
-            slot_id = f"slot_{i}"
-            self.slots[slot_id] = ParkingSlot(
-                slot_id=slot_id,
-                status=SlotStatus.AVAILABLE
-            )
-        
-        # Load holidays data from CSV
-        try:
-            self.holidays = pd.read_csv("West_Bengal_Holidays_2025.csv")
-            self.holidays['Date'] = pd.to_datetime(self.holidays['Date'], format='%d-%m-%Y')
-        except FileNotFoundError:
-            print("Warning: West_Bengal_Holidays_2025.csv not found. Using default holiday data.")
-            # Fallback to default holidays
-            self.holidays = pd.DataFrame([
-                {'Date': '01-01-2025', 'Holiday Name': 'New Year\'s Day', 'Rush Hr From': '00:00', 'Rush Hr To': '23:59'},
-                {'Date': '26-01-2025', 'Holiday Name': 'Republic Day', 'Rush Hr From': '08:00', 'Rush Hr To': '14:00'},
-                {'Date': '02-02-2025', 'Holiday Name': 'Vasant Panchami', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '26-02-2025', 'Holiday Name': 'Maha Shivaratri', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '13-03-2025', 'Holiday Name': 'Holika Dahana', 'Rush Hr From': '09:00', 'Rush Hr To': '22:00'},
-                {'Date': '14-03-2025', 'Holiday Name': 'Holi', 'Rush Hr From': '09:00', 'Rush Hr To': '20:00'},
-                {'Date': '28-03-2025', 'Holiday Name': 'Jamat Ul-Vida', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '30-03-2025', 'Holiday Name': 'Chaitra Sukhladi / Ugadi / Gudi Padwa', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '31-03-2025', 'Holiday Name': 'Eid-ul-Fitr', 'Rush Hr From': '08:00', 'Rush Hr To': '21:00'},
-                {'Date': '06-04-2025', 'Holiday Name': 'Rama Navami', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '10-04-2025', 'Holiday Name': 'Mahavir Jayanti', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '18-04-2025', 'Holiday Name': 'Good Friday', 'Rush Hr From': '08:00', 'Rush Hr To': '16:00'},
-                {'Date': '12-05-2025', 'Holiday Name': 'Buddha Purnima', 'Rush Hr From': '09:00', 'Rush Hr To': '18:00'},
-                {'Date': '07-06-2025', 'Holiday Name': 'Eid ul-Adha (Bakrid)', 'Rush Hr From': '08:00', 'Rush Hr To': '21:00'},
-                {'Date': '06-07-2025', 'Holiday Name': 'Muharram', 'Rush Hr From': '07:00', 'Rush Hr To': '19:00'},
-                {'Date': '09-08-2025', 'Holiday Name': 'Raksha Bandhan', 'Rush Hr From': '10:00', 'Rush Hr To': '18:00'},
-                {'Date': '15-08-2025', 'Holiday Name': 'Independence Day', 'Rush Hr From': '08:00', 'Rush Hr To': '14:00'},
-                {'Date': '16-08-2025', 'Holiday Name': 'Janmashtami', 'Rush Hr From': '08:00', 'Rush Hr To': '23:00'},
-                {'Date': '27-08-2025', 'Holiday Name': 'Ganesh Chaturthi', 'Rush Hr From': '08:00', 'Rush Hr To': '21:00'},
-                {'Date': '05-09-2025', 'Holiday Name': 'Milad-un-Nabi / Onam', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '29-09-2025', 'Holiday Name': 'Maha Saptami', 'Rush Hr From': '06:00', 'Rush Hr To': '23:59'},
-                {'Date': '30-09-2025', 'Holiday Name': 'Maha Ashtami', 'Rush Hr From': '06:00', 'Rush Hr To': '23:59'},
-                {'Date': '01-10-2025', 'Holiday Name': 'Maha Navami', 'Rush Hr From': '06:00', 'Rush Hr To': '23:59'},
-                {'Date': '02-10-2025', 'Holiday Name': 'Mahatma Gandhi Jayanti / Dussehra', 'Rush Hr From': '08:00', 'Rush Hr To': '17:00'},
-                {'Date': '07-10-2025', 'Holiday Name': 'Maharishi Valmiki Jayanti', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '20-10-2025', 'Holiday Name': 'Diwali', 'Rush Hr From': '10:00', 'Rush Hr To': '23:59'},
-                {'Date': '22-10-2025', 'Holiday Name': 'Govardhan Puja', 'Rush Hr From': '09:00', 'Rush Hr To': '18:00'},
-                {'Date': '23-10-2025', 'Holiday Name': 'Bhai Duj', 'Rush Hr From': '10:00', 'Rush Hr To': '18:00'},
-                {'Date': '05-11-2025', 'Holiday Name': 'Guru Nanak Jayanti', 'Rush Hr From': '09:00', 'Rush Hr To': '19:00'},
-                {'Date': '24-11-2025', 'Holiday Name': 'Guru Tegh Bahadur\'s Martyrdom Day', 'Rush Hr From': '09:00', 'Rush Hr To': '17:00'},
-                {'Date': '25-12-2025', 'Holiday Name': 'Christmas Day', 'Rush Hr From': '09:00', 'Rush Hr To': '22:00'},
-                {'Date': '31-12-2025', 'Holiday Name': 'New Year\'s Eve', 'Rush Hr From': '00:00', 'Rush Hr To': '23:59'}
-            ])
-            self.holidays['Date'] = pd.to_datetime(self.holidays['Date'])
+        self._slot_numbers: Dict[str, int] = {f"slot_{i}": i for i in range(1, total_slots + 1)}
+        
+        # "dict" keeps ParkingSlot objects, "array" packs slots into NumPy columns for large lots
+        if slot_store == "array":
+            self.slots = ArraySlotStore(list(self._slot_numbers), self._slot_numbers)
+        elif slot_store == "dict":
+            self.slots = DictSlotStore()
+        else:
+            raise ValueError(f"Unknown slot store: {slot_store}")
+        self._reset_slots()
+        
+        # Shared holiday schedule used for rush hour billing
+        self.holiday_calendar = holiday_calendar if holiday_calendar is not None else default_holiday_calendar
+        self.tariff = CompiledTariff(self.holiday_calendar)
         
         # Pricing configuration - Updated to match new system
         self.standard_rate = {"Car": 200, "Bike": 150, "Truck": 300}
         self.rush_extra = {"Car": 50, "Bike": 30, "Truck": 70}
         self.night_rate = 100
+        
+        # LRU of hour counts for live bill previews: arrival hour -> (billed hours, counts)
+        self.quote_cache_size = 1024
+        self._quote_cache: OrderedDict = OrderedDict()
+        self._quote_calendar_version = self.holiday_calendar.version
+        self.quote_cache_stats = {'hits': 0, 'extensions': 0, 'misses': 0}
+    
+    def _read(self, read: Callable):
+        """Run a read without the writer lock, retrying it if a write overlapped"""
+        write_lock = self._write_lock
+        if write_lock.owner == threading.get_ident():
+            return read()
+        
+        for _ in range(self.read_retries):
+            sequence = write_lock.sequence
+            if sequence % 2 == 0:
+                try:
+                    result = read()
+                except (RuntimeError, KeyError, IndexError):
+                    # A container changed under the read; the retry sees the finished write
+                    result = None
+                else:
+                    if write_lock.sequence == sequence:
+                        return result
+            time.sleep(0)
+        
+        with write_lock:
+            return read()
+    
+    def _reset_slots(self):
+        """Mark every slot available and rebuild the free-slot index"""
+        self.slots.reset(list(self._slot_numbers))
+        self._free_slots = FreeSlotIndex(self._slot_numbers.values())
+        self._status_counts = {status: 0 for status in SlotStatus}
+        self._status_counts[SlotStatus.AVAILABLE] = len(self._slot_numbers)
+        self._plate_index = PlateIndex()
+        self._departures = EndTimeIndex()  # occupied slot ids by expected pickup time
+        self.version += 1
+    
+    def _track_departure(self, slot: ParkingSlot):
+        """Keep the expected-pickup index in step with a stored slot"""
+        if slot.status == SlotStatus.OCCUPIED and slot.pickup_time is not None:
+            self._departures.add(slot.slot_id, slot.pickup_time)
+        else:
+            self._departures.remove(slot.slot_id)
+    
+    def _set_slot(self, slot: ParkingSlot):
+        """Store a slot and keep the free-slot index, plate index and status counters in step"""
+        self.version += 1
+        self._status_counts[self.slots.status_of(slot.slot_id)] -= 1
+        self._status_counts[slot.status] += 1
+        self.slots[slot.slot_id] = slot
+        self._plate_index.remove(slot.slot_id)
+        self._plate_index.add(slot.slot_id, slot.vehicle_number)
+        self._track_departure(slot)
+        slot_number = self._slot_numbers[slot.slot_id]
+        if slot.status == SlotStatus.AVAILABLE:
+            self._free_slots.add(slot_number)
+        else:
+            self._free_slots.discard(slot_number)
+    
+    @_writer
+    def restore_slot(self, slot: ParkingSlot):
+        """Put a slot loaded from storage back into the manager"""
+        if slot.slot_id not in self._slot_numbers:
+            raise ValueError(f"Unknown slot {slot.slot_id}")
+        self._set_slot(slot)
+    
+    @_writer
+    def restore_slots(self, slots: List[ParkingSlot]):
+        """Put many stored slots back at once, recounting and rebuilding the free-slot and departure indexes a single time"""
+        departures = self._departures.end_times()
+        for slot in slots:
+            if slot.slot_id not in self._slot_numbers:
+                raise ValueError(f"Unknown slot {slot.slot_id}")
+            self.slots[slot.slot_id] = slot
+            self._plate_index.remove(slot.slot_id)
+            if slot.status == SlotStatus.OCCUPIED and slot.pickup_time is not None:
+                departures[slot.slot_id] = slot.pickup_time
+            else:
+                departures.pop(slot.slot_id, None)
+        
+        self._plate_index.add_many({slot.slot_id: slot.vehicle_number for slot in slots}.items())
+        # One sort instead of a sorted insert per vehicle, which made large loads quadratic
+        self._departures.reset(departures)
+        self.version += 1
+        slot_ids_by_status = {status: self.slots.slot_ids_with_status(status) for status in SlotStatus}
+        self._status_counts = {status: len(slot_ids) for status, slot_ids in slot_ids_by_status.items()}
+        self._free_slots = FreeSlotIndex(
+            self._slot_numbers[slot_id] for slot_id in slot_ids_by_status[SlotStatus.AVAILABLE]
+        )
+    
+    @_writer
+    def replace_state(self, occupied: List[ParkingSlot], reservations: Optional[List[Reservation]] = None,
+                      now: Optional[datetime] = None):
+        """Make the given occupied slots the parked vehicles, e.g. after another process changed the stored lot.
+        
+        Bookings are replaced too when given; otherwise the ones this manager holds are kept.
+        """
+        occupied_ids = {slot.slot_id for slot in occupied}
+        stale_statuses = [SlotStatus.OCCUPIED]
+        if reservations is not None:
+            stale_statuses.append(SlotStatus.RESERVED)
+            self.reservations.clear()
+            self._active_reservations = {}
+            self._blocked_reservations = set()
+            for reservation in reservations:
+                self.reservations.add(reservation)
+        
+        # A held booking whose slot was filled elsewhere waits until the slot is free again
+        for slot_id in occupied_ids & set(self._active_reservations):
+            self._blocked_reservations.add(self._active_reservations.pop(slot_id))
+        
+        freed = [
+            ParkingSlot(slot_id=slot_id, status=SlotStatus.AVAILABLE)
+            for status in stale_statuses
+            for slot_id in self.slots.slot_ids_with_status(status)
+            if slot_id not in occupied_ids
+        ]
+        self.restore_slots(freed + list(occupied))
+        
+        if reservations is not None:
+            self.refresh_reservations(now or datetime.now())
+    
+    def _claim_slot(self, vehicle_type: str, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> Optional[str]:
+        """Pick a free slot: trucks take the highest number, cars and bikes the lowest.
+        
+        When a time range is given, slots with a reservation overlapping it are skipped.
+        """
+        if start is None or not len(self.reservations):
+            if vehicle_type == "Truck":
+                slot_number = self._free_slots.peek_highest()
+            else:
+                slot_number = self._free_slots.peek_lowest()
+        else:
+            def no_conflict(number: int) -> bool:
+                return self.reservations.is_free(f"slot_{number}", start, end)
+            
+            if vehicle_type == "Truck":
+                slot_number = self._free_slots.find_highest(no_conflict)
+            else:
+                slot_number = self._free_slots.find_lowest(no_conflict)
+        return None if slot_number is None else f"slot_{slot_number}"
+    
+    def _taken_between(self, start: datetime, end: datetime) -> Set[str]:
+        """Get the slots with an overlapping reservation or a vehicle expected to stay past start.
+        
+        Both come from indexes sorted by end time, so only bookings and vehicles still
+        running at start are visited, not every slot.
+        """
+        taken = self.reservations.slots_booked_between(start, end)
+        taken.update(self._departures.ending_after(start))
+        return taken
+    
+    @_reader
+    def free_slots_between(self, start: datetime, end: datetime) -> List[str]:
+        """Get the slots that can take a booking from start to end"""
+        taken = self._taken_between(start, end)
+        return [slot_id for slot_id in self._slot_numbers if slot_id not in taken]
+    
+    def _find_slot_between(self, vehicle_type: str, start: datetime, end: datetime) -> Optional[str]:
+        """Pick a slot for a future booking, using the same lowest/highest preference as walk-ins.
+        
+        Free slots are walked in preference order through the free-slot index, skipping
+        those with a clashing booking. The only other slots that can take the booking are
+        held bookings' slots and those whose vehicle is due out by start, so those are
+        checked directly instead of scanning the lot.
+        """
+        def no_conflict(number: int) -> bool:
+            return self.reservations.is_free(f"slot_{number}", start, end)
+        
+        candidates = [
+            self._slot_numbers[slot_id]
+            for slot_ids in (self._departures.ending_by(start), self._active_reservations)
+            for slot_id in slot_ids
+            if self.reservations.is_free(slot_id, start, end)
+        ]
+        if vehicle_type == "Truck":
+            candidates.append(self._free_slots.find_highest(no_conflict))
+            slot_number = max((number for number in candidates if number is not None), default=None)
+        else:
+            candidates.append(self._free_slots.find_lowest(no_conflict))
+            slot_number = min((number for number in candidates if number is not None), default=None)
+        return None if slot_number is None else f"slot_{slot_number}"
+    
+    def _hour_counts(self, arrival_dt: datetime, full_hours: int) -> Tuple[int, int, int]:
+        """Get (standard, rush, night) hours through the quote cache"""
+        if full_hours <= 0:
+            return 0, 0, 0
+        
+        # The cache is shared by every thread that previews or settles a bill
+        with self._quote_lock:
+            if self._quote_calendar_version != self.holiday_calendar.version:
+                self._quote_cache.clear()
+                self._quote_calendar_version = self.holiday_calendar.version
+            
+            # Billing only depends on the hour the stay started in, not the minute
+            arrival_hour = arrival_dt.replace(minute=0, second=0, microsecond=0)
+            cached = self._quote_cache.get(arrival_hour)
+            
+            if cached and cached[0] == full_hours:
+                self.quote_cache_stats['hits'] += 1
+                counts = cached[1]
+            elif cached and cached[0] < full_hours:
+                # Departure moved later: only bill the hours added since the cached quote
+                self.quote_cache_stats['extensions'] += 1
+                cached_hours, cached_counts = cached
+                extra = self.tariff.hour_counts(arrival_hour + timedelta(hours=cached_hours),
+                                                full_hours - cached_hours)
+                counts = tuple(a + b for a, b in zip(cached_counts, extra))
+            else:
+                self.quote_cache_stats['misses'] += 1
+                counts = self.tariff.hour_counts(arrival_hour, full_hours)
+            
+            self._quote_cache[arrival_hour] = (full_hours, counts)
+            self._quote_cache.move_to_end(arrival_hour)
+            if len(self._quote_cache) > self.quote_cache_size:
+                self._quote_cache.popitem(last=False)
+            
+            return counts
     
     def calculate_parking_fee(self, vehicle_type: str, arrival_dt: datetime, departure_dt: datetime) -> Dict:
         """Calculate parking fee using the new datetime-based logic"""
@@ -102,37 +352,9 @@ class ParkingManager:
         full_hours = int(total_seconds // 3600)
         partial_hour = total_seconds % 3600 > 0
 
-        standard_hours = rush_hours = night_hours = 0
-
-        for hour in range(full_hours):
-            current_time = arrival_dt + timedelta(hours=hour)
-            current_date = current_time.date()
-            current_weekday = current_time.strftime("%a")
-            current_hour = current_time.hour
-
-            # Check for holidays
-            holiday = self.holidays[self.holidays['Date'] == pd.Timestamp(current_date)]
-            is_holiday = not holiday.empty
-            
-            if is_holiday:
-                rush_start = datetime.strptime(holiday['Rush Hr From'].values[0], "%H:%M").hour
-                rush_end = datetime.strptime(holiday['Rush Hr To'].values[0], "%H:%M").hour
-                if rush_start <= current_hour < rush_end:
-                    rush_hours += 1
-                    continue
-            else:
-                # Regular rush hours
-                if (current_weekday == "Fri" and current_hour >= 17) or \
-                   (current_weekday in ["Sat", "Sun"] and current_hour >= 11):
-                    rush_hours += 1
-                    continue
+        # Prefix-sum lookup in the compiled tariff instead of walking the hours
+        standard_hours, rush_hours, night_hours = self._hour_counts(arrival_dt, full_hours)
 
-            # Night hours condition (11 PM to 5 AM)
-            if current_hour >= 23 or current_hour < 5:
-                night_hours += 1
-            else:
-                standard_hours += 1
-            
         standard_charge = standard_hours * self.standard_rate[vehicle_type]
         rush_charge = rush_hours * (self.standard_rate[vehicle_type] + self.rush_extra[vehicle_type])
         night_charge = night_hours * self.night_rate
@@ -152,91 +374,165 @@ class ParkingManager:
             'night_charge': night_charge
         }
     
+    def bill_many(self, vehicle_types, arrivals, departures) -> Dict:
+        """Bill many stays at once under the current rates, as per-session NumPy arrays"""
+        return bill_many(
+            vehicle_types, arrivals, departures, self.holiday_calendar,
+            self.standard_rate, self.rush_extra, self.night_rate
+        )
+    
+    @_reader
     def get_available_slots(self) -> List[str]:
         """Get list of available parking slots"""
-        return [slot_id for slot_id, slot in self.slots.items() 
-                if slot.status == SlotStatus.AVAILABLE]
+        return [f"slot_{number}" for number in self._free_slots.sorted_numbers()]
     
+    @_reader
     def get_occupied_slots(self) -> List[str]:
         """Get list of occupied parking slots"""
-        return [slot_id for slot_id, slot in self.slots.items() 
-                if slot.status == SlotStatus.OCCUPIED]
+        return self.slots.slot_ids_with_status(SlotStatus.OCCUPIED)
     
+    @_reader
     def get_reserved_slots(self) -> List[str]:
         """Get list of reserved parking slots"""
-        return [slot_id for slot_id, slot in self.slots.items() 
-                if slot.status == SlotStatus.RESERVED]
+        return self.slots.slot_ids_with_status(SlotStatus.RESERVED)
+    
+    @_reader
+    def get_reservations(self) -> List[Reservation]:
+        """Get every booking that has not ended or been checked in"""
+        return list(self.reservations)
     
+    @_writer
     def park_vehicle(self, vehicle_type: str, vehicle_number: str, 
                     arrival_dt: datetime, pickup_dt: datetime) -> tuple[bool, str]:
         """Park a vehicle using automatic slot assignment"""
-        available_slots = self.get_available_slots()
+        # A vehicle arriving for its active reservation takes the reserved slot
+        slot_id = self._check_in_reservation(vehicle_number)
         
-        if not available_slots:
-            return False, ""
-        
-        # Smart slot assignment logic
-        if vehicle_type == "Truck":
-            # Trucks get the highest available slot number (for larger vehicles)
-            slot_numbers = [int(slot.split('_')[1]) for slot in available_slots]
-            selected_slot_num = max(slot_numbers)
-        else:
-            # Cars and Bikes get the lowest available slot number (efficient space usage)
-            slot_numbers = [int(slot.split('_')[1]) for slot in available_slots]
-            selected_slot_num = min(slot_numbers)
+        # Smart slot assignment: trucks get the highest free slot, cars and bikes the lowest,
+        # skipping slots booked before the expected pickup
+        if slot_id is None:
+            slot_id = self._claim_slot(vehicle_type, arrival_dt, pickup_dt)
         
-        slot_id = f"slot_{selected_slot_num}"
+        if slot_id is None:
+            return False, ""
         
-        self.slots[slot_id] = ParkingSlot(
+        self._set_slot(ParkingSlot(
             slot_id=slot_id,
             status=SlotStatus.OCCUPIED,
             vehicle_type=vehicle_type,
             vehicle_number=vehicle_number.upper(),
             arrival_time=arrival_dt,
             pickup_time=pickup_dt
-        )
+        ))
         
         return True, slot_id
     
+    @_writer
     def reserve_slot(self, vehicle_type: str, vehicle_number: str, 
-                    reservation_dt: datetime, duration_hours: int) -> tuple[bool, str]:
-        """Reserve a parking slot using automatic slot assignment"""
-        available_slots = self.get_available_slots()
-        
-        if not available_slots:
-            return False, ""
+                    reservation_dt: datetime, duration_hours: int,
+                    now: Optional[datetime] = None) -> tuple[bool, str]:
+        """Book a slot for a time window; the slot is only held as RESERVED once the window starts"""
+        now = now or datetime.now()
+        self.refresh_reservations(now)
+        pickup_dt = reservation_dt + timedelta(hours=duration_hours)
         
         # Smart slot assignment logic (same as park_vehicle)
-        if vehicle_type == "Truck":
-            # Trucks get the highest available slot number
-            slot_numbers = [int(slot.split('_')[1]) for slot in available_slots]
-            selected_slot_num = max(slot_numbers)
+        if reservation_dt <= now:
+            # Booking starts now, so it needs a slot that is free right away
+            slot_id = self._claim_slot(vehicle_type, reservation_dt, pickup_dt)
         else:
-            # Cars and Bikes get the lowest available slot number
-            slot_numbers = [int(slot.split('_')[1]) for slot in available_slots]
-            selected_slot_num = min(slot_numbers)
+            slot_id = self._find_slot_between(vehicle_type, reservation_dt, pickup_dt)
         
-        slot_id = f"slot_{selected_slot_num}"
-        pickup_dt = reservation_dt + timedelta(hours=duration_hours)
+        if slot_id is None:
+            return False, ""
         
-        self.slots[slot_id] = ParkingSlot(
+        self.reservations.add(Reservation(
+            id=str(uuid.uuid4()),
             slot_id=slot_id,
-            status=SlotStatus.RESERVED,
             vehicle_type=vehicle_type,
             vehicle_number=vehicle_number.upper(),
-            pickup_time=pickup_dt,
-            reservation_time=reservation_dt
-        )
+            start_time=reservation_dt,
+            end_time=pickup_dt
+        ))
+        self.refresh_reservations(now)
         
         return True, slot_id
     
+    @_writer
+    def refresh_reservations(self, now: datetime):
+        """Hold slots whose booking window has started and release bookings that have ended"""
+        for reservation in self.reservations.pop_expired(now):
+            self._blocked_reservations.discard(reservation.id)
+            if self._active_reservations.get(reservation.slot_id) == reservation.id:
+                del self._active_reservations[reservation.slot_id]
+                self._set_slot(ParkingSlot(slot_id=reservation.slot_id, status=SlotStatus.AVAILABLE))
+        
+        # Bookings whose slot was still occupied when they started are retried each refresh
+        started = self.reservations.pop_started(now)
+        started += [self.reservations.get(i) for i in self._blocked_reservations]
+        self._blocked_reservations = set()
+        
+        for reservation in started:
+            if reservation is None or self.reservations.get(reservation.id) is None:
+                continue
+            if self._active_reservations.get(reservation.slot_id) == reservation.id:
+                continue
+            if self.slots.status_of(reservation.slot_id) != SlotStatus.AVAILABLE:
+                self._blocked_reservations.add(reservation.id)
+                continue
+            
+            self._active_reservations[reservation.slot_id] = reservation.id
+            self._set_slot(ParkingSlot(
+                slot_id=reservation.slot_id,
+                status=SlotStatus.RESERVED,
+                vehicle_type=reservation.vehicle_type,
+                vehicle_number=reservation.vehicle_number,
+                pickup_time=reservation.end_time,
+                reservation_time=reservation.start_time
+            ))
+    
+    @_writer
+    def cancel_reservation(self, reservation_id: str) -> bool:
+        """Cancel a booking, releasing its slot if the booking is currently held"""
+        reservation = self.reservations.remove(reservation_id)
+        if reservation is None:
+            return False
+        
+        self._blocked_reservations.discard(reservation_id)
+        if self._active_reservations.get(reservation.slot_id) == reservation_id:
+            del self._active_reservations[reservation.slot_id]
+            self._set_slot(ParkingSlot(slot_id=reservation.slot_id, status=SlotStatus.AVAILABLE))
+        return True
+    
+    def _check_in_reservation(self, vehicle_number: str) -> Optional[str]:
+        """Consume the started reservation of an arriving vehicle, returning its slot if it is held.
+        
+        A booking still blocked by an overstaying vehicle is consumed too; the
+        arriving vehicle then takes another slot.
+        """
+        for slot_id in self.find_slots_by_plate(vehicle_number):
+            reservation_id = self._active_reservations.get(slot_id)
+            if reservation_id is not None:
+                del self._active_reservations[slot_id]
+                self.reservations.remove(reservation_id)
+                return slot_id
+        
+        for reservation_id in list(self._blocked_reservations):
+            reservation = self.reservations.get(reservation_id)
+            if reservation is not None and reservation.vehicle_number == vehicle_number.upper():
+                self._blocked_reservations.discard(reservation_id)
+                self.reservations.remove(reservation_id)
+                break
+        return None
+    
     def remove_vehicle(self, slot_id: str, departure_dt: datetime) -> Optional[Dict]:
         """Remove a vehicle and generate bill"""
-        if slot_id not in self.slots or self.slots[slot_id].status != SlotStatus.OCCUPIED:
+        slot = self._read(lambda: self.slots.get(slot_id))
+        if slot is None or slot.status != SlotStatus.OCCUPIED:
             return None
         
-        slot = self.slots[slot_id]
-        
+        # The bill is computed outside the writer lock, then the slot is freed only if it
+        # still holds the same vehicle, so two gates cannot settle one stay twice
         bill_data = self.calculate_parking_fee(
             slot.vehicle_type,
             slot.arrival_time,
@@ -254,35 +550,99 @@ class ParkingManager:
             timestamp=datetime.now()
         )
         
-        self.transactions.append(transaction)
-        self.total_revenue += bill_data['total_cost']
+        with self._write_lock:
+            # Clear the slot
+            if not self._compare_and_set(slot, ParkingSlot(slot_id=slot_id, status=SlotStatus.AVAILABLE)):
+                return None
+            self._record_transaction(transaction)
         
-        # Clear the slot
-        self.slots[slot_id] = ParkingSlot(
-            slot_id=slot_id,
-            status=SlotStatus.AVAILABLE
+        return {**bill_data, **asdict(transaction)}
+    
+    @_writer
+    def compare_and_set_slot(self, expected: ParkingSlot, slot: ParkingSlot) -> bool:
+        """Atomically replace a slot's state, but only if it still equals expected"""
+        if slot.slot_id != expected.slot_id:
+            raise ValueError(f"Cannot replace {expected.slot_id} with the state of {slot.slot_id}")
+        return self._compare_and_set(expected, slot)
+    
+    def _compare_and_set(self, expected: ParkingSlot, slot: ParkingSlot) -> bool:
+        if self.slots.get(expected.slot_id) != expected:
+            return False
+        self._set_slot(slot)
+        return True
+    
+    @_writer
+    def restore_transaction(self, transaction: Transaction):
+        """Add a completed transaction to the history and revenue totals"""
+        self._record_transaction(transaction)
+    
+    def _record_transaction(self, transaction: Transaction):
+        self.transactions.append(transaction)
+        self._transaction_plates.add(len(self.transactions) - 1, transaction.vehicle_number)
+        self.total_revenue += transaction.amount
+        self.revenue_by_type[transaction.vehicle_type] = (
+            self.revenue_by_type.get(transaction.vehicle_type, 0.0) + transaction.amount
         )
+    
+    @_writer
+    def restore_history(self, total_revenue: float, revenue_by_type: Dict[str, float],
+                        transaction_count: int, recent: List[Transaction]):
+        """Restore revenue totals from a checkpoint, keeping only the recent transactions in memory"""
+        self.transactions = []
+        self._transaction_plates.clear()
+        self.total_revenue = 0.0
+        self.revenue_by_type = {}
+        for transaction in recent:
+            self._record_transaction(transaction)
         
-        return {**bill_data, **asdict(transaction)}
+        self._earlier_revenue = total_revenue - self.total_revenue
+        self._earlier_transactions = transaction_count - len(recent)
+        self.total_revenue = total_revenue
+        self.revenue_by_type = dict(revenue_by_type)
     
+    @_reader
     def search_vehicle(self, query: str) -> List[Tuple[str, ParkingSlot]]:
-        """Search for vehicle by number"""
-        results = []
-        for slot_id, slot in self.slots.items():
-            if (slot.vehicle_number and 
-                query.upper() in slot.vehicle_number.upper()):
-                results.append((slot_id, slot))
-        return results
+        """Search for vehicle by number (substring match through the plate index)"""
+        slot_ids = sorted(self._plate_index.search(query), key=self._slot_numbers.get)
+        return [(slot_id, self.slots[slot_id]) for slot_id in slot_ids]
+    
+    @_reader
+    def find_slots_by_plate(self, vehicle_number: str) -> List[str]:
+        """Get the slots holding exactly this vehicle number"""
+        return sorted(self._plate_index.exact(vehicle_number), key=self._slot_numbers.get)
+    
+    @_reader
+    def search_transactions(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Search the transaction history by vehicle number, most recent departure first"""
+        matches = sorted(
+            (self.transactions[i] for i in self._transaction_plates.search(query)),
+            key=lambda x: x.departure_time,
+            reverse=True
+        )
+        return [asdict(t) for t in matches[:limit]]
+    
+    @_reader
+    def get_running_charges(self, as_of: datetime) -> Dict[str, Dict]:
+        """Get the current bill of every occupied slot as of the given time"""
+        running_charges = {}
+        for slot_id in self.get_occupied_slots():
+            slot = self.slots[slot_id]
+            running_charges[slot_id] = self.calculate_parking_fee(slot.vehicle_type, slot.arrival_time, as_of)
+        return running_charges
     
     def get_slot_data(self, slot_id: str) -> Optional[ParkingSlot]:
         """Get slot data"""
         return self.slots.get(slot_id)
     
+    @_reader
     def get_statistics(self) -> Dict:
-        """Get parking statistics"""
-        available_count = len(self.get_available_slots())
-        occupied_count = len(self.get_occupied_slots())
-        reserved_count = len(self.get_reserved_slots())
+        """Get parking statistics from the running counters"""
+        if self.debug:
+            self._verify_counters()
+        
+        available_count = self._status_counts[SlotStatus.AVAILABLE]
+        occupied_count = self._status_counts[SlotStatus.OCCUPIED]
+        reserved_count = self._status_counts[SlotStatus.RESERVED]
         occupancy_rate = (occupied_count / self.total_slots) * 100
         
         return {
@@ -292,30 +652,153 @@ class ParkingManager:
             'reserved_count': reserved_count,
             'occupancy_rate': round(occupancy_rate, 1),
             'total_revenue': self.total_revenue,
-            'total_transactions': len(self.transactions)
+            'revenue_by_type': dict(self.revenue_by_type),
+            'total_transactions': self._earlier_transactions + len(self.transactions)
         }
     
+    def _verify_counters(self):
+        """Check the running counters against a full scan of the slots (debug mode)"""
+        scanned = {status: 0 for status in SlotStatus}
+        for slot_id in self.slots:
+            scanned[self.slots.status_of(slot_id)] += 1
+        
+        scanned_revenue = self._earlier_revenue + sum(t.amount for t in self.transactions)
+        
+        if scanned != self._status_counts or len(self._free_slots) != scanned[SlotStatus.AVAILABLE]:
+            raise RuntimeError(f"Slot counters out of sync: counted {self._status_counts}, scanned {scanned}")
+        if abs(scanned_revenue - self.total_revenue) > 0.01:
+            raise RuntimeError(f"Revenue out of sync: counted {self.total_revenue}, scanned {scanned_revenue}")
+    
+    @_reader
     def get_recent_transactions(self, limit: int = 10) -> List[Dict]:
         """Get recent transactions"""
-        sorted_transactions = sorted(
-            self.transactions,
-            key=lambda x: x.departure_time,
-            reverse=True
-        )
+        # Partial selection instead of sorting the whole history on every call
+        recent_transactions = heapq.nlargest(limit, self.transactions, key=lambda x: x.departure_time)
         
-        return [asdict(t) for t in sorted_transactions[:limit]]
+        return [asdict(t) for t in recent_transactions]
     
+    @_writer
     def clear_all_data(self):
         """Clear all parking data (admin function)"""
-        for i in range(1, self.total_slots + 1):
-            slot_id = f"slot_{i}"
-            self.slots[slot_id] = ParkingSlot(
-                slot_id=slot_id,
-                status=SlotStatus.AVAILABLE
-            )
+        self._reset_slots()
+        self.reservations.clear()
+        self._active_reservations = {}
+        self._blocked_reservations = set()
         
         self.transactions = []
+        self._transaction_plates.clear()
         self.total_revenue = 0.0
+        self.revenue_by_type = {}
+        self._earlier_revenue = 0.0
+        self._earlier_transactions = 0
+
+def benchmark_concurrency(num_threads: int = 8, operations_per_thread: int = 5000,
+                          total_slots: int = 200, num_readers: int = 2) -> Dict:
+    """Hammer one ParkingManager with park/remove from num_threads gates while dashboard threads read.
+    
+    Each gate records the slots it was given and only removes its own vehicles;
+    a slot handed to two gates at once counts as a double booking. The thread
+    switch interval is shortened for the run so the threads interleave often.
+    """
+    import random
+    import sys
+    
+    manager = ParkingManager(total_slots)
+    arrival = datetime(2025, 1, 6, 8, 0)
+    holders: Dict[str, int] = {}
+    held: List[List[str]] = [[] for _ in range(num_threads)]
+    billed = [0.0] * num_threads
+    removals = [0] * num_threads
+    reads = [0] * num_readers
+    double_bookings = []
+    errors = []
+    stop = threading.Event()
+    
+    def gate(gate_id: int):
+        rng = random.Random(gate_id)
+        mine = held[gate_id]
+        try:
+            for i in range(operations_per_thread):
+                if mine and (len(mine) >= total_slots // num_threads or rng.random() < 0.5):
+                    slot_id = mine.pop(rng.randrange(len(mine)))
+                    del holders[slot_id]
+                    bill = manager.remove_vehicle(slot_id, arrival + timedelta(hours=rng.randint(1, 12)))
+                    if bill is None:
+                        errors.append(f"gate {gate_id} could not remove its vehicle from {slot_id}")
+                        continue
+                    billed[gate_id] += bill['total_cost']
+                    removals[gate_id] += 1
+                else:
+                    success, slot_id = manager.park_vehicle(
+                        rng.choice(("Car", "Bike", "Truck")), f"G{gate_id}N{i}",
+                        arrival, arrival + timedelta(hours=2)
+                    )
+                    if success:
+                        if holders.setdefault(slot_id, gate_id) != gate_id:
+                            double_bookings.append(slot_id)
+                        mine.append(slot_id)
+        except Exception as e:
+            errors.append(f"gate {gate_id}: {e!r}")
+    
+    def dashboard(reader_id: int):
+        try:
+            while not stop.is_set():
+                stats = manager.get_statistics()
+                if stats['available_count'] + stats['occupied_count'] != total_slots:
+                    errors.append(f"torn statistics read: {stats}")
+                manager.get_available_slots()
+                reads[reader_id] += 1
+        except Exception as e:
+            errors.append(f"reader {reader_id}: {e!r}")
+    
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        readers = [threading.Thread(target=dashboard, args=(i,)) for i in range(num_readers)]
+        gates = [threading.Thread(target=gate, args=(i,)) for i in range(num_threads)]
+        start = time.perf_counter()
+        for thread in readers + gates:
+            thread.start()
+        for thread in gates:
+            thread.join()
+        seconds = time.perf_counter() - start
+        stop.set()
+        for thread in readers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    
+    # Whatever the interleaving, the lot must agree with what the gates were told
+    still_parked = sorted(slot_id for slot_ids in held for slot_id in slot_ids)
+    try:
+        manager._verify_counters()
+    except RuntimeError as e:
+        errors.append(str(e))
+    consistent = (
+        not errors
+        and sorted(manager.get_occupied_slots()) == still_parked
+        and len(manager.transactions) == sum(removals)
+        and abs(manager.total_revenue - sum(billed)) < 0.01
+    )
+    
+    operations = num_threads * operations_per_thread
+    return {
+        'threads': num_threads,
+        'operations': operations,
+        'seconds': seconds,
+        'operations_per_second': operations / seconds,
+        'reads_per_second': sum(reads) / seconds,
+        'double_bookings': len(double_bookings),
+        'consistent': consistent,
+        'errors': errors[:5]
+    }
 
 # Global instance
 parking_manager = ParkingManager()
+
+if __name__ == "__main__":
+    result = benchmark_concurrency()
+    print(f"{result['operations']} park/remove operations from {result['threads']} threads in "
+          f"{result['seconds']:.2f} s ({result['operations_per_second']:.0f} ops/s, "
+          f"{result['reads_per_second']:.0f} dashboard reads/s); double bookings: {result['double_bookings']}, "
+          f"consistent: {result['consistent']}")
@@ -1,28 +1,49 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 import pandas as pd
 import os
+from holiday_calendar import holiday_calendar
+from state_lock import StateLock
+from tariff import CompiledTariff
 
 class ParkingSystem:
     def __init__(self, filename):
         self.filename = filename
-        self.holidays = pd.read_csv("West_Bengal_Holidays_2025.csv")
-        self.holidays['Date'] = pd.to_datetime(self.holidays['Date'], format='%d-%m-%Y')
+        self.holiday_calendar = holiday_calendar
+        self.tariff = CompiledTariff(holiday_calendar)
         
-        expected_columns = [
+        self.expected_columns = [
             "Slot", "VehicleType", "VehicleNumber", "ArrivalDate", 
             "ArrivalTime", "ExpectedPickupDate", "ExpectedPickupTime", 
             "Weekday", "Charge"
         ]
         
-        try:
-            self.df = pd.read_csv(filename)
-            self.df = self.df.reindex(columns=expected_columns)
-        except FileNotFoundError:
-            self.df = pd.DataFrame(columns=expected_columns)
-            # Initialize with 20 slots
-            for i in range(1, 21):
-                self.df.loc[i-1] = [i, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, 0.0]
-        self.df.to_csv(filename, index=False)
+        # Same lock and state version as the web app's CSVDataManager(shared=True)
+        self.state_lock = StateLock(filename + ".lock")
+        self.version = -1
+        
+        with self.state_lock.exclusive():
+            try:
+                self.df = pd.read_csv(filename)
+                self.df = self.df.reindex(columns=self.expected_columns)
+            except FileNotFoundError:
+                self.df = pd.DataFrame(columns=self.expected_columns)
+                # Initialize with 20 slots
+                for i in range(1, 21):
+                    self.df.loc[i-1] = [i, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, 0.0]
+            self._save()
+    
+    def _reload_if_changed(self):
+        """Re-read the CSV if another process changed it since we last read or wrote it"""
+        if self.state_lock.version == self.version:
+            return
+        with self.state_lock.shared():
+            self.version = self.state_lock.version
+            self.df = pd.read_csv(self.filename).reindex(columns=self.expected_columns)
+    
+    def _save(self):
+        """Write the CSV and tell other processes it changed; call while holding the exclusive lock"""
+        self.df.to_csv(self.filename, index=False)
+        self.version = self.state_lock.bump()
 
     def park_vehicle(self):
         print("\nEnter vehicle details:")
@@ -38,22 +59,26 @@ class ParkingSystem:
         arrival_datetime = datetime.strptime(f"{arrival_date} {arrival_time}", "%d-%m-%y %H:%M")
         weekday = arrival_datetime.strftime("%a")
 
-        empty_slots = self.df[self.df["VehicleType"].isna()]
-        if empty_slots.empty:
-            print("No available slots!")
-            return
-        
-        slot_index = empty_slots['Slot'].idxmax() if vehicle_type == "Truck" else empty_slots['Slot'].idxmin()
+        # Pick the slot under the lock, from the latest state, so no other process takes it meanwhile
+        with self.state_lock.exclusive():
+            self._reload_if_changed()
+            empty_slots = self.df[self.df["VehicleType"].isna()]
+            if empty_slots.empty:
+                print("No available slots!")
+                return
+            
+            slot_index = empty_slots['Slot'].idxmax() if vehicle_type == "Truck" else empty_slots['Slot'].idxmin()
 
-        self.df.loc[slot_index] = [
-            slot_index + 1, vehicle_type, vehicle_number, arrival_date, arrival_time,
-            expected_pickup_date, expected_pickup_time, weekday, 0.0
-        ]
-        self.df.to_csv(self.filename, index=False)
+            self.df.loc[slot_index] = [
+                slot_index + 1, vehicle_type, vehicle_number, arrival_date, arrival_time,
+                expected_pickup_date, expected_pickup_time, weekday, 0.0
+            ]
+            self._save()
         print(f"Vehicle parked at slot {slot_index + 1}")
 
     def remove_vehicle(self):
         slot = int(input("Enter slot number to remove vehicle from:  ")) - 1
+        self._reload_if_changed()
         if slot < 0 or slot >= len(self.df):
             print("Invalid slot number!")
             return
@@ -66,12 +91,22 @@ class ParkingSystem:
             current_time = input("Enter current time (HH:MM):  ").strip()
             current = datetime.strptime(f"{current_date} {current_time}", "%d-%m-%y %H:%M")
             
+            # The vehicle may have been removed elsewhere while the time was being entered
             vehicle_type = self.df.loc[slot, "VehicleType"]
+            vehicle_number = self.df.loc[slot, "VehicleNumber"]
+            with self.state_lock.exclusive():
+                self._reload_if_changed()
+                if self.df.loc[slot, "VehicleNumber"] != vehicle_number:
+                    print("Slot changed in the meantime, please try again!")
+                    return
+                self.df.loc[slot] = [slot + 1] + [pd.NA]*(len(self.df.columns)-1)
+                self._save()
+            
             charge_info = self.calculate_charge(arrival, current, vehicle_type)
             
             print("\n========== BILL ==========")
             print(f"Vehicle Type: {vehicle_type}")
-            print(f"Vehicle Number: {self.df.loc[slot, 'VehicleNumber']}")
+            print(f"Vehicle Number: {vehicle_number}")
             print(f"Arrival: {arrival_str}")
             print(f"Departure: {current.strftime('%d-%m-%y %H:%M')}")
             print(f"Total Hours: {charge_info['hours_parked']:.1f}")
@@ -83,10 +118,6 @@ class ParkingSystem:
             print("--------------------------")
             print(f"TOTAL CHARGE: Rs.{charge_info['total']:.2f}")
             print("==========================\n")
-            
-            self.df.loc[slot, "Charge"] = charge_info['total']
-            self.df.loc[slot] = [slot + 1] + [pd.NA]*(len(self.df.columns)-1)
-            self.df.to_csv(self.filename, index=False)
         else:
             print("Slot is already empty!")
 
@@ -100,36 +131,7 @@ class ParkingSystem:
         full_hours = int(total_seconds // 3600)
         partial_hour = total_seconds % 3600 > 0
 
-        standard_hours = rush_hours = night_hours = 0
-
-        for hour in range(full_hours):
-            current_time = arrival + timedelta(hours=hour)
-            current_date = current_time.date()
-            current_weekday = current_time.strftime("%a")
-            current_hour = current_time.hour
-
-            # Check for holidays
-            holiday = self.holidays[self.holidays['Date'] == pd.Timestamp(current_date)]
-            is_holiday = not holiday.empty
-            
-            if is_holiday:
-                rush_start = datetime.strptime(holiday['Rush Hr From'].values[0], "%H:%M").hour
-                rush_end = datetime.strptime(holiday['Rush Hr To'].values[0], "%H:%M").hour
-                if rush_start <= current_hour < rush_end:
-                    rush_hours += 1
-                    continue
-            else:
-                # Regular rush hours
-                if (current_weekday == "Fri" and current_hour >= 17) or \
-                   (current_weekday in ["Sat", "Sun"] and current_hour >= 11):
-                    rush_hours += 1
-                    continue
-
-            # Updated night hours condition (11 PM to 5 AM)
-            if current_hour >= 23 or current_hour < 5:
-                night_hours += 1
-            else:
-                standard_hours += 1
+        standard_hours, rush_hours, night_hours = self.tariff.hour_counts(arrival, full_hours)
 
         standard_charge = standard_hours * standard_rate[vehicle_type]
         rush_charge = rush_hours * (standard_rate[vehicle_type] + rush_extra[vehicle_type])
@@ -148,6 +150,7 @@ class ParkingSystem:
         }
 
     def view_status(self):
+        self._reload_if_changed()
         print("\nParking Status:")
         print(self.df.fillna("").to_string(index=False))
 
@@ -0,0 +1,52 @@
+import os
+import threading
+from dataclasses import asdict
+from datetime import datetime
+from typing import Iterable, List
+from reservations import Reservation
+from slot_journal import decode_record, encode_record
+
+class ReservationFile:
+    """Bookings saved next to the lot's slot storage, one checksummed line per booking.
+
+    Bookings change rarely, so every save rewrites the whole file (temp file +
+    rename); a crash leaves either the old or the new set. Lines that are torn
+    or corrupt are skipped on load with a warning.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def load(self) -> List[Reservation]:
+        if not os.path.exists(self.filename):
+            return []
+
+        reservations = []
+        skipped = 0
+        with open(self.filename, "r", encoding="utf-8") as f:
+            for line in f:
+                record = decode_record(line)
+                try:
+                    record['start_time'] = datetime.fromisoformat(record['start_time'])
+                    record['end_time'] = datetime.fromisoformat(record['end_time'])
+                    reservations.append(Reservation(**record))
+                except (KeyError, TypeError, ValueError):
+                    skipped += 1
+        if skipped:
+            print(f"Warning: Skipped {skipped} unreadable bookings in {self.filename}")
+        return reservations
+
+    def save(self, reservations: Iterable[Reservation]):
+        """Replace the stored bookings with the given ones"""
+        with self._lock:
+            temp_filename = self.filename + ".tmp"
+            with open(temp_filename, "w", encoding="utf-8") as f:
+                for reservation in reservations:
+                    record = asdict(reservation)
+                    record['start_time'] = reservation.start_time.isoformat()
+                    record['end_time'] = reservation.end_time.isoformat()
+                    f.write(encode_record(record))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_filename, self.filename)
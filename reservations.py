@@ -0,0 +1,195 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Set
+
+@dataclass
+class Reservation:
+    id: str
+    slot_id: str
+    vehicle_type: str
+    vehicle_number: str
+    start_time: datetime
+    end_time: datetime
+
+class SlotTimeline:
+    """Non-overlapping reservations of one slot, kept sorted by start time"""
+
+    def __init__(self):
+        self._starts: List[datetime] = []
+        self._reservations: List[Reservation] = []
+
+    def __len__(self) -> int:
+        return len(self._reservations)
+
+    def __iter__(self):
+        return iter(self._reservations)
+
+    def conflicts(self, start: datetime, end: datetime) -> bool:
+        """Check whether [start, end) overlaps any reservation in O(log n)"""
+        # Intervals never overlap, so the last one starting before `end` also ends last
+        i = bisect_left(self._starts, end)
+        return i > 0 and self._reservations[i - 1].end_time > start
+
+    def active_at(self, moment: datetime) -> Optional[Reservation]:
+        """Get the reservation covering a moment, if any"""
+        i = bisect_right(self._starts, moment)
+        if i > 0 and self._reservations[i - 1].end_time > moment:
+            return self._reservations[i - 1]
+        return None
+
+    def add(self, reservation: Reservation):
+        i = bisect_right(self._starts, reservation.start_time)
+        self._starts.insert(i, reservation.start_time)
+        self._reservations.insert(i, reservation)
+
+    def remove(self, reservation: Reservation):
+        i = bisect_left(self._starts, reservation.start_time)
+        while i < len(self._reservations) and self._reservations[i].id != reservation.id:
+            i += 1
+        if i < len(self._reservations):
+            del self._starts[i]
+            del self._reservations[i]
+
+class EndTimeIndex:
+    """Keys kept sorted by an end time, to find the ones still running after a moment"""
+
+    def __init__(self):
+        self._ends: List[datetime] = []
+        self._keys: List[Hashable] = []
+        self._end_of: Dict[Hashable, datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: Hashable, end: datetime):
+        """Set a key's end time, replacing any earlier one"""
+        self.remove(key)
+        i = bisect_right(self._ends, end)
+        self._ends.insert(i, end)
+        self._keys.insert(i, key)
+        self._end_of[key] = end
+
+    def remove(self, key: Hashable):
+        end = self._end_of.pop(key, None)
+        if end is None:
+            return
+        i = bisect_left(self._ends, end)
+        while self._keys[i] != key:
+            i += 1
+        del self._ends[i]
+        del self._keys[i]
+
+    def end_times(self) -> Dict[Hashable, datetime]:
+        """Get a copy of every key's end time"""
+        return dict(self._end_of)
+
+    def reset(self, end_of: Dict[Hashable, datetime]):
+        """Replace the contents with the given end times, sorting them once instead of inserting one by one"""
+        entries = sorted(end_of.items(), key=lambda entry: entry[1])
+        self._ends = [end for _, end in entries]
+        self._keys = [key for key, _ in entries]
+        self._end_of = dict(end_of)
+
+    def ending_after(self, moment: datetime) -> List[Hashable]:
+        """Get the keys whose end time is later than moment, in O(log n + k)"""
+        return self._keys[bisect_right(self._ends, moment):]
+
+    def ending_by(self, moment: datetime) -> List[Hashable]:
+        """Get the keys whose end time is at or before moment, in O(log n + k)"""
+        return self._keys[:bisect_right(self._ends, moment)]
+
+    def clear(self):
+        self._ends.clear()
+        self._keys.clear()
+        self._end_of.clear()
+
+class ReservationBook:
+    """Per-slot reservation timelines plus start/end queues for activating and expiring bookings"""
+
+    def __init__(self):
+        self._timelines: Dict[str, SlotTimeline] = {}
+        self._by_id: Dict[str, Reservation] = {}
+        self._pending_starts: List = []  # heap of (start_time, id)
+        self._pending_ends: List = []  # heap of (end_time, id)
+        self._by_end = EndTimeIndex()  # reservation ids by end time, for availability queries
+        self.version = 0  # bumped on every change so stores know when to save
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def get(self, reservation_id: str) -> Optional[Reservation]:
+        return self._by_id.get(reservation_id)
+
+    def is_free(self, slot_id: str, start: datetime, end: datetime) -> bool:
+        """Check whether a slot has no reservation overlapping [start, end)"""
+        timeline = self._timelines.get(slot_id)
+        return timeline is None or not timeline.conflicts(start, end)
+
+    def slots_booked_between(self, start: datetime, end: datetime) -> Set[str]:
+        """Get the slots with a reservation overlapping [start, end), without visiting every slot"""
+        booked = set()
+        for reservation_id in self._by_end.ending_after(start):
+            reservation = self._by_id[reservation_id]
+            if reservation.start_time < end:
+                booked.add(reservation.slot_id)
+        return booked
+
+    def active_at(self, slot_id: str, moment: datetime) -> Optional[Reservation]:
+        timeline = self._timelines.get(slot_id)
+        return timeline.active_at(moment) if timeline else None
+
+    def reservations_for(self, slot_id: str) -> List[Reservation]:
+        return list(self._timelines.get(slot_id, ()))
+
+    def add(self, reservation: Reservation):
+        self._timelines.setdefault(reservation.slot_id, SlotTimeline()).add(reservation)
+        self._by_id[reservation.id] = reservation
+        self._by_end.add(reservation.id, reservation.end_time)
+        self.version += 1
+        heapq.heappush(self._pending_starts, (reservation.start_time, reservation.id))
+        heapq.heappush(self._pending_ends, (reservation.end_time, reservation.id))
+
+    def remove(self, reservation_id: str) -> Optional[Reservation]:
+        """Drop a reservation; stale queue entries are skipped when popped"""
+        reservation = self._by_id.pop(reservation_id, None)
+        if reservation is None:
+            return None
+        self._by_end.remove(reservation_id)
+        self.version += 1
+        timeline = self._timelines[reservation.slot_id]
+        timeline.remove(reservation)
+        if not len(timeline):
+            del self._timelines[reservation.slot_id]
+        return reservation
+
+    def pop_started(self, now: datetime) -> List[Reservation]:
+        """Get reservations whose start time has been reached since the last call"""
+        started = []
+        while self._pending_starts and self._pending_starts[0][0] <= now:
+            _, reservation_id = heapq.heappop(self._pending_starts)
+            if reservation_id in self._by_id:
+                started.append(self._by_id[reservation_id])
+        return started
+
+    def pop_expired(self, now: datetime) -> List[Reservation]:
+        """Remove and return reservations whose end time has passed"""
+        expired = []
+        while self._pending_ends and self._pending_ends[0][0] <= now:
+            _, reservation_id = heapq.heappop(self._pending_ends)
+            reservation = self.remove(reservation_id)
+            if reservation is not None:
+                expired.append(reservation)
+        return expired
+
+    def clear(self):
+        self._timelines.clear()
+        self._by_id.clear()
+        self._pending_starts.clear()
+        self._pending_ends.clear()
+        self._by_end.clear()
+        self.version += 1
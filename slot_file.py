@@ -0,0 +1,166 @@
+import mmap
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from slot_store import NO_TIME, STATUS_CODES, STATUSES, ParkingSlot, SlotStatus
+
+# File layout: a 32-byte header followed by one fixed-width record per slot
+MAGIC = b"SLOTMAP1"
+HEADER = struct.Struct("<8sIIQ")  # magic, slot count, record size, state version
+HEADER_SIZE = 32
+VERSION_OFFSET = 16
+
+RECORD = struct.Struct("<BB20sqqqdI")  # status, type, plate, arrival, pickup, reservation, charge, crc
+RECORD_PLATE_BYTES = 20
+RECORD_DTYPE = np.dtype([
+    ('status', 'u1'), ('vehicle_type', 'u1'), ('plate', 'S20'),
+    ('arrival', '<i8'), ('pickup', '<i8'), ('reservation', '<i8'),
+    ('charge', '<f8'), ('crc', '<u4')
+])
+
+VEHICLE_TYPES: List[Optional[str]] = [None, "Car", "Bike", "Truck"]
+VEHICLE_TYPE_CODES: Dict[Optional[str], int] = {name: i for i, name in enumerate(VEHICLE_TYPES)}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _to_epoch(value: Optional[datetime]) -> int:
+    return NO_TIME if value is None else (value - _EPOCH) // _MICROSECOND
+
+def _from_epoch(value: int) -> Optional[datetime]:
+    return None if value == NO_TIME else _EPOCH + timedelta(microseconds=int(value))
+
+def check_vehicle(vehicle_type: Optional[str], vehicle_number: Optional[str]):
+    """Raise ValueError if a vehicle cannot be stored in a slot record"""
+    if len((vehicle_number or "").encode("utf-8")) > RECORD_PLATE_BYTES:
+        raise ValueError(f"Vehicle number {vehicle_number!r} is too long for the slot file")
+    if vehicle_type not in VEHICLE_TYPE_CODES:
+        raise ValueError(f"Unknown vehicle type {vehicle_type!r}")
+
+class MappedSlotFile:
+    """Slot state as fixed-width binary records in a memory-mapped file.
+
+    Slot n lives at a fixed offset, so parking or removing a vehicle rewrites
+    only that record's bytes in place. Each record carries a CRC32 so a
+    reader catching a half-written record can tell, and the header holds a
+    state version bumped on every write. Other processes can map the same
+    file read-only and read slots, or all slots at once as a NumPy array,
+    without parsing anything.
+    """
+
+    def __init__(self, filename: str, total_slots: Optional[int] = None, readonly: bool = False):
+        self.filename = filename
+        self.readonly = readonly
+
+        if not os.path.exists(filename):
+            if readonly or total_slots is None:
+                raise FileNotFoundError(f"Slot file {filename} not found")
+            self._create(filename, total_slots)
+
+        self._file = open(filename, "rb" if readonly else "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE)
+
+        magic, self.total_slots, record_size, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"{filename} is not a slot state file")
+        if total_slots is not None and total_slots != self.total_slots:
+            self.close()
+            raise ValueError(f"{filename} holds {self.total_slots} slots, expected {total_slots}")
+
+    @staticmethod
+    def _create(filename: str, total_slots: int):
+        """Write a new file with every slot available"""
+        empty = RECORD.pack(STATUS_CODES[SlotStatus.AVAILABLE], 0, b"", NO_TIME, NO_TIME, NO_TIME, 0.0, 0)
+        empty = empty[:-4] + struct.pack("<I", zlib.crc32(empty[:-4]))
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, "wb") as f:
+            f.write(HEADER.pack(MAGIC, total_slots, RECORD.size, 0).ljust(HEADER_SIZE, b"\0"))
+            f.write(empty * total_slots)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, filename)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _offset(self, slot_num: int) -> int:
+        if not 1 <= slot_num <= self.total_slots:
+            raise ValueError(f"Unknown slot number {slot_num}")
+        return HEADER_SIZE + (slot_num - 1) * RECORD.size
+
+    @property
+    def version(self) -> int:
+        """State version, bumped on every write"""
+        return struct.unpack_from("<Q", self._mm, VERSION_OFFSET)[0]
+
+    def write_slot(self, slot_num: int, slot: ParkingSlot, charge: float = 0.0):
+        """Overwrite one slot's record in place"""
+        check_vehicle(slot.vehicle_type, slot.vehicle_number)
+        plate = (slot.vehicle_number or "").encode("utf-8")
+        record = RECORD.pack(
+            STATUS_CODES[slot.status], VEHICLE_TYPE_CODES[slot.vehicle_type], plate,
+            _to_epoch(slot.arrival_time), _to_epoch(slot.pickup_time), _to_epoch(slot.reservation_time),
+            charge, 0
+        )
+        offset = self._offset(slot_num)
+        self._mm[offset:offset + RECORD.size] = record[:-4] + struct.pack("<I", zlib.crc32(record[:-4]))
+        struct.pack_into("<Q", self._mm, VERSION_OFFSET, self.version + 1)
+
+    def flush(self):
+        """Force written records to disk"""
+        self._mm.flush()
+
+    def _unpack(self, record: bytes, slot_num: int) -> ParkingSlot:
+        status, type_code, plate, arrival, pickup, reservation, _, _ = RECORD.unpack(record)
+        plate = plate.rstrip(b"\0").decode("utf-8")
+        return ParkingSlot(
+            slot_id=f"slot_{slot_num}",
+            status=STATUSES[status],
+            vehicle_type=VEHICLE_TYPES[type_code],
+            vehicle_number=plate or None,
+            arrival_time=_from_epoch(arrival),
+            pickup_time=_from_epoch(pickup),
+            reservation_time=_from_epoch(reservation)
+        )
+
+    def _read_record(self, slot_num: int, retries: int = 3) -> bytes:
+        """Read one record, retrying while its checksum shows a write in progress"""
+        offset = self._offset(slot_num)
+        for _ in range(retries):
+            record = self._mm[offset:offset + RECORD.size]
+            if zlib.crc32(record[:-4]) == struct.unpack_from("<I", record, RECORD.size - 4)[0]:
+                return record
+        raise ValueError(f"Slot {slot_num} record is corrupt in {self.filename}")
+
+    def read_slot(self, slot_num: int) -> ParkingSlot:
+        return self._unpack(self._read_record(slot_num), slot_num)
+
+    def read_charge(self, slot_num: int) -> float:
+        """Final charge stored with a slot's last departure"""
+        return RECORD.unpack(self._read_record(slot_num))[6]
+
+    def read_all(self) -> List[ParkingSlot]:
+        """Read every slot, skipping records with a bad checksum"""
+        slots = []
+        for slot_num in range(1, self.total_slots + 1):
+            try:
+                slots.append(self.read_slot(slot_num))
+            except ValueError as e:
+                print(f"Warning: {e}")
+        return slots
+
+    def records(self) -> np.ndarray:
+        """All records as one NumPy structured array, for vectorised reads such as status counts"""
+        # Copied so no view keeps the map exported (which would block close())
+        return np.frombuffer(self._mm, dtype=RECORD_DTYPE, count=self.total_slots, offset=HEADER_SIZE).copy()
+
+    def status_counts(self) -> Dict[SlotStatus, int]:
+        counts = np.bincount(self.records()['status'], minlength=len(STATUSES))
+        return {status: int(counts[code]) for status, code in STATUS_CODES.items()}
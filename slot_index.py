@@ -0,0 +1,201 @@
+import heapq
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_NO_KEY = object()  # marks a plate missing from PlateIndex._exact, since keys may be falsy
+
+class FreeSlotIndex:
+    """Free slot numbers kept in a min-heap and a max-heap for O(log n) assignment.
+
+    Claimed numbers are removed lazily: heap entries are only trusted while the
+    number is still in the free set, and stale entries are dropped when they
+    reach the top or when the heaps are compacted.
+    """
+
+    def __init__(self, slot_numbers: Iterable[int] = ()):
+        self._free: Set[int] = set(slot_numbers)
+        self._min_heap: List[int] = []
+        self._max_heap: List[int] = []
+        self._rebuild()
+
+    def _rebuild(self):
+        """Rebuild both heaps from the free set, dropping stale entries"""
+        self._min_heap = list(self._free)
+        self._max_heap = [-number for number in self._free]
+        heapq.heapify(self._min_heap)
+        heapq.heapify(self._max_heap)
+
+    def _compact_if_needed(self):
+        if len(self._min_heap) + len(self._max_heap) > 4 * len(self._free) + 64:
+            self._rebuild()
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    def __contains__(self, number: int) -> bool:
+        return number in self._free
+
+    def sorted_numbers(self) -> List[int]:
+        """Get all free slot numbers in ascending order"""
+        return sorted(self._free)
+
+    def peek_lowest(self) -> Optional[int]:
+        """Get the lowest free slot number without claiming it"""
+        while self._min_heap and self._min_heap[0] not in self._free:
+            heapq.heappop(self._min_heap)
+        return self._min_heap[0] if self._min_heap else None
+
+    def peek_highest(self) -> Optional[int]:
+        """Get the highest free slot number without claiming it"""
+        while self._max_heap and -self._max_heap[0] not in self._free:
+            heapq.heappop(self._max_heap)
+        return -self._max_heap[0] if self._max_heap else None
+
+    def _find(self, heap: List[int], sign: int, predicate: Callable[[int], bool]) -> Optional[int]:
+        """Walk a heap in order until a free number satisfies predicate, then restore the heap"""
+        popped = []
+        found = None
+        while heap:
+            entry = heapq.heappop(heap)
+            number = sign * entry
+            if number not in self._free:
+                continue
+            popped.append(entry)
+            if predicate(number):
+                found = number
+                break
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return found
+
+    def find_lowest(self, predicate: Callable[[int], bool]) -> Optional[int]:
+        """Get the lowest free slot number accepted by predicate"""
+        return self._find(self._min_heap, 1, predicate)
+
+    def find_highest(self, predicate: Callable[[int], bool]) -> Optional[int]:
+        """Get the highest free slot number accepted by predicate"""
+        return self._find(self._max_heap, -1, predicate)
+
+    def discard(self, number: int):
+        """Mark a slot number as no longer free"""
+        self._free.discard(number)
+        self._compact_if_needed()
+
+    def add(self, number: int):
+        """Mark a slot number as free"""
+        if number in self._free:
+            return
+        self._free.add(number)
+        heapq.heappush(self._min_heap, number)
+        heapq.heappush(self._max_heap, -number)
+        self._compact_if_needed()
+
+class PlateIndex:
+    """Exact and substring lookup of vehicle numbers.
+
+    Every plate is indexed under its 3-character grams as it is added, so a
+    substring query only checks keys whose plates contain all of the query's
+    trigrams instead of scanning every plate, and a search only reads the
+    index. Queries of one or two characters match most plates anyway and scan
+    them, which keeps the index to one entry per plate trigram.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self):
+        # Plate -> its key, or a set of keys when several share the plate; most plates
+        # have one key and a set per plate would cost ~200 bytes each
+        self._exact: Dict[str, Any] = {}
+        self._grams: Dict[str, Set] = {}
+        self._plates: Dict = {}
+
+    def _grams_of(self, plate: str) -> Set[str]:
+        return {plate[i:i + self.GRAM_SIZE] for i in range(len(plate) - self.GRAM_SIZE + 1)}
+
+    def add(self, key, vehicle_number: Optional[str]):
+        """Index a key (slot id, transaction number...) under a vehicle number"""
+        self.add_many([(key, vehicle_number)])
+
+    def add_many(self, entries: Iterable[Tuple[Any, Optional[str]]]):
+        """Index many (key, vehicle number) pairs, e.g. a whole restored lot"""
+        exact = self._exact
+        grams = self._grams
+        gram_size = self.GRAM_SIZE
+        for key, vehicle_number in entries:
+            if not vehicle_number:
+                continue
+            plate = vehicle_number.upper()
+            self._plates[key] = plate
+            keys = exact.get(plate, _NO_KEY)
+            if keys is _NO_KEY:
+                exact[plate] = key
+            elif isinstance(keys, set):
+                keys.add(key)
+            else:
+                exact[plate] = {keys, key}
+            # Inlined rather than through _grams_of: this loop dominates loading a large lot
+            for i in range(len(plate) - gram_size + 1):
+                gram = plate[i:i + gram_size]
+                gram_keys = grams.get(gram)
+                if gram_keys is None:
+                    grams[gram] = {key}
+                else:
+                    gram_keys.add(key)
+
+    def remove(self, key):
+        """Drop a key from the index"""
+        plate = self._plates.pop(key, None)
+        if plate is None:
+            return
+        keys = self._exact.get(plate, _NO_KEY)
+        if isinstance(keys, set):
+            keys.discard(key)
+            if len(keys) == 1:
+                self._exact[plate] = next(iter(keys))
+        elif keys == key:
+            del self._exact[plate]
+        for gram in self._grams_of(plate):
+            self._discard(self._grams, gram, key)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set], name: str, key):
+        keys = index.get(name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[name]
+
+    def clear(self):
+        self._exact.clear()
+        self._grams.clear()
+        self._plates.clear()
+
+    def exact(self, vehicle_number: str) -> Set:
+        """Keys whose vehicle number equals the query (case-insensitive)"""
+        keys = self._exact.get(vehicle_number.upper(), _NO_KEY)
+        if keys is _NO_KEY:
+            return set()
+        return set(keys) if isinstance(keys, set) else {keys}
+
+    def search(self, query: str) -> Set:
+        """Keys whose vehicle number contains the query (case-insensitive)"""
+        query = query.upper()
+        if not query:
+            return set(self._plates)
+        if len(query) < self.GRAM_SIZE:
+            return {key for key, plate in self._plates.items() if query in plate}
+        if len(query) == self.GRAM_SIZE:
+            return set(self._grams.get(query, ()))
+
+        # Intersect the candidate sets of the query's trigrams, smallest first
+        candidate_sets = sorted(
+            (self._grams.get(query[i:i + self.GRAM_SIZE], set())
+             for i in range(len(query) - self.GRAM_SIZE + 1)),
+            key=len
+        )
+        candidates = set(candidate_sets[0])
+        for keys in candidate_sets[1:]:
+            if not candidates:
+                break
+            candidates &= keys
+
+        return {key for key in candidates if query in self._plates[key]}
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+# A slot row as stored in the CSV: column name -> value ('' for empty fields)
+SlotRow = Dict[str, object]
+
+def encode_record(record: Dict) -> str:
+    """Serialise a record as one log line: CRC32 of the JSON payload, a space, the payload"""
+    payload = json.dumps(record, separators=(',', ':'), default=str)
+    return f"{zlib.crc32(payload.encode()):08x} {payload}\n"
+
+def decode_record(line: str) -> Optional[Dict]:
+    """Parse one log line, or return None if it is torn or corrupt"""
+    checksum, _, payload = line.rstrip("\n").partition(" ")
+    if not line.endswith("\n") or f"{zlib.crc32(payload.encode()):08x}" != checksum:
+        return None
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+class SlotJournal:
+    """Append-only log of slot rows on top of a CSV snapshot.
+
+    Every change is written as one checksummed line holding the slot's full
+    row and fsynced before returning, so a write costs the same no matter how
+    big the lot is. Records are whole-row overwrites, which makes replaying
+    one twice harmless. Compaction moves the active log aside, writes the rows
+    as a new snapshot (temp file + rename) and deletes the old log; a crash at
+    any point leaves either the old snapshot plus both logs or the new one.
+    """
+
+    def __init__(self, snapshot_filename: str,
+                 write_snapshot: Callable[[Dict[int, SlotRow], str], None],
+                 compact_every: int = 500):
+        self.snapshot_filename = snapshot_filename
+        self.log_filename = snapshot_filename + ".journal"
+        self.compacting_filename = self.log_filename + ".compacting"
+        self.compact_every = compact_every
+        self._write_snapshot = write_snapshot
+
+        self.rows: Dict[int, SlotRow] = {}
+        self._file = None
+        self._lock = threading.Lock()
+        self._records_since_compaction = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _encode(slot_num: int, row: SlotRow) -> str:
+        return encode_record({'slot': slot_num, 'row': row})
+
+    @staticmethod
+    def _decode(line: str) -> Optional[Tuple[int, SlotRow]]:
+        record = decode_record(line)
+        try:
+            return int(record['slot']), record['row']
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _read_log(self, filename: str) -> Tuple[List[Tuple[int, SlotRow]], int]:
+        """Read valid records up to the first bad line, returning them and the valid byte length"""
+        records = []
+        valid_bytes = 0
+        if not os.path.exists(filename):
+            return records, valid_bytes
+
+        with open(filename, "rb") as f:
+            for raw_line in f:
+                record = self._decode(raw_line.decode("utf-8", errors="replace"))
+                if record is None:
+                    print(f"Warning: Ignoring damaged journal tail in {filename} after {len(records)} records")
+                    break
+                records.append(record)
+                valid_bytes += len(raw_line)
+        return records, valid_bytes
+
+    def replay(self) -> List[Tuple[int, SlotRow]]:
+        """Get the records to apply on top of the snapshot, oldest first"""
+        records, _ = self._read_log(self.compacting_filename)
+        active_records, valid_bytes = self._read_log(self.log_filename)
+
+        # Cut off a torn last write so new records are not appended after it
+        if os.path.exists(self.log_filename) and os.path.getsize(self.log_filename) != valid_bytes:
+            with open(self.log_filename, "r+b") as f:
+                f.truncate(valid_bytes)
+                os.fsync(f.fileno())
+
+        return records + active_records
+
+    def open(self, rows: Dict[int, SlotRow]):
+        """Start appending on top of the replayed rows"""
+        self.rows = dict(rows)
+        self._records_since_compaction = 0
+
+        # Finish a compaction interrupted by a crash before rotating the log again
+        if os.path.exists(self.compacting_filename):
+            self._save_snapshot(self.rows)
+            os.remove(self.compacting_filename)
+
+        self._file = open(self.log_filename, "a", encoding="utf-8")
+
+    def append(self, changes: List[Tuple[int, SlotRow]]):
+        """Durably record new rows for the given slots"""
+        if not changes:
+            return
+        with self._lock:
+            self._file.write("".join(self._encode(slot_num, row) for slot_num, row in changes))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            for slot_num, row in changes:
+                self.rows[slot_num] = row
+            self._records_since_compaction += len(changes)
+
+        if self._records_since_compaction >= self.compact_every:
+            self.compact()
+
+    def _save_snapshot(self, rows: Dict[int, SlotRow]):
+        temp_filename = self.snapshot_filename + ".tmp"
+        self._write_snapshot(rows, temp_filename)
+        with open(temp_filename, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(temp_filename, self.snapshot_filename)
+
+    def compact(self, wait: bool = False):
+        """Fold the log into a new snapshot, in a background thread unless wait is set"""
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                thread = self._compaction_thread
+            else:
+                # Rotate the log under the lock so the copied rows match it exactly.
+                # A log left over from a failed compaction is covered by the same rows.
+                if not os.path.exists(self.compacting_filename):
+                    self._file.close()
+                    os.replace(self.log_filename, self.compacting_filename)
+                    self._file = open(self.log_filename, "a", encoding="utf-8")
+                self._records_since_compaction = 0
+                rows = dict(self.rows)
+
+                thread = threading.Thread(target=self._finish_compaction, args=(rows,), daemon=True)
+                self._compaction_thread = thread
+                thread.start()
+
+        if wait:
+            thread.join()
+
+    def _finish_compaction(self, rows: Dict[int, SlotRow]):
+        try:
+            self._save_snapshot(rows)
+            os.remove(self.compacting_filename)
+        except Exception as e:
+            # The rotated log is kept and replayed on the next start
+            print(f"Error compacting journal: {e}")
+
+    def close(self):
+        """Wait for a running compaction and close the log"""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,265 @@
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+
+class SlotStatus(Enum):
+    AVAILABLE = "available"
+    OCCUPIED = "occupied"
+    RESERVED = "reserved"
+
+@dataclass
+class ParkingSlot:
+    slot_id: str
+    status: SlotStatus
+    vehicle_type: Optional[str] = None
+    vehicle_number: Optional[str] = None
+    arrival_time: Optional[datetime] = None
+    pickup_time: Optional[datetime] = None
+    reservation_time: Optional[datetime] = None
+
+class DictSlotStore(dict):
+    """Default slot store: a plain dict of slot_id -> ParkingSlot"""
+
+    def reset(self, slot_ids: List[str]):
+        """Make every slot available"""
+        for slot_id in slot_ids:
+            self[slot_id] = ParkingSlot(slot_id=slot_id, status=SlotStatus.AVAILABLE)
+
+    def status_of(self, slot_id: str) -> SlotStatus:
+        return self[slot_id].status
+
+    def slot_ids_with_status(self, status: SlotStatus) -> List[str]:
+        return [slot_id for slot_id, slot in self.items() if slot.status == status]
+
+# Fixed codes for the array store; unknown vehicle types are appended at runtime
+STATUS_CODES = {SlotStatus.AVAILABLE: 0, SlotStatus.OCCUPIED: 1, SlotStatus.RESERVED: 2}
+STATUSES = list(STATUS_CODES)
+NO_TIME = np.iinfo(np.int64).min
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+class ArraySlotStore(MutableMapping):
+    """Struct-of-arrays slot store for very large lots.
+
+    Slot fields live in NumPy columns indexed by slot position, vehicle
+    numbers are interned in a reference-counted plate table, and times are
+    kept as epoch microseconds so billing stays exact. It behaves like the
+    dict store, building a ParkingSlot only when a single slot is read.
+
+    `slot_numbers` maps each slot id to its 1-based position; passing the
+    caller's own mapping avoids a second per-slot dict.
+    """
+
+    def __init__(self, slot_ids: List[str], slot_numbers: Optional[Dict[str, int]] = None):
+        self._slot_ids = list(slot_ids)
+        self._slot_id_array = np.array(self._slot_ids, dtype=object)
+        if slot_numbers is None:
+            slot_numbers = {slot_id: i for i, slot_id in enumerate(self._slot_ids, start=1)}
+        elif any(slot_numbers.get(slot_id) != i for i, slot_id in enumerate(self._slot_ids, start=1)):
+            raise ValueError("slot_numbers must number the slot ids 1..n in order")
+        self._numbers = slot_numbers
+        size = len(self._slot_ids)
+
+        self.status = np.zeros(size, dtype=np.int8)
+        self.vehicle_type = np.zeros(size, dtype=np.int8)
+        self.plate = np.full(size, -1, dtype=np.int32)
+        self.arrival = np.full(size, NO_TIME, dtype=np.int64)
+        self.pickup = np.full(size, NO_TIME, dtype=np.int64)
+        self.reservation = np.full(size, NO_TIME, dtype=np.int64)
+
+        self._type_names: List[Optional[str]] = [None, "Car", "Bike", "Truck"]
+        self._type_codes: Dict[Optional[str], int] = {name: i for i, name in enumerate(self._type_names)}
+        self._reset_plates()
+
+    def _reset_plates(self):
+        # Plate table rows are reused once no slot holds their plate any more
+        self._plates: List[Optional[str]] = []
+        self._plate_ids: Dict[str, int] = {}
+        self._plate_refs: List[int] = []
+        self._free_plate_rows: List[int] = []
+
+    def reset(self, slot_ids: List[str]):
+        """Make every slot available"""
+        self.status[:] = STATUS_CODES[SlotStatus.AVAILABLE]
+        self.vehicle_type[:] = 0
+        self.plate[:] = -1
+        self.arrival[:] = NO_TIME
+        self.pickup[:] = NO_TIME
+        self.reservation[:] = NO_TIME
+        self._reset_plates()
+
+    def index_of(self, slot_id: str) -> int:
+        """Get the numeric position of a slot"""
+        return self._numbers[slot_id] - 1
+
+    def slot_id_at(self, index: int) -> str:
+        return self._slot_ids[index]
+
+    @staticmethod
+    def _to_epoch(value: Optional[datetime]) -> int:
+        return NO_TIME if value is None else (value - _EPOCH) // _MICROSECOND
+
+    @staticmethod
+    def _from_epoch(value: int) -> Optional[datetime]:
+        return None if value == NO_TIME else _EPOCH + timedelta(microseconds=int(value))
+
+    def _intern_type(self, vehicle_type: Optional[str]) -> int:
+        if vehicle_type not in self._type_codes:
+            self._type_codes[vehicle_type] = len(self._type_names)
+            self._type_names.append(vehicle_type)
+        return self._type_codes[vehicle_type]
+
+    def _intern_plate(self, vehicle_number: Optional[str]) -> int:
+        """Get the plate's row, adding a reference to it"""
+        if vehicle_number is None:
+            return -1
+        row = self._plate_ids.get(vehicle_number)
+        if row is None:
+            if self._free_plate_rows:
+                row = self._free_plate_rows.pop()
+                self._plates[row] = vehicle_number
+                self._plate_refs[row] = 0
+            else:
+                row = len(self._plates)
+                self._plates.append(vehicle_number)
+                self._plate_refs.append(0)
+            self._plate_ids[vehicle_number] = row
+        self._plate_refs[row] += 1
+        return row
+
+    def _release_plate(self, row: int):
+        """Drop a reference to a plate row, freeing it when no slot holds the plate"""
+        if row < 0:
+            return
+        self._plate_refs[row] -= 1
+        if self._plate_refs[row] == 0:
+            del self._plate_ids[self._plates[row]]
+            self._plates[row] = None
+            self._free_plate_rows.append(row)
+
+    def __getitem__(self, slot_id: str) -> ParkingSlot:
+        i = self._numbers[slot_id] - 1
+        plate = int(self.plate[i])
+        return ParkingSlot(
+            slot_id=slot_id,
+            status=STATUSES[self.status[i]],
+            vehicle_type=self._type_names[self.vehicle_type[i]],
+            vehicle_number=None if plate < 0 else self._plates[plate],
+            arrival_time=self._from_epoch(self.arrival[i]),
+            pickup_time=self._from_epoch(self.pickup[i]),
+            reservation_time=self._from_epoch(self.reservation[i])
+        )
+
+    def __setitem__(self, slot_id: str, slot: ParkingSlot):
+        i = self._numbers[slot_id] - 1
+        self.status[i] = STATUS_CODES[slot.status]
+        self.vehicle_type[i] = self._intern_type(slot.vehicle_type)
+        old_plate = int(self.plate[i])
+        self.plate[i] = self._intern_plate(slot.vehicle_number)
+        self._release_plate(old_plate)
+        self.arrival[i] = self._to_epoch(slot.arrival_time)
+        self.pickup[i] = self._to_epoch(slot.pickup_time)
+        self.reservation[i] = self._to_epoch(slot.reservation_time)
+
+    def __delitem__(self, slot_id: str):
+        raise TypeError("Slots cannot be deleted from an ArraySlotStore")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slot_ids)
+
+    def __len__(self) -> int:
+        return len(self._slot_ids)
+
+    def __contains__(self, slot_id) -> bool:
+        return slot_id in self._numbers
+
+    def status_of(self, slot_id: str) -> SlotStatus:
+        return STATUSES[self.status[self._numbers[slot_id] - 1]]
+
+    def slot_ids_with_status(self, status: SlotStatus) -> List[str]:
+        return self._slot_id_array[self.status == STATUS_CODES[status]].tolist()
+
+    def plate_at(self, index: int) -> Optional[str]:
+        plate = int(self.plate[index])
+        return None if plate < 0 else self._plates[plate]
+
+    def plate_count(self) -> int:
+        """Number of distinct plates currently held by slots"""
+        return len(self._plate_ids)
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the slot columns"""
+        return sum(column.nbytes for column in (
+            self.status, self.vehicle_type, self.plate, self.arrival, self.pickup, self.reservation
+        ))
+
+def benchmark_slot_stores(num_slots: int = 50000, repeats: int = 20) -> Dict[str, Dict[str, float]]:
+    """Compare memory use and status-scan time of the dict and array slot stores.
+
+    store_mb counts the store alone; manager_mb a whole ParkingManager using it,
+    including the indexes the manager keeps next to the store. After the first
+    fill every occupied slot changes hands three times, and `plates` reports the
+    distinct plates the array store still holds afterwards.
+    """
+    import gc
+    import time
+    import tracemalloc
+    from parking_manager import ParkingManager
+
+    slot_ids = [f"slot_{i}" for i in range(1, num_slots + 1)]
+    arrival = datetime(2025, 1, 1, 8, 0)
+    results = {}
+
+    def occupied(slot_id: str, i: int, generation: int) -> ParkingSlot:
+        return ParkingSlot(
+            slot_id=slot_id,
+            status=SlotStatus.OCCUPIED,
+            vehicle_type="Car",
+            vehicle_number=f"WB{generation}{i:08d}",
+            arrival_time=arrival + timedelta(minutes=i),
+            pickup_time=arrival + timedelta(minutes=i, hours=2)
+        )
+
+    for name in ("dict", "array"):
+        gc.collect()
+        tracemalloc.start()
+        store = DictSlotStore() if name == "dict" else ArraySlotStore(slot_ids)
+        for i, slot_id in enumerate(slot_ids):
+            store[slot_id] = occupied(slot_id, i, 0) if i % 3 else ParkingSlot(slot_id=slot_id, status=SlotStatus.AVAILABLE)
+        store_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            store.slot_ids_with_status(SlotStatus.AVAILABLE)
+        scan_ms = (time.perf_counter() - start) / repeats * 1000
+
+        for generation in range(1, 4):
+            for i, slot_id in enumerate(slot_ids):
+                if i % 3:
+                    store[slot_id] = occupied(slot_id, i, generation)
+        plates = store.plate_count() if name == "array" else len(store.slot_ids_with_status(SlotStatus.OCCUPIED))
+        del store
+
+        gc.collect()
+        tracemalloc.start()
+        manager = ParkingManager(total_slots=num_slots, slot_store=name)
+        manager.restore_slots([occupied(slot_id, i, 0) for i, slot_id in enumerate(slot_ids) if i % 3])
+        manager_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del manager
+
+        results[name] = {'store_mb': store_bytes / 1e6, 'manager_mb': manager_bytes / 1e6,
+                         'scan_ms': scan_ms, 'plates': plates}
+
+    return results
+
+if __name__ == "__main__":
+    # Run from the imported module so the manager and the stores share one SlotStatus
+    import slot_store
+    for store_name, result in slot_store.benchmark_slot_stores().items():
+        print(f"{store_name:>5}: store {result['store_mb']:.1f} MB, whole manager {result['manager_mb']:.1f} MB, "
+              f"status scan {result['scan_ms']:.2f} ms, {result['plates']} plates held after churn")
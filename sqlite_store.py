@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from reservations import Reservation
+from slot_store import ParkingSlot, SlotStatus
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS slots (
+    slot_id TEXT PRIMARY KEY,
+    vehicle_type TEXT NOT NULL,
+    vehicle_number TEXT NOT NULL,
+    arrival_time TEXT NOT NULL,
+    pickup_time TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_slots_plate ON slots (vehicle_number);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    slot_id TEXT NOT NULL,
+    vehicle_type TEXT NOT NULL,
+    vehicle_number TEXT NOT NULL,
+    arrival_time TEXT NOT NULL,
+    departure_time TEXT NOT NULL,
+    amount REAL NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_plate ON transactions (vehicle_number);
+CREATE INDEX IF NOT EXISTS idx_transactions_slot ON transactions (slot_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_departure ON transactions (departure_time);
+
+CREATE TABLE IF NOT EXISTS reservations (
+    id TEXT PRIMARY KEY,
+    slot_id TEXT NOT NULL,
+    vehicle_type TEXT NOT NULL,
+    vehicle_number TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reservations_slot ON reservations (slot_id);
+CREATE INDEX IF NOT EXISTS idx_reservations_plate ON reservations (vehicle_number);
+"""
+
+# Statements are kept as constants so each connection compiles them once and
+# reuses them from sqlite3's per-connection statement cache
+UPSERT_SLOT = """
+INSERT INTO slots (slot_id, vehicle_type, vehicle_number, arrival_time, pickup_time)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (slot_id) DO UPDATE SET
+    vehicle_type = excluded.vehicle_type,
+    vehicle_number = excluded.vehicle_number,
+    arrival_time = excluded.arrival_time,
+    pickup_time = excluded.pickup_time
+"""
+DELETE_SLOT = "DELETE FROM slots WHERE slot_id = ?"
+INSERT_TRANSACTION = """
+INSERT INTO transactions (id, slot_id, vehicle_type, vehicle_number, arrival_time,
+                          departure_time, amount, timestamp)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_RESERVATION = """
+INSERT INTO reservations (id, slot_id, vehicle_type, vehicle_number, start_time, end_time)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+TRANSACTION_COLUMNS = ("id", "slot_id", "vehicle_type", "vehicle_number", "arrival_time",
+                       "departure_time", "amount", "timestamp")
+
+def _to_text(value: Optional[datetime]) -> Optional[str]:
+    return None if value is None else value.isoformat()
+
+def _from_text(value: Optional[str]) -> Optional[datetime]:
+    return None if value is None else datetime.fromisoformat(value)
+
+class SQLiteStore:
+    """SQLite persistence for occupied slots, transactions and reservations.
+
+    The database runs in WAL mode, so dashboard readers never block the gate
+    writer and vice versa. Writes go through one connection guarded by a lock;
+    reads use a connection per thread.
+    """
+
+    def __init__(self, db_filename: str = "parking_data.db"):
+        self.db_filename = db_filename
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        # A new database file starts empty and may be seeded from the CSV
+        self.created = not os.path.exists(db_filename)
+        self._conn = self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_filename, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Get this thread's read connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Writes
+
+    @staticmethod
+    def _slot_params(slot: ParkingSlot) -> Tuple:
+        return (slot.slot_id, slot.vehicle_type, slot.vehicle_number,
+                _to_text(slot.arrival_time), _to_text(slot.pickup_time))
+
+    def park(self, slot: ParkingSlot):
+        """Record a vehicle parked in a slot"""
+        with self._lock, self._conn:
+            self._conn.execute(UPSERT_SLOT, self._slot_params(slot))
+
+    def remove(self, slot_id: str, transaction: Dict):
+        """Free a slot and record its transaction atomically"""
+        with self._lock, self._conn:
+            self._conn.execute(DELETE_SLOT, (slot_id,))
+            self._conn.execute(INSERT_TRANSACTION, tuple(
+                _to_text(transaction[column]) if isinstance(transaction[column], datetime) else transaction[column]
+                for column in TRANSACTION_COLUMNS
+            ))
+
+    def save_state(self, occupied_slots: Iterable[ParkingSlot], reservations: Iterable[Reservation]):
+        """Replace the stored slots and reservations with the given ones"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM slots")
+            self._conn.executemany(UPSERT_SLOT, (self._slot_params(slot) for slot in occupied_slots))
+            self._conn.execute("DELETE FROM reservations")
+            self._conn.executemany(INSERT_RESERVATION, (
+                (r.id, r.slot_id, r.vehicle_type, r.vehicle_number, _to_text(r.start_time), _to_text(r.end_time))
+                for r in reservations
+            ))
+
+    def clear(self):
+        """Delete all slots, transactions and reservations"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM slots")
+            self._conn.execute("DELETE FROM transactions")
+            self._conn.execute("DELETE FROM reservations")
+
+    # Reads
+
+    def load_slots(self) -> List[ParkingSlot]:
+        rows = self._reader().execute(
+            "SELECT slot_id, vehicle_type, vehicle_number, arrival_time, pickup_time FROM slots"
+        ).fetchall()
+        return [
+            ParkingSlot(
+                slot_id=slot_id,
+                status=SlotStatus.OCCUPIED,
+                vehicle_type=vehicle_type,
+                vehicle_number=vehicle_number,
+                arrival_time=_from_text(arrival_time),
+                pickup_time=_from_text(pickup_time)
+            )
+            for slot_id, vehicle_type, vehicle_number, arrival_time, pickup_time in rows
+        ]
+
+    def load_reservations(self) -> List[Reservation]:
+        rows = self._reader().execute(
+            "SELECT id, slot_id, vehicle_type, vehicle_number, start_time, end_time FROM reservations"
+        ).fetchall()
+        return [
+            Reservation(
+                id=reservation_id,
+                slot_id=slot_id,
+                vehicle_type=vehicle_type,
+                vehicle_number=vehicle_number,
+                start_time=_from_text(start_time),
+                end_time=_from_text(end_time)
+            )
+            for reservation_id, slot_id, vehicle_type, vehicle_number, start_time, end_time in rows
+        ]
+
+    def _transaction_rows(self, where: str = "", params: Tuple = (), limit: Optional[int] = None) -> List[Dict]:
+        sql = f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions {where} ORDER BY departure_time"
+        if limit is not None:
+            sql += " DESC LIMIT ?"
+            params = params + (limit,)
+        transactions = []
+        for row in self._reader().execute(sql, params):
+            transaction = dict(zip(TRANSACTION_COLUMNS, row))
+            for column in ("arrival_time", "departure_time", "timestamp"):
+                transaction[column] = _from_text(transaction[column])
+            transactions.append(transaction)
+        return transactions
+
+    def load_transactions(self) -> List[Dict]:
+        """Get every transaction, oldest departure first"""
+        return self._transaction_rows()
+
+    def last_transaction_rowid(self) -> int:
+        """Get the rowid of the newest transaction, 0 when there are none"""
+        return self._reader().execute("SELECT COALESCE(MAX(rowid), 0) FROM transactions").fetchone()[0]
+
+    def has_transaction_rowid(self, rowid: int) -> bool:
+        return self._reader().execute("SELECT 1 FROM transactions WHERE rowid = ?", (rowid,)).fetchone() is not None
+
+    def transactions_after(self, rowid: int) -> List[Dict]:
+        """Get the transactions stored after the given rowid, e.g. by another process"""
+        return self._transaction_rows("WHERE rowid > ?", (rowid,))
+
+    def transactions_for_plate(self, vehicle_number: str, limit: Optional[int] = None) -> List[Dict]:
+        """Get a vehicle's transactions, most recent departure first"""
+        return self._transaction_rows("WHERE vehicle_number = ?", (vehicle_number.upper(),), limit or -1)
+
+    def transactions_for_slot(self, slot_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Get a slot's transactions, most recent departure first"""
+        return self._transaction_rows("WHERE slot_id = ?", (slot_id,), limit or -1)
+
+    def revenue_between(self, start: datetime, end: datetime) -> Dict[str, float]:
+        """Get revenue by vehicle type for departures in [start, end)"""
+        rows = self._reader().execute(
+            "SELECT vehicle_type, SUM(amount) FROM transactions "
+            "WHERE departure_time >= ? AND departure_time < ? GROUP BY vehicle_type",
+            (_to_text(start), _to_text(end))
+        ).fetchall()
+        return {vehicle_type: total for vehicle_type, total in rows}
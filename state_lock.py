@@ -0,0 +1,95 @@
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+# Advisory locks need fcntl (POSIX); elsewhere only threads of one process are coordinated
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+VERSION = struct.Struct("<Q")
+
+class StateLock:
+    """Advisory inter-process lock and shared state version for one data store.
+
+    The lock file holds a single 8-byte version counter. Writers take the
+    exclusive lock, write the store and bump the version; readers compare the
+    version with the last one they loaded, which is one read from a shared
+    memory map, and only reload the store when it moved. Both locks are
+    reentrant within a process, and threads of the same process take them one
+    at a time.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._exclusive = False
+        fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+        self._file = os.fdopen(fd, "r+b")
+        if os.fstat(fd).st_size < VERSION.size:
+            # Several processes may race to create the file; only an empty one is extended
+            with self.exclusive():
+                if os.fstat(fd).st_size < VERSION.size:
+                    self._file.truncate(VERSION.size)
+        self._mm = mmap.mmap(fd, VERSION.size)
+
+        if fcntl is None:
+            print(f"Warning: File locking is unavailable; {filename} only coordinates threads of this process")
+
+    def _acquire(self, exclusive: bool):
+        self._thread_lock.acquire()
+        if self._depth and exclusive and not self._exclusive:
+            self._thread_lock.release()
+            raise RuntimeError("Cannot upgrade a shared state lock to exclusive")
+        if not self._depth and fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        if not self._depth:
+            self._exclusive = exclusive
+        self._depth += 1
+
+    def _release(self):
+        self._depth -= 1
+        if self._depth == 0 and fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the lock for writing the store"""
+        self._acquire(True)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextmanager
+    def shared(self):
+        """Hold the lock for reading the store; inside exclusive() this keeps the exclusive lock"""
+        self._acquire(False)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @property
+    def version(self) -> int:
+        """Current state version, without taking the lock"""
+        return VERSION.unpack_from(self._mm, 0)[0]
+
+    def bump(self) -> int:
+        """Record that the store changed; call while holding exclusive()"""
+        version = self.version + 1
+        VERSION.pack_into(self._mm, 0, version)
+        return version
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
@@ -0,0 +1,89 @@
+from datetime import date, datetime
+from typing import Dict, Tuple
+import numpy as np
+from billing import NIGHT, RUSH, STANDARD, build_hour_timeline, day_hour_classes
+from holiday_calendar import HolidayCalendar
+
+class CompiledTariff:
+    """Hourly price classes compiled per calendar year and queried with prefix sums.
+
+    Each hour of a year is classed as STANDARD, RUSH or NIGHT from the weekday
+    rules and the holiday calendar. The class of an hour does not depend on the
+    vehicle type, so one table serves every type and rates are applied to the
+    resulting hour counts. Changing rates therefore needs no rebuild, and a
+    holiday change only recompiles that day and the prefix sums after it.
+    """
+
+    def __init__(self, holiday_calendar: HolidayCalendar):
+        self.holiday_calendar = holiday_calendar
+        # year -> (hourly classes, (3, hours + 1) prefix counts per class)
+        self._years: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._calendar_version = holiday_calendar.version
+
+    @staticmethod
+    def _hour_index(day: date, hour: int) -> int:
+        """Hour offset of day/hour from the start of its year"""
+        return (day - date(day.year, 1, 1)).days * 24 + hour
+
+    def _compile_year(self, year: int):
+        """Build the class table and prefix counts for a whole year"""
+        num_days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+        classes = build_hour_timeline(np.datetime64(date(year, 1, 1), 'D'), num_days,
+                                      self.holiday_calendar)
+        prefix = np.zeros((3, len(classes) + 1), dtype=np.int64)
+        for hour_class in (STANDARD, RUSH, NIGHT):
+            np.cumsum(classes == hour_class, out=prefix[hour_class, 1:])
+        self._years[year] = (classes, prefix)
+
+    def _sync_holidays(self):
+        """Recompile only the days whose holiday entry changed since the last lookup"""
+        version = self.holiday_calendar.version
+        if version == self._calendar_version:
+            return
+
+        for day in sorted(self.holiday_calendar.changed_days_since(self._calendar_version)):
+            if day.year not in self._years:
+                continue
+            classes, prefix = self._years[day.year]
+            start = self._hour_index(day, 0)
+            classes[start:start + 24] = day_hour_classes(self.holiday_calendar.rush_window(day))
+
+            # Prefix sums before the changed day are unaffected
+            for hour_class in (STANDARD, RUSH, NIGHT):
+                prefix[hour_class, start + 1:] = (
+                    prefix[hour_class, start] + np.cumsum(classes[start:] == hour_class)
+                )
+
+        self._calendar_version = version
+
+    def _year_table(self, year: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get a year's tables, compiling them on first use"""
+        if year not in self._years:
+            self._compile_year(year)
+        return self._years[year]
+
+    def hour_counts(self, arrival_dt: datetime, full_hours: int) -> Tuple[int, int, int]:
+        """Count (standard, rush, night) hours of a stay with one lookup per calendar year"""
+        self._sync_holidays()
+        counts = np.zeros(3, dtype=np.int64)
+        year = arrival_dt.year
+        start = self._hour_index(arrival_dt.date(), arrival_dt.hour)
+        remaining = full_hours
+
+        while remaining > 0:
+            classes, prefix = self._year_table(year)
+            end = min(len(classes), start + remaining)
+            counts += prefix[:, end] - prefix[:, start]
+            remaining -= end - start
+            year += 1
+            start = 0
+
+        standard_hours, rush_hours, night_hours = counts.tolist()
+        return standard_hours, rush_hours, night_hours
+
+    def year_classes(self, year: int) -> np.ndarray:
+        """Get the compiled hourly classes of a year (read-only view)"""
+        self._sync_holidays()
+        classes = self._year_table(year)[0].view()
+        classes.flags.writeable = False
+        return classes
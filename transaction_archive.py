@@ -0,0 +1,280 @@
+import atexit
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from flusher import BackgroundFlusher
+
+# Parquet needs pyarrow; without it chunks are stored as one .npy file per column
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+COLUMNS = ("id", "slot_id", "vehicle_type", "vehicle_number",
+           "arrival_time", "departure_time", "amount", "timestamp")
+TIME_COLUMNS = ("arrival_time", "departure_time", "timestamp")
+GROUP_KEYS = ("day", "vehicle_type", "slot_id")
+
+class TransactionArchive:
+    """Append-only columnar archive of finished transactions, partitioned by departure day.
+
+    Each day is a directory (day=YYYY-MM-DD) of immutable chunk files, written
+    as Parquet when pyarrow is installed and as per-column .npy files
+    otherwise. Appends are buffered and written once `flush_every` are pending
+    or `flush_window` seconds after the first, so a crash loses at most that
+    much. Chunk names carry the time, process id and a random suffix, so
+    several processes can share one archive. Queries only open the partitions
+    in range and only the columns they aggregate, so memory stays bounded by
+    the chunk size rather than the archive size.
+    """
+
+    def __init__(self, root_dir: str = "transaction_archive", chunk_size: int = 10000,
+                 file_format: Optional[str] = None, flush_every: int = 100, flush_window: float = 5.0):
+        self.root_dir = root_dir
+        self.chunk_size = chunk_size
+        self.flush_every = flush_every
+        self.file_format = file_format or ("parquet" if pq is not None else "npy")
+        if self.file_format == "parquet" and pq is None:
+            raise ValueError("The parquet archive format needs pyarrow")
+        if self.file_format not in ("parquet", "npy"):
+            raise ValueError(f"Unknown archive format: {self.file_format}")
+
+        os.makedirs(root_dir, exist_ok=True)
+        self._pending: List = []
+        self._lock = threading.Lock()
+        self._flusher = BackgroundFlusher(lambda keys: self.flush(), flush_window)
+        atexit.register(self.flush)
+
+    # Writing
+
+    def append(self, transaction):
+        """Buffer one finished Transaction until flush_every are pending or the flush window ends"""
+        with self._lock:
+            self._pending.append(transaction)
+            full = len(self._pending) >= self.flush_every
+        if full:
+            self.flush()
+        else:
+            self._flusher.mark_dirty()
+
+    def flush(self):
+        """Write buffered transactions to their day partitions"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.write_columns({
+            column: [getattr(transaction, column) for transaction in pending] for column in COLUMNS
+        })
+
+    def write_columns(self, columns: Dict[str, Sequence]):
+        """Write transactions given column-wise, one chunk per departure day"""
+        arrays = self._to_arrays(columns)
+        days = arrays["departure_time"].astype("datetime64[D]")
+        order = np.argsort(days, kind="stable")
+        sorted_days = days[order]
+        boundaries = np.flatnonzero(sorted_days[1:] != sorted_days[:-1]) + 1
+
+        for rows in np.split(order, boundaries):
+            if not len(rows):
+                continue
+            day = days[rows[0]].astype(date)
+            for start in range(0, len(rows), self.chunk_size):
+                chunk_rows = rows[start:start + self.chunk_size]
+                self._write_chunk(day, {name: array[chunk_rows] for name, array in arrays.items()})
+
+    @staticmethod
+    def _to_arrays(columns: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for column in COLUMNS:
+            values = columns[column]
+            if column in TIME_COLUMNS:
+                arrays[column] = np.asarray(values, dtype="datetime64[us]")
+            elif column == "amount":
+                arrays[column] = np.asarray(values, dtype=np.float64)
+            elif column == "id":
+                arrays[column] = np.asarray(values, dtype="S")  # UUIDs are plain ASCII
+            else:
+                arrays[column] = np.asarray(values, dtype=str)
+        return arrays
+
+    def _partition_dir(self, day: date) -> str:
+        return os.path.join(self.root_dir, f"day={day.isoformat()}")
+
+    def _write_chunk(self, day: date, arrays: Dict[str, np.ndarray]):
+        partition = self._partition_dir(day)
+        os.makedirs(partition, exist_ok=True)
+        name = f"part-{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        # Write under a temporary name and rename, so readers never see half a chunk
+        if self.file_format == "parquet":
+            path = os.path.join(partition, name + ".parquet")
+            table = pa.table({
+                column: arrays[column].astype(str) if column == "id" else arrays[column] for column in COLUMNS
+            })
+            pq.write_table(table, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        else:
+            path = os.path.join(partition, name + ".npy.d")
+            temp_dir = path + ".tmp"
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            os.makedirs(temp_dir)
+            for column in COLUMNS:
+                np.save(os.path.join(temp_dir, column + ".npy"), arrays[column], allow_pickle=False)
+            os.replace(temp_dir, path)
+
+    def clear(self):
+        """Delete every archived day and drop buffered transactions"""
+        with self._lock:
+            self._pending = []
+        for day in self.days():
+            shutil.rmtree(self._partition_dir(day), ignore_errors=True)
+
+    # Reading
+
+    def days(self) -> List[date]:
+        """Get every archived day, oldest first"""
+        days = []
+        for name in os.listdir(self.root_dir):
+            if name.startswith("day="):
+                try:
+                    days.append(date.fromisoformat(name[4:]))
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def _chunk_paths(self, day: date) -> List[str]:
+        partition = self._partition_dir(day)
+        if not os.path.isdir(partition):
+            return []
+        return [
+            os.path.join(partition, name) for name in sorted(os.listdir(partition))
+            if name.endswith(".parquet") or name.endswith(".npy.d")
+        ]
+
+    def _read_chunk(self, path: str, columns: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Read only the requested columns of one chunk"""
+        columns = list(columns)
+        if path.endswith(".parquet"):
+            table = pq.read_table(path, columns=columns)
+            return {column: table.column(column).to_numpy() for column in columns}
+        return {column: np.load(os.path.join(path, column + ".npy"), mmap_mode="r") for column in columns}
+
+    def _days_between(self, start: Optional[date], end: Optional[date]) -> List[date]:
+        return [day for day in self.days()
+                if (start is None or day >= start) and (end is None or day <= end)]
+
+    def revenue(self, start: Optional[date] = None, end: Optional[date] = None,
+                by: Sequence[str] = ("day",)) -> pd.DataFrame:
+        """Total revenue and exit count for departure days in [start, end], grouped by day, vehicle_type and/or slot_id"""
+        by = list(by)
+        unknown = set(by) - set(GROUP_KEYS)
+        if unknown:
+            raise ValueError(f"Cannot group revenue by {sorted(unknown)}")
+        keys = [key for key in by if key != "day"]
+
+        # Aggregate chunk by chunk with NumPy, keeping only per-group totals in memory
+        totals: Dict[tuple, List[float]] = {}
+        for day in self._days_between(start, end):
+            for path in self._chunk_paths(day):
+                arrays = self._read_chunk(path, ["amount"] + keys)
+                amount = np.asarray(arrays["amount"])
+
+                # Encode the key combination of every row as one integer group code
+                codes = np.zeros(len(amount), dtype=np.int64)
+                key_values = []
+                for key in keys:
+                    values, inverse = np.unique(np.asarray(arrays[key]), return_inverse=True)
+                    codes = codes * len(values) + inverse.ravel()
+                    key_values.append(values)
+
+                sums = np.bincount(codes, weights=amount)
+                counts = np.bincount(codes)
+                for code in np.flatnonzero(counts):
+                    labels = {"day": day}
+                    remainder = int(code)
+                    for key, values in zip(reversed(keys), reversed(key_values)):
+                        remainder, i = divmod(remainder, len(values))
+                        labels[key] = str(values[i])
+                    group = tuple(labels[key] for key in by)
+                    total = totals.setdefault(group, [0.0, 0])
+                    total[0] += sums[code]
+                    total[1] += int(counts[code])
+
+        rows = [dict(zip(by, group), amount=amount, exits=exits)
+                for group, (amount, exits) in sorted(totals.items())]
+        return pd.DataFrame(rows, columns=by + ["amount", "exits"])
+
+    def read_day(self, day: date, columns: Sequence[str] = COLUMNS) -> pd.DataFrame:
+        """Get the archived transactions that departed on one day"""
+        frames = []
+        for path in self._chunk_paths(day):
+            arrays = self._read_chunk(path, columns)
+            frames.append(pd.DataFrame({
+                column: np.asarray(values).astype(str) if values.dtype.kind == "S" else np.asarray(values)
+                for column, values in arrays.items()
+            }))
+        if not frames:
+            return pd.DataFrame(columns=list(columns))
+        return pd.concat(frames, ignore_index=True)
+
+def benchmark_archive(num_transactions: int = 2000000, num_days: int = 30,
+                      root_dir: Optional[str] = None) -> Dict[str, float]:
+    """Time a monthly revenue report over a generated archive of num_transactions exits"""
+    import tempfile
+    import tracemalloc
+
+    rng = np.random.default_rng(0)
+    first_day = np.datetime64("2025-01-01", "us")
+    departures = first_day + rng.integers(0, num_days * 86400, num_transactions) * np.timedelta64(1, "s")
+    columns = {
+        "id": np.char.zfill(np.arange(num_transactions).astype(str), 36).astype("S36"),
+        "slot_id": np.char.add("slot_", rng.integers(1, 21, num_transactions).astype(str)),
+        "vehicle_type": np.array(["Car", "Bike", "Truck"])[rng.integers(0, 3, num_transactions)],
+        "vehicle_number": np.char.add("WB", np.arange(num_transactions).astype(str)),
+        "arrival_time": departures - np.timedelta64(2, "h"),
+        "departure_time": departures,
+        "amount": rng.integers(1, 20, num_transactions) * 50.0,
+        "timestamp": departures
+    }
+
+    with tempfile.TemporaryDirectory(dir=root_dir) as tmp_dir:
+        archive = TransactionArchive(tmp_dir, chunk_size=100000)
+        start = time.perf_counter()
+        archive.write_columns(columns)
+        write_seconds = time.perf_counter() - start
+        del columns, departures
+
+        month_start = date(2025, 1, 1)
+        month_end = month_start + timedelta(days=num_days - 1)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        by_day_type = archive.revenue(month_start, month_end, by=("day", "vehicle_type"))
+        by_slot = archive.revenue(month_start, month_end, by=("slot_id",))
+        report_seconds = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'transactions': num_transactions,
+        'format': archive.file_format,
+        'write_seconds': write_seconds,
+        'report_seconds': report_seconds,
+        'report_peak_mb': peak_bytes / 1e6,
+        'revenue': float(by_day_type['amount'].sum()),
+        'slot_groups': len(by_slot)
+    }
+
+if __name__ == "__main__":
+    result = benchmark_archive()
+    print(f"{result['transactions']} exits ({result['format']}): written in {result['write_seconds']:.2f} s, "
+          f"monthly reports in {result['report_seconds']:.2f} s, peak {result['report_peak_mb']:.1f} MB")